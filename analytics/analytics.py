@@ -2,13 +2,12 @@ import json
 import re
 from collections import defaultdict
 from intelligent_runbook_creator import IntelligentRunbookCreator
+from runbook_stream import iter_json_array
 
 # === Load Data ===
-with open("dev-ops-buddy.Messages_replies.json") as f:
-    messages_data = json.load(f)
-
-with open("runbooks_data_20250606_123950.json") as f:
-    runbooks_data = json.load(f)
+# Both exports are streamed record by record rather than loaded whole
+messages_data = iter_json_array("dev-ops-buddy.Messages_replies.json")
+runbook_records = iter_json_array("runbooks_data_20250606_123950.json")
 
 # === Clean Utility ===
 def clean_text(text: str) -> str:
@@ -23,7 +22,7 @@ def extract_query_from_message(msg_entry) -> str:
 
 # === Initialize ===
 creator = IntelligentRunbookCreator()
-runbook_titles = [clean_text(rb["title"]) for rb in runbooks_data["runbooks"]]
+runbook_titles = [clean_text(rb["title"]) for rb in runbook_records]
 
 stats = {
     "summary": {
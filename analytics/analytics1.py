@@ -2,6 +2,7 @@
 import json
 from collections import defaultdict
 from simple_rag import SimpleRAGSystem
+from runbook_stream import iter_json_array
 
 # Load all categories and subcategories
 categories = {
@@ -452,9 +453,8 @@ categories.keys()
 # Initialize RAG system
 rag = SimpleRAGSystem()
 
-# Load messages and replies
-with open("dev-ops-buddy.Messages_replies.json") as f:
-    messages_data = json.load(f)
+# Stream messages and replies instead of loading the whole export
+messages_data = iter_json_array("dev-ops-buddy.Messages_replies.json")
 
 # Flatten subcategory-to-category mapping
 subcategory_to_category = {}
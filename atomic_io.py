@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Crash-safe file writes and advisory locks for the data files the fetchers and indexers share.
+
+atomic_write() writes to a temp file in the target's directory, fsyncs it and renames it over
+the target, so a reader sees either the old file or the new one, never a partial one. Readers
+therefore never need a lock. file_lock() serialises writers that read-modify-write the same
+file (webhook handlers, the periodic sync, the --changes indexer).
+"""
+
+import os
+import json
+import tempfile
+from contextlib import contextmanager
+from typing import Any, IO, Iterator
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: writes stay atomic, only writer serialisation is lost
+    fcntl = None
+
+
+def _fsync_dir(path: str):
+    # Persist the rename itself; not every platform allows opening a directory
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w', encoding: str = 'utf-8') -> Iterator[IO[Any]]:
+    """Open a temp file for writing that replaces `path` only if the block completes"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=f".{os.path.basename(path)}.")
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates 0600 files; keep the permissions readers had before
+        os.chmod(tmp, os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    _fsync_dir(path)
+
+
+def write_json(path: str, data: Any, **dump_kwargs):
+    with atomic_write(path) as f:
+        json.dump(data, f, **dump_kwargs)
+
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive advisory lock on `path`.lock, held for the block; blocks until other writers finish"""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""RSS per worker for SimpleRAGSystem's chunk list: per-process dicts vs the shared chunk arena.
+
+Each worker is a fresh process (like a Gunicorn worker) that loads the chunks and reports its
+memory. "legacy" rebuilds what SimpleRAGSystem used to hold: every runbook's text plus a dict
+per 500-char chunk repeating title and url. "arena" maps chunk_arena.bin. PSS splits shared
+pages between the processes mapping them, so it shows what each worker really costs.
+
+Usage (from the repo root, Linux):
+    python benchmarks/chunk_memory.py [devops_runbooks.json] [--workers 4] [--scale 50]
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+import multiprocessing as mp
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chunk_arena import ChunkArena, build_arena
+from runbook_store import clean_text, page_body
+from runbook_stream import iter_runbooks
+
+
+def memory_kb() -> dict:
+    """RSS and PSS of this process in KB, from /proc"""
+    stats = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('Rss', 'Pss'):
+                stats[key.lower()] = int(value.split()[0])
+    return stats
+
+
+def scaled_runbooks(json_file: str, scale: int):
+    runbooks = list(iter_runbooks(json_file))
+    for copy in range(scale):
+        for runbook in runbooks:
+            yield {**runbook, 'id': f"{runbook['id']}-{copy}", 'title': f"{runbook.get('title', '')} #{copy}"}
+
+
+def runbook_chunks(json_file: str, scale: int):
+    for runbook in scaled_runbooks(json_file, scale):
+        text = clean_text(page_body(runbook))
+        yield runbook['id'], runbook.get('title', ''), runbook.get('url', ''), [text[i:i + 500] for i in range(0, len(text), 500)]
+
+
+def worker(mode: str, json_file: str, scale: int, arena_path: str, ready, results, go):
+    before = memory_kb()
+    if mode == 'legacy':
+        runbooks = [{**rb, 'content': clean_text(page_body(rb))} for rb in scaled_runbooks(json_file, scale)]
+        chunks = []
+        for rb in runbooks:
+            text = rb['content']
+            for idx, i in enumerate(range(0, len(text), 500)):
+                chunks.append({"runbook_id": rb['id'], "runbook_title": rb.get('title', ''),
+                               "runbook_url": rb.get('url', ''), "chunk_index": idx, "text": text[i:i + 500]})
+    else:
+        chunks = ChunkArena(arena_path)
+        # Touch every chunk, as a fallback scan would, so the mapped pages are resident
+        sum(len(chunks.text(i)) for i in range(len(chunks)))
+    ready.put(True)
+    go.wait()  # all workers loaded: shared pages are now split between them in PSS
+    after = memory_kb()
+    results.put((mode, len(chunks), before, after))
+
+
+def run(mode: str, args, arena_path: str):
+    ctx = mp.get_context('spawn')
+    ready, results, go = ctx.Queue(), ctx.Queue(), ctx.Event()
+    procs = [ctx.Process(target=worker, args=(mode, args.json_file, args.scale, arena_path, ready, results, go))
+             for _ in range(args.workers)]
+    for p in procs:
+        p.start()
+    for _ in procs:
+        ready.get()
+    go.set()
+    rows = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    chunk_count = rows[0][1]
+    rss = sum(after['rss'] - before['rss'] for _, _, before, after in rows) / len(rows)
+    pss = sum(after['pss'] - before['pss'] for _, _, before, after in rows) / len(rows)
+    print(f"📦 {mode:<6}: {chunk_count} chunks, per worker +{rss / 1024:7.1f} MB RSS, +{pss / 1024:7.1f} MB PSS "
+          f"({args.workers} workers, +{pss * args.workers / 1024:.1f} MB PSS in total)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('json_file', nargs='?', default='devops_runbooks.json')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--scale', type=int, default=50, help="Copies of the export, to get past interpreter noise")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        arena_path = os.path.join(tmp, 'chunk_arena.bin')
+        chunks = build_arena(arena_path, runbook_chunks(args.json_file, args.scale), source='benchmark')
+        print(f"🧩 Arena: {chunks} chunks, {os.path.getsize(arena_path) / 1024 / 1024:.1f} MB on disk")
+        run('legacy', args, arena_path)
+        run('arena', args, arena_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Compare fixed batch_size=16 encoding with token-budgeted, length-sorted batches.
+
+Usage (from the repo root):
+    python benchmarks/embedding_batching.py [devops_runbooks.json] [--repeat 3] [--token-budget 8192]
+
+On devops_runbooks.json (54 chunks, median and max 256 tokens) with a MiniLM-L6 sized model on
+one CPU core, budgets of 8192 / 4096 / 2048 ran at 0.88x / 1.01x / 1.06x the speed of fixed
+batches of 16: 400-word chunks nearly all hit max_seq_length, and encode() already sorts by
+length, so there is little padding left to remove. The indexer keeps fixed batches unless
+--token-budget is given.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from embedding_batching import token_lengths, plan_batches, encode_length_bucketed
+from indexing_pipeline_efficient import EfficientRunbookIndexer
+from runbook_stream import iter_runbooks
+
+
+def load_chunks(json_file: str):
+    # Reuse the indexer's cleaning and chunking without opening the vector store
+    chunker = EfficientRunbookIndexer.__new__(EfficientRunbookIndexer)
+    chunker.chunk_size = 400
+    chunker.overlap = 50
+    texts = []
+    for runbook in iter_runbooks(json_file):
+        content = runbook.get('content', {})
+        body = content.get('body', '') if isinstance(content, dict) else str(content)
+        cleaned = chunker.clean_text(body)
+        if len(cleaned) >= 50:
+            texts.extend(chunker.chunk_text(cleaned))
+    return texts
+
+
+def time_it(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('json_file', nargs='?', default='devops_runbooks.json')
+    parser.add_argument('--model', default='all-MiniLM-L6-v2')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--token-budget', type=int, default=8192)
+    args = parser.parse_args()
+
+    texts = load_chunks(args.json_file)
+    model = SentenceTransformer(args.model, device='cpu')
+    lengths = token_lengths(model, texts)
+    batches = plan_batches(lengths, args.token_budget)
+
+    # SentenceTransformer.encode already sorts by length inside a call; it just keeps 16 rows per batch
+    sorted_lengths = sorted(lengths, reverse=True)
+    fixed_padded = sum(len(sorted_lengths[i:i + 16]) * sorted_lengths[i] for i in range(0, len(sorted_lengths), 16))
+    bucketed_padded = sum(len(b) * lengths[b[0]] for b in batches)
+    print(f"📚 {len(texts)} chunks, {sum(lengths)} real tokens (median {int(np.median(lengths))}, max {max(lengths)})")
+    print(f"📦 Fixed batches: {(len(texts) + 15) // 16} of 16, ~{fixed_padded} padded tokens")
+    print(f"📦 Budgeted batches: {len(batches)}, {bucketed_padded} padded tokens")
+
+    model.encode(texts[:16], batch_size=16)  # warm-up
+
+    fixed = time_it(lambda: model.encode(texts, batch_size=16, show_progress_bar=False), args.repeat)
+    bucketed = time_it(lambda: encode_length_bucketed(model, texts, args.token_budget), args.repeat)
+
+    reference = model.encode(texts, batch_size=16, show_progress_bar=False)
+    candidate = encode_length_bucketed(model, texts, args.token_budget)
+    max_diff = float(np.abs(reference - candidate).max())
+
+    print(f"\n⏱️ fixed batch_size=16 : {len(texts) / fixed:8.1f} chunks/sec ({fixed:.2f}s)")
+    print(f"⏱️ token-budgeted     : {len(texts) / bucketed:8.1f} chunks/sec ({bucketed:.2f}s)")
+    print(f"📈 speed-up: {fixed / bucketed:.2f}x, max abs difference in vectors: {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
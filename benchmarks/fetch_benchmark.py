@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Drive specific.py's fetchers against the local Confluence stand-in.
+
+Runs, against one in-process stand-in server:
+  1. a cold descendant crawl with 1 worker and with --workers workers
+  2. a warm crawl with the previous result as `known` (unchanged bodies are skipped)
+  3. an incremental search after touching --touch pages
+
+Usage (from the repo root):
+    python benchmarks/fetch_benchmark.py [--scale 5000] [--latency-ms 30] [--rate-limit 0.02] [--workers 8]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import random
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from werkzeug.serving import make_server
+
+import specific
+from confluence_client import ConfluenceClient
+from confluence_standin import RUNBOOKS_PARENT_ID, create_app, load_store
+
+
+def start_standin(store, latency_ms: float, rate_limit: float):
+    app = create_app(store, latency_ms, rate_limit, retry_after=0)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def timed_run(label: str, fn):
+    specific.reset_transfer_stats()
+    start = time.perf_counter()
+    pages = fn()
+    elapsed = time.perf_counter() - start
+    count = len(pages) if pages is not None else 0
+    print(f"⏱️ {label:<28} {elapsed:7.2f}s  {count:6d} pages  "
+          f"{specific.transfer_stats['requests']:6d} requests  {specific.transfer_stats['bytes'] / 1024:9.1f} KB")
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=0, help="Pad the stand-in with synthetic pages up to this many")
+    parser.add_argument('--latency-ms', type=float, default=30.0)
+    parser.add_argument('--rate-limit', type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument('--workers', type=int, default=specific.MAX_WORKERS)
+    parser.add_argument('--touch', type=int, default=10, help="Pages edited before the incremental run")
+    args = parser.parse_args()
+
+    store = load_store(args.scale)
+    server, base_url = start_standin(store, args.latency_ms, args.rate_limit)
+    print(f"📚 Stand-in at {base_url}: {len(store.pages)} pages, {args.latency_ms} ms latency, "
+          f"{args.rate_limit:.0%} throttled")
+
+    # Crawls checkpoint here, never over a production crawl's fetch_checkpoint.jsonl in the cwd
+    scratch = tempfile.mkdtemp(prefix='fetch_benchmark_')
+    checkpoint = os.path.join(scratch, specific.CHECKPOINT_FILE)
+
+    # Retries stay in get_with_retry as in production; the cache is off so every run hits the server
+    specific.client = ConfluenceClient(base_url=base_url, pool_size=args.workers, max_retries=0,
+                                       timeout=specific.REQUEST_TIMEOUT, use_cache=False)
+    try:
+        timed_run("cold crawl, 1 worker",
+                  lambda: specific.fetch_descendant_pages(RUNBOOKS_PARENT_ID, max_workers=1, resume=False,
+                                                          checkpoint_file=checkpoint))
+        pages = timed_run(f"cold crawl, {args.workers} workers",
+                          lambda: specific.fetch_descendant_pages(RUNBOOKS_PARENT_ID, max_workers=args.workers, resume=False,
+                                                                  checkpoint_file=checkpoint))
+        if pages is None:
+            print("❌ Crawl failed; nothing to compare against")
+            return
+        known = {page['id']: page for page in pages}
+        timed_run("warm crawl (known bodies)",
+                  lambda: specific.fetch_descendant_pages(RUNBOOKS_PARENT_ID, max_workers=args.workers, resume=False,
+                                                          known=known, checkpoint_file=checkpoint))
+
+        since = datetime.now(timezone.utc) - timedelta(minutes=1)
+        for page_id in random.sample(list(known), min(args.touch, len(known))):
+            store.touch(page_id)
+        timed_run(f"incremental, {args.touch} touched",
+                  lambda: specific.fetch_changed_pages(RUNBOOKS_PARENT_ID, since, args.workers, known=known))
+
+        served = specific.client.get_json("/_standin/stats")
+        print(f"📊 Stand-in served {served['requests']} requests ({served['bytes'] / 1024:.1f} KB), "
+              f"{served['throttled']} throttled with 429")
+    finally:
+        specific.client.close()
+        server.shutdown()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Allocations and latency per query for dict-shaped results vs the slotted records in records.py.
+
+A "query" here is the part of SimpleRAGSystem.process_query that builds Python objects: turning
+a Chroma result into hits, keeping the relevant ones, building sources and serialising them for
+the /query response. The same work is done twice, once with dicts as before and once with
+SearchHit/Source, with no model or database involved. tracemalloc measures what each answer
+keeps allocated, and perf_counter times the whole thing. Block counts flatter the dicts a
+little: CPython reuses freed dicts from a free list, which tracemalloc does not see.
+
+It also measures a chunk list: per-chunk memory of dicts vs ChunkRecords for `--chunks` items.
+
+Usage (from the repo root):
+    python benchmarks/query_records.py [--queries 20000] [--top-k 5] [--chunks 100000]
+"""
+
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from records import ChunkRecord, SearchHit
+
+
+def chroma_result(top_k: int) -> dict:
+    """A result shaped like collection.query(...) for one query"""
+    return {
+        'documents': [[f"Step {i}: restart the service and check the pod logs. " * 9 for i in range(top_k)]],
+        'metadatas': [[{
+            'runbook_id': str(2678227022 + i),
+            'runbook_title': f"Runbook {i}",
+            'runbook_url': f"https://example.atlassian.net/wiki/spaces/DEVOPS/pages/{2678227022 + i}",
+            'chunk_index': i,
+            'ancestor_path': 'DevOps / Runbooks'
+        } for i in range(top_k)]],
+        'distances': [[0.1 * i for i in range(top_k)]]
+    }
+
+
+def dict_query(result: dict) -> dict:
+    hits = []
+    for i in range(len(result['documents'][0])):
+        hits.append({
+            'text': result['documents'][0][i],
+            'runbook_id': result['metadatas'][0][i].get('runbook_id'),
+            'title': result['metadatas'][0][i].get('runbook_title', ''),
+            'url': result['metadatas'][0][i].get('runbook_url', ''),
+            'chunk_index': result['metadatas'][0][i].get('chunk_index'),
+            'ancestor_path': result['metadatas'][0][i].get('ancestor_path', ''),
+            'relevance_score': 1.0 / (1.0 + result['distances'][0][i])
+        })
+    meaningful = [h for h in hits if h.get('relevance_score', 0) > 0.6]
+    return {
+        'hits': meaningful,
+        'sources': [{"title": h["title"], "url": h["url"], "relevance": h["relevance_score"]} for h in meaningful]
+    }
+
+
+def record_query(result: dict) -> dict:
+    hits = [
+        SearchHit(document, metadata.get('runbook_id'), metadata.get('runbook_title', ''),
+                  metadata.get('runbook_url', ''), metadata.get('chunk_index'),
+                  1.0 / (1.0 + distance), metadata.get('ancestor_path', ''))
+        for document, metadata, distance in zip(result['documents'][0], result['metadatas'][0], result['distances'][0])
+    ]
+    meaningful = [h for h in hits if h.relevance_score > 0.6]
+    return {'hits': meaningful, 'sources': [h.source() for h in meaningful]}
+
+
+def dict_response(answer: dict) -> str:
+    return json.dumps({'sources': answer['sources']})
+
+
+def record_response(answer: dict) -> str:
+    return json.dumps({'sources': [s.to_dict() for s in answer['sources']]})
+
+
+def allocations(fn, *args) -> tuple:
+    """(blocks, bytes) still referenced by fn's return value"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = fn(*args)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    del kept
+    return sum(s.count_diff for s in stats), sum(s.size_diff for s in stats)
+
+
+def bench_queries(name: str, query, respond, result: dict, queries: int):
+    query(result)  # warm up interned strings and free lists
+    blocks, size = allocations(query, result)
+    start = time.perf_counter()
+    for _ in range(queries):
+        respond(query(result))
+    elapsed = time.perf_counter() - start
+    print(f"🔎 {name:<7}: {blocks:4d} blocks / {size:6d} B held per answer, "
+          f"{elapsed / queries * 1e6:6.2f} µs per query incl. serialisation")
+
+
+def chunk_dicts(n: int) -> list:
+    return [{"runbook_id": str(i // 20), "runbook_title": "Runbook", "runbook_url": "https://example/page",
+             "chunk_index": i % 20, "text": "x"} for i in range(n)]
+
+
+def chunk_records(n: int) -> list:
+    return [ChunkRecord("x", str(i // 20), "Runbook", "https://example/page", i % 20) for i in range(n)]
+
+
+def bench_chunks(name: str, build, n: int):
+    start = time.perf_counter()
+    blocks, size = allocations(build, n)
+    elapsed = time.perf_counter() - start
+    print(f"🧩 {name:<7}: {n} chunks, {size / n:6.1f} B and {blocks / n:.2f} blocks per chunk, "
+          f"built in {elapsed * 1000:.0f} ms (under tracemalloc)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--chunks', type=int, default=100000)
+    args = parser.parse_args()
+
+    result = chroma_result(args.top_k)
+    assert dict_response(dict_query(result)) == record_response(record_query(result))
+    bench_queries('dicts', dict_query, dict_response, result, args.queries)
+    bench_queries('records', record_query, record_response, result, args.queries)
+    bench_chunks('dicts', chunk_dicts, args.chunks)
+    bench_chunks('records', chunk_records, args.chunks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Memory-mapped, read-only store of chunk texts for the web app's in-memory chunk list.
+
+All chunk text lives in one UTF-8 blob. Fixed-width arrays give each chunk its byte offset,
+its runbook ordinal and its chunk index, and a small table holds each runbook's id, title
+and url once. Every worker maps the same file, so the text sits in the shared page cache
+instead of being copied into each process's heap.
+
+File layout (native byte order):
+    MAGIC | text blob | pad | offsets u64[n+1] | ordinals u32[n] | chunk_index u32[n] | footer JSON | u64 footer length | MAGIC
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+from array import array
+from collections.abc import Sequence
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from atomic_io import atomic_write, file_lock
+from records import ChunkRecord
+
+ARENA_FILE = os.environ.get("RUNBOOK_CHUNK_ARENA", "chunk_arena.bin")
+MAGIC = b"RBARENA1"
+ARENA_FORMAT = 1
+
+# (runbook id, title, url, chunk texts)
+RunbookChunks = Tuple[str, str, str, List[str]]
+
+
+def _pad(f, alignment: int = 8):
+    f.write(b"\0" * (-f.tell() % alignment))
+
+
+def build_arena(path: str, runbooks: Iterable[RunbookChunks], source: str) -> int:
+    """Write an arena for `runbooks`, streaming the text; returns the number of chunks"""
+    offsets = array('Q', [0])
+    ordinals = array('I')
+    chunk_indexes = array('I')
+    table = []
+    with atomic_write(path, 'wb') as f:
+        f.write(MAGIC)
+        text_start = f.tell()
+        for runbook_id, title, url, chunks in runbooks:
+            ordinal = len(table)
+            table.append([runbook_id, title, url])
+            for idx, chunk in enumerate(chunks):
+                data = chunk.encode('utf-8')
+                f.write(data)
+                offsets.append(offsets[-1] + len(data))
+                ordinals.append(ordinal)
+                chunk_indexes.append(idx)
+
+        sections = {}
+        for name, values in (('offsets', offsets), ('ordinals', ordinals), ('chunk_index', chunk_indexes)):
+            _pad(f, values.itemsize)
+            sections[name] = f.tell()
+            values.tofile(f)
+        footer = json.dumps({
+            'format': ARENA_FORMAT,
+            'byteorder': sys.byteorder,
+            'source': source,
+            'chunks': len(ordinals),
+            'text_start': text_start,
+            'sections': sections,
+            'runbooks': table
+        }, ensure_ascii=False).encode('utf-8')
+        f.write(footer)
+        f.write(struct.pack('<Q', len(footer)))
+        f.write(MAGIC)
+    return len(ordinals)
+
+
+def store_source(store_path: str, revision: int) -> str:
+    """Arena source for a runbook store: the store's location and the revision chunked from it"""
+    return f"{os.path.abspath(store_path)}@{revision}"
+
+
+def retarget_arena(path: str, source: str):
+    """Rewrite the source recorded in an arena's footer, e.g. once its store has been moved"""
+    with open(path, 'r+b') as f:
+        tail = len(MAGIC) + 8
+        f.seek(-tail, os.SEEK_END)
+        (footer_len,) = struct.unpack('<Q', f.read(8))
+        footer_start = f.seek(-tail - footer_len, os.SEEK_END)
+        footer = json.loads(f.read(footer_len).decode('utf-8'))
+        footer['source'] = source
+        data = json.dumps(footer, ensure_ascii=False).encode('utf-8')
+        f.seek(footer_start)
+        f.write(data)
+        f.write(struct.pack('<Q', len(data)))
+        f.write(MAGIC)
+        f.truncate()
+
+
+class ChunkArena(Sequence):
+    """Read-only chunk list over a mapped arena; items are materialised as ChunkRecords on access"""
+
+    def __init__(self, path: str = ARENA_FILE):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        tail = len(MAGIC) + 8
+        (footer_len,) = struct.unpack('<Q', self._mm[-tail:-len(MAGIC)])
+        if self._mm[:len(MAGIC)] != MAGIC or self._mm[-len(MAGIC):] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not a chunk arena")
+        footer = json.loads(self._mm[-tail - footer_len:-tail].decode('utf-8'))
+        if footer['format'] != ARENA_FORMAT or footer['byteorder'] != sys.byteorder:
+            self._mm.close()
+            raise ValueError(f"{path} was written in an incompatible format")
+
+        n = footer['chunks']
+        sections = footer['sections']
+        self.source = footer['source']
+        self.runbooks = [tuple(row) for row in footer['runbooks']]
+        self._text_start = footer['text_start']
+        view = memoryview(self._mm)
+        self._views = [view]
+        self._offsets = self._section(view, sections['offsets'], n + 1, 'Q')
+        self._ordinals = self._section(view, sections['ordinals'], n, 'I')
+        self._chunk_index = self._section(view, sections['chunk_index'], n, 'I')
+
+    def _section(self, view: memoryview, start: int, count: int, typecode: str) -> memoryview:
+        section = view[start:start + count * array(typecode).itemsize].cast(typecode)
+        self._views.append(section)
+        return section
+
+    def __len__(self) -> int:
+        return len(self._ordinals)
+
+    @property
+    def runbook_count(self) -> int:
+        return len(self.runbooks)
+
+    def text(self, i: int) -> str:
+        start = self._text_start + self._offsets[i]
+        end = self._text_start + self._offsets[i + 1]
+        return self._mm[start:end].decode('utf-8')
+
+    def runbook(self, i: int) -> Tuple[str, str, str]:
+        return self.runbooks[self._ordinals[i]]
+
+    def chunk(self, i: int) -> ChunkRecord:
+        runbook_id, title, url = self.runbook(i)
+        return ChunkRecord(self.text(i), runbook_id, title, url, self._chunk_index[i])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.chunk(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("chunk index out of range")
+        return self.chunk(i)
+
+    def __iter__(self) -> Iterator[ChunkRecord]:
+        for i in range(len(self)):
+            yield self.chunk(i)
+
+    def find(self, needle: str) -> Iterator[int]:
+        """For each runbook containing `needle` (already lower-cased), the chunk where it first occurs.
+
+        A runbook's chunks are searched as one text, so phrases that straddle a chunk boundary
+        still match, as they did when the fallback scanned whole runbooks.
+        """
+        first, n = 0, len(self)
+        while first < n:
+            end = first + 1
+            while end < n and self._ordinals[end] == self._ordinals[first]:
+                end += 1
+            texts = [self.text(i).lower() for i in range(first, end)]
+            pos = ''.join(texts).find(needle)
+            if pos >= 0:
+                i = first
+                for text in texts:
+                    if pos < len(text):
+                        break
+                    pos -= len(text)
+                    i += 1
+                yield i
+            first = end
+
+    def close(self):
+        # Exported memoryviews must be released before the map can close
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mm.close()
+
+
+def load_arena(source: str, runbooks: Callable[[], Iterable[RunbookChunks]], path: str = ARENA_FILE) -> ChunkArena:
+    """Map the arena for `source`, rebuilding it first if it was built from something else.
+
+    Workers starting together serialise on the arena lock, so the first one builds it and the
+    rest map the result.
+    """
+    with file_lock(path):
+        arena: Optional[ChunkArena] = None
+        if os.path.exists(path):
+            try:
+                arena = ChunkArena(path)
+            except (ValueError, struct.error, json.JSONDecodeError, KeyError):
+                arena = None
+        if arena is not None and arena.source == source:
+            return arena
+        if arena is not None:
+            arena.close()
+        build_arena(path, runbooks(), source)
+        return ChunkArena(path)
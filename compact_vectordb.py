@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Compact the runbook vector store.
+
+Steps:
+1. Measure disk usage and query latency on the active collection.
+2. Copy the live records into a fresh versioned collection. This rebuilds
+   the HNSW graph without tombstones left by deletes and upserts. Indexers are held off
+   with the index write lock from here until the flip, so none of their writes are lost.
+3. Flip the active-index pointer to the copy. The original becomes the rollback target,
+   since other processes may still be serving it, and is dropped by the next prune.
+4. Prune older versions, then remove segment directories chroma.sqlite3 no longer references.
+5. VACUUM the SQLite file, then measure disk usage and latency again.
+
+Until the rollback target is pruned the store holds two copies, so it can end up larger than
+before. The report gives the rollback copy's size separately as space still to be freed.
+
+Usage:
+    python compact_vectordb.py [--dry-run] [--queries 20]
+"""
+
+import os
+import re
+import time
+import shutil
+import sqlite3
+import argparse
+import statistics
+from contextlib import closing
+from typing import Any, Dict, List
+
+import chromadb
+
+import index_manifest
+from index_registry import (
+    VECTORDB_PATH, DEFAULT_COLLECTION, get_active_collection_name, versioned_collection_name, activate_collection,
+    prune_collections, index_write_lock, forget_client
+)
+
+SQLITE_FILE = "chroma.sqlite3"
+SEGMENT_DIR_PATTERN = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$')
+COPY_PAGE_SIZE = 500
+
+
+def dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def format_bytes(size: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def live_segment_ids(path: str) -> set:
+    with closing(sqlite3.connect(f"file:{os.path.join(path, SQLITE_FILE)}?mode=ro", uri=True)) as conn:
+        return {row[0] for row in conn.execute("SELECT id FROM segments")}
+
+
+def collection_segment_bytes(path: str, collection_id) -> int:
+    """Size of a collection's segment directories; its rows in chroma.sqlite3 are not counted"""
+    with closing(sqlite3.connect(f"file:{os.path.join(path, SQLITE_FILE)}?mode=ro", uri=True)) as conn:
+        ids = [row[0] for row in conn.execute("SELECT id FROM segments WHERE collection = ?", (str(collection_id),))]
+    return sum(dir_size(os.path.join(path, segment_id)) for segment_id in ids)
+
+
+def find_orphan_segment_dirs(path: str) -> List[str]:
+    """UUID directories on disk that no segment in chroma.sqlite3 points at"""
+    if not os.path.exists(os.path.join(path, SQLITE_FILE)):
+        # Without the catalog every directory would look orphaned; refuse to guess
+        print(f"⚠️ No {SQLITE_FILE} in {path}, skipping orphan detection")
+        return []
+    live = live_segment_ids(path)
+    return sorted(
+        name for name in os.listdir(path)
+        if SEGMENT_DIR_PATTERN.match(name) and os.path.isdir(os.path.join(path, name)) and name not in live
+    )
+
+
+def sample_query_embeddings(collection, count: int) -> List[List[float]]:
+    sample = collection.get(limit=count, include=['embeddings'])
+    return [list(e) for e in sample['embeddings']]
+
+
+def measure_latency(collection, query_embeddings: List[List[float]], n_results: int = 5) -> Dict[str, float]:
+    if not query_embeddings:
+        return {}
+    collection.query(query_embeddings=query_embeddings[:1], n_results=n_results)  # warm-up / load index
+    timings = []
+    for embedding in query_embeddings:
+        start = time.perf_counter()
+        collection.query(query_embeddings=[embedding], n_results=n_results)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        'mean_ms': round(statistics.mean(timings), 2)
+    }
+
+
+def copy_collection(client, source, target_name: str):
+    metadata = dict(source.metadata or {})
+    target = client.create_collection(name=target_name, metadata=metadata or None)
+    total = source.count()
+    for offset in range(0, total, COPY_PAGE_SIZE):
+        page = source.get(limit=COPY_PAGE_SIZE, offset=offset, include=['embeddings', 'documents', 'metadatas'])
+        target.add(
+            ids=page['ids'],
+            embeddings=page['embeddings'],
+            documents=page['documents'],
+            metadatas=page['metadatas']
+        )
+        print(f"   📦 Copied {min(offset + COPY_PAGE_SIZE, total)} / {total} chunks")
+    return target
+
+
+def compact(path: str = VECTORDB_PATH, query_count: int = 20, dry_run: bool = False) -> Dict[str, Any]:
+    client = chromadb.PersistentClient(path=path)
+    active_name = get_active_collection_name(path)
+    source = client.get_collection(name=active_name)
+
+    size_before = dir_size(path)
+    queries = sample_query_embeddings(source, query_count)
+    latency_before = measure_latency(source, queries)
+    orphans = find_orphan_segment_dirs(path)
+    print(f"📂 Active collection '{active_name}': {source.count()} chunks, store size {format_bytes(size_before)}")
+    print(f"⏱️ Query latency before: {latency_before}")
+    print(f"🧹 Orphaned segment directories: {len(orphans)}")
+
+    if dry_run:
+        orphan_bytes = sum(dir_size(os.path.join(path, o)) for o in orphans)
+        print(f"🔍 Dry run: would rebuild '{active_name}' and reclaim at least {format_bytes(orphan_bytes)} from orphans")
+        return {'dry_run': True, 'orphans': orphans, 'orphan_bytes': orphan_bytes}
+
+    target_name = versioned_collection_name()
+    # Indexers wait from here until the flip, so no write lands in the collection being retired
+    with index_write_lock(path):
+        if get_active_collection_name(path) != active_name:
+            raise RuntimeError(f"Active index switched away from '{active_name}' meanwhile; rerun the compaction")
+        # Reopen so writes other processes made since this client was opened are copied too
+        forget_client(client)
+        client = chromadb.PersistentClient(path=path)
+        source = client.get_collection(name=active_name)
+        print(f"🔨 Rebuilding HNSW index into '{target_name}'...")
+        target = copy_collection(client, source, target_name)
+        if target.count() != source.count():
+            client.delete_collection(target_name)
+            raise RuntimeError(f"Copy incomplete ({target.count()} of {source.count()} chunks); keeping '{active_name}'")
+
+        manifest = index_manifest.load_manifest(active_name, path)
+        if manifest:
+            index_manifest.save_manifest(target_name, manifest.get('runbooks', {}), manifest.get('last_run', {}),
+                                         manifest.get('settings'), path=path)
+
+        # Workers that resolved the pointer before the flip keep querying the original until they
+        # re-read it, so it stays as the rollback target instead of being dropped here
+        activate_collection(target_name, path, details={'compacted_from': active_name})
+        for dropped in prune_collections(client, path):
+            index_manifest.remove_manifest(dropped, path)
+
+    # Deleted collections leave their segment directories behind; sweep them with the pre-existing orphans
+    removed = []
+    for name in find_orphan_segment_dirs(path):
+        shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+        removed.append(name)
+
+    try:
+        with closing(sqlite3.connect(os.path.join(path, SQLITE_FILE))) as conn:
+            conn.execute("VACUUM")
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ Could not VACUUM {SQLITE_FILE}: {e}")
+
+    size_after = dir_size(path)
+    rollback_bytes = collection_segment_bytes(path, source.id)
+    latency_after = measure_latency(client.get_collection(name=target_name), queries)
+    report = {
+        'collection_before': active_name,
+        'collection_after': target_name,
+        'chunks': target.count(),
+        'orphan_dirs_removed': removed,
+        'bytes_before': size_before,
+        'bytes_after': size_after,
+        # Never negative: a store that grew because the rollback copy is kept reclaimed nothing yet
+        'bytes_reclaimed': max(0, size_before - size_after),
+        'rollback_collection': active_name,
+        'rollback_bytes': rollback_bytes,
+        'latency_before': latency_before,
+        'latency_after': latency_after
+    }
+
+    print("\n✅ COMPACTION COMPLETE")
+    if active_name.startswith(f"{DEFAULT_COLLECTION}_v"):
+        freed_by = "the next build or compaction prunes it"
+    else:
+        # prune_collections only drops versioned builds
+        freed_by = f"it is not a versioned build, so delete it by hand once '{target_name}' has proven itself"
+    print(f"   ⏪ '{active_name}' kept as the rollback target ({format_bytes(rollback_bytes)} of segment files, "
+          f"still to be freed); {freed_by}")
+    print(f"   🗑️ Removed {len(removed)} orphaned segment directories")
+    if size_after <= size_before:
+        change = f"reclaimed {format_bytes(size_before - size_after)}"
+    else:
+        change = f"grew {format_bytes(size_after - size_before)} while the rollback copy is kept"
+    print(f"   💾 {format_bytes(size_before)} -> {format_bytes(size_after)} ({change})")
+    print(f"   ⏱️ Query latency p50 {latency_before.get('p50_ms')} ms -> {latency_after.get('p50_ms')} ms, "
+          f"p95 {latency_before.get('p95_ms')} ms -> {latency_after.get('p95_ms')} ms")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default=VECTORDB_PATH, help="ChromaDB persist directory")
+    parser.add_argument('--queries', type=int, default=20, help="Stored vectors to replay as latency probes")
+    parser.add_argument('--dry-run', action='store_true', help="Only report what would be reclaimed")
+    args = parser.parse_args()
+    compact(args.path, args.queries, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""On-disk cache for Confluence REST GETs.
+
+Fresh entries (younger than their endpoint class TTL) are served without a request. Stale entries
+are revalidated with If-None-Match / If-Modified-Since when the stored response carried an ETag or
+Last-Modified. A 304 then refreshes the entry instead of re-downloading the body.
+
+Environment:
+    CONFLUENCE_CACHE_DIR   where entries live (default ./.confluence_cache)
+    CONFLUENCE_OFFLINE=1   serve only from cache, fresh or stale; misses raise OfflineCacheMiss
+    CONFLUENCE_CACHE=off   bypass the cache entirely
+    CONFLUENCE_CACHE_MAX_MB  size cap (default 256, 0 for none); least recently used entries go first
+
+Responses requested with ttl=0 are only stored when they carry an ETag or Last-Modified, since
+nothing else could ever be served from them.
+
+Usage:
+    python confluence_cache.py stats
+    python confluence_cache.py prune
+    python confluence_cache.py clear
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+CACHE_DIR = os.environ.get("CONFLUENCE_CACHE_DIR", "./.confluence_cache")
+DEFAULT_TTL_SECS = 120
+MAX_BYTES = int(float(os.environ.get("CONFLUENCE_CACHE_MAX_MB", "256")) * 1024 * 1024)
+# Pruning goes below the cap, so a full cache is not walked again on the very next store
+PRUNE_TO = 0.8
+# Temp files older than this were left by a crashed writer
+STALE_TMP_SECS = 3600
+
+# First matching pattern wins; matched against the URL path
+ENDPOINT_TTLS = [
+    (re.compile(r'/rest/api/user/current$'), 3600),
+    (re.compile(r'/rest/api/space(/[^/]+)?$'), 3600),
+    (re.compile(r'/rest/api/content/search$'), 60),
+    (re.compile(r'/rest/api/content/\d+/child/page$'), 60),
+    (re.compile(r'/rest/api/space/[^/]+/content(/page)?$'), 300),
+    (re.compile(r'/rest/api/content/\d+$'), 600),
+]
+
+
+class OfflineCacheMiss(requests.ConnectionError):
+    """Raised in offline mode when a request has never been cached"""
+
+
+def ttl_for(url: str) -> int:
+    path = urlparse(url).path
+    for pattern, ttl in ENDPOINT_TTLS:
+        if pattern.search(path):
+            return ttl
+    return DEFAULT_TTL_SECS
+
+
+def _cache_key(url: str, params: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]], auth) -> str:
+    # Credentials are part of the key so two users, or one user after a token rotation, never see
+    # each other's permission-filtered results; only a digest of the secret goes into the key
+    secret = hashlib.sha256(str(getattr(auth, 'password', '') or '').encode('utf-8')).hexdigest()
+    identity = [getattr(auth, 'username', '') or '', secret]
+    accept = (headers or {}).get('Accept', '')
+    canonical = json.dumps([url, sorted((params or {}).items()), accept, identity], default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _to_response(entry: Dict[str, Any], body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = entry['status']
+    response.reason = entry.get('reason', 'OK')
+    response.headers = CaseInsensitiveDict(entry['headers'])
+    response.url = entry['url']
+    response.encoding = entry.get('encoding')
+    response._content = body
+    response.from_cache = True
+    return response
+
+
+class ConfluenceCache:
+    def __init__(self, cache_dir: str = CACHE_DIR, offline: Optional[bool] = None, enabled: Optional[bool] = None,
+                 max_bytes: int = MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.offline = os.environ.get("CONFLUENCE_OFFLINE") == "1" if offline is None else offline
+        self.enabled = os.environ.get("CONFLUENCE_CACHE", "on") != "off" if enabled is None else enabled
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0, 'offline_misses': 0, 'pruned': 0}
+        self._lock = threading.Lock()
+        # Measured on the first store, then tracked; other processes' writes are picked up by the next prune
+        self._disk_bytes = None
+        # The directory is created by the first stored response, so processes that only construct
+        # a client (the web app, probes in offline or bypass mode) leave no trace on disk
+
+    def _paths(self, key: str):
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return f"{base}.json", f"{base}.body"
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _load(self, key: str):
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            with open(body_path, 'rb') as f:
+                return entry, f.read()
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None, None
+
+    def _write(self, path: str, data: bytes):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def _mark_used(self, key: str):
+        # Pruning goes by metadata mtime, so a hit moves the entry to the back of the queue
+        meta_path, _ = self._paths(key)
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+
+    def _store(self, key: str, response: requests.Response, stored_at: float):
+        meta_path, body_path = self._paths(key)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        entry = {
+            'url': response.url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': dict(response.headers),
+            'encoding': response.encoding,
+            'stored_at': stored_at
+        }
+        # Body first: a metadata file only ever points at a complete body
+        self._write(body_path, response.content)
+        meta = json.dumps(entry).encode('utf-8')
+        self._write(meta_path, meta)
+        self._count('stored')
+        if self.max_bytes:
+            with self._lock:
+                if self._disk_bytes is None:
+                    self._disk_bytes = self.disk_stats()['bytes']
+                else:
+                    self._disk_bytes += len(response.content) + len(meta)
+                if self._disk_bytes > self.max_bytes:
+                    self._prune(int(self.max_bytes * PRUNE_TO))
+
+    def _touch(self, key: str, entry: Dict[str, Any]):
+        meta_path, _ = self._paths(key)
+        entry['stored_at'] = time.time()
+        self._write(meta_path, json.dumps(entry).encode('utf-8'))
+
+    def get(self, fetch: Callable[..., requests.Response], url: str, params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None, auth=None, ttl: Optional[int] = None, **kwargs) -> requests.Response:
+        """GET `url` through the cache; `fetch` is requests.get or a Session's get"""
+        if not self.enabled:
+            response = fetch(url, params=params, headers=headers, auth=auth, **kwargs)
+            response.from_cache = False
+            return response
+
+        key = _cache_key(url, params, headers, auth)
+        entry, body = self._load(key)
+        ttl = ttl_for(url) if ttl is None else ttl
+
+        if entry is not None and (self.offline or time.time() - entry['stored_at'] < ttl):
+            self._count('hits')
+            self._mark_used(key)
+            return _to_response(entry, body)
+        if self.offline:
+            self._count('offline_misses')
+            raise OfflineCacheMiss(f"Offline mode: no cached response for {url}")
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            cached_headers = CaseInsensitiveDict(entry['headers'])
+            if cached_headers.get('ETag'):
+                request_headers['If-None-Match'] = cached_headers['ETag']
+            if cached_headers.get('Last-Modified'):
+                request_headers['If-Modified-Since'] = cached_headers['Last-Modified']
+
+        started = time.time()
+        response = fetch(url, params=params, headers=request_headers, auth=auth, **kwargs)
+        response.from_cache = False
+        if response.status_code == 304 and entry is not None:
+            self._count('revalidated')
+            self._touch(key, entry)
+            return _to_response(entry, body)
+
+        self._count('misses')
+        if response.status_code == 200 and (ttl > 0 or 'ETag' in response.headers or 'Last-Modified' in response.headers):
+            self._store(key, response, started)
+        return response
+
+    def _prune(self, target_bytes: int) -> int:
+        entries, total = [], 0
+        now = time.time()
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                    if name.endswith('.tmp') and now - st.st_mtime > STALE_TMP_SECS:
+                        os.remove(path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                total += st.st_size
+                if name.endswith('.json'):
+                    body_path = path[:-len('.json')] + '.body'
+                    size = st.st_size + (os.path.getsize(body_path) if os.path.exists(body_path) else 0)
+                    entries.append((st.st_mtime, path, body_path, size))
+
+        removed = 0
+        for _, meta_path, body_path, size in sorted(entries):
+            if total <= target_bytes:
+                break
+            # Metadata first, so a reader never finds metadata without its body
+            for path in (meta_path, body_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            removed += 1
+        self._disk_bytes = total
+        self.stats['pruned'] += removed
+        return removed
+
+    def prune(self, max_bytes: Optional[int] = None) -> int:
+        """Remove least recently used entries until the cache fits in `max_bytes`; returns how many went"""
+        with self._lock:
+            return self._prune(self.max_bytes if max_bytes is None else max_bytes)
+
+    def clear(self) -> int:
+        removed = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                os.remove(os.path.join(root, name))
+                removed += name.endswith('.json')
+        return removed
+
+    def disk_stats(self) -> Dict[str, Any]:
+        entries, size = 0, 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                size += os.path.getsize(os.path.join(root, name))
+                entries += name.endswith('.json')
+        return {'entries': entries, 'bytes': size, 'offline': self.offline, 'enabled': self.enabled}
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_cache() -> ConfluenceCache:
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ConfluenceCache()
+        return _default_cache
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    cache = get_cache()
+    if command == 'prune':
+        if not cache.max_bytes:
+            print("ℹ️ CONFLUENCE_CACHE_MAX_MB is 0, nothing to prune to")
+            return
+        print(f"🧹 Pruned {cache.prune()} cached responses to fit {cache.max_bytes / 1024 / 1024:.0f} MB")
+    elif command == 'clear':
+        print(f"🧹 Removed {cache.clear()} cached responses from {cache.cache_dir}")
+    else:
+        stats = cache.disk_stats()
+        print(f"🗃️ {stats['entries']} cached responses, {stats['bytes'] / 1024:.1f} KB in {cache.cache_dir} "
+              f"(offline={stats['offline']}, enabled={stats['enabled']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+import json
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+
+from config import CONFLUENCE_BASE_URL, EMAIL, API_TOKEN
+from confluence_cache import get_cache
+
+# (connect, read) seconds
+DEFAULT_TIMEOUT = (5, 30)
+DEFAULT_POOL_SIZE = 8
+DEFAULT_RETRIES = 3
+PAGE_LIMIT = 50
+
+
+class ConfluenceClient:
+    """Confluence REST access over one pooled keep-alive session.
+
+    GETs go through the on-disk response cache (see confluence_cache.py) and are retried on
+    429/5xx with backoff that honours Retry-After. POSTs are never retried.
+    """
+
+    def __init__(self, base_url: str = CONFLUENCE_BASE_URL, email: str = EMAIL, api_token: str = API_TOKEN,
+                 timeout=DEFAULT_TIMEOUT, pool_size: int = DEFAULT_POOL_SIZE, max_retries: int = DEFAULT_RETRIES,
+                 use_cache: bool = True):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.auth = HTTPBasicAuth(email, api_token)
+        self.cache = get_cache() if use_cache else None
+
+        self.session = requests.Session()
+        self.session.auth = self.auth
+        self.session.headers.update({"Accept": "application/json"})
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=1.0,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def url(self, path: str) -> str:
+        # Absolute URLs pass through so probes can try other hosts with the same session
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}{path}"
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+            ttl: Optional[int] = None, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        request_headers = {**self.session.headers, **(headers or {})}
+        if self.cache is None:
+            response = self.session.get(self.url(path), params=params, headers=request_headers, **kwargs)
+            response.from_cache = False
+            return response
+        return self.cache.get(self.session.get, self.url(path), params=params, headers=request_headers,
+                              auth=self.auth, ttl=ttl, **kwargs)
+
+    def post(self, path: str, payload: Any, headers: Optional[Dict[str, str]] = None, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        request_headers = {"Content-Type": "application/json", **(headers or {})}
+        return self.session.post(self.url(path), data=json.dumps(payload), headers=request_headers, **kwargs)
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
+        response = self.get(path, params=params, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def paginate_batches(self, path: str, params: Optional[Dict[str, Any]] = None, limit: int = PAGE_LIMIT,
+                         **kwargs) -> Iterator[List[Dict[str, Any]]]:
+        """Yield each page of `results` from a start/limit endpoint; raises requests.HTTPError on failure"""
+        start = 0
+        while True:
+            data = self.get_json(path, params={**(params or {}), "limit": limit, "start": start}, **kwargs)
+            results = data.get("results", [])
+            if not results:
+                return
+            yield results
+            if len(results) < limit:
+                return
+            start += limit
+
+    def paginate(self, path: str, params: Optional[Dict[str, Any]] = None, limit: int = PAGE_LIMIT,
+                 **kwargs) -> Iterator[Dict[str, Any]]:
+        for results in self.paginate_batches(path, params, limit, **kwargs):
+            yield from results
+
+    def search(self, cql: str, expand: Optional[str] = None, limit: int = PAGE_LIMIT, **kwargs) -> Iterator[Dict[str, Any]]:
+        params = {"cql": cql}
+        if expand:
+            params["expand"] = expand
+        return self.paginate("/wiki/rest/api/content/search", params, limit, **kwargs)
+
+    def child_pages(self, page_id: str, expand: Optional[str] = None, limit: int = PAGE_LIMIT,
+                    **kwargs) -> Iterator[Dict[str, Any]]:
+        params = {"expand": expand} if expand else {}
+        return self.paginate(f"/wiki/rest/api/content/{page_id}/child/page", params, limit, **kwargs)
+
+    def get_page(self, page_id: str, expand: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        params = {"expand": expand} if expand else None
+        return self.get_json(f"/wiki/rest/api/content/{page_id}", params, **kwargs)
+
+    def create_page(self, page_data: Dict[str, Any], **kwargs) -> requests.Response:
+        return self.post("/wiki/rest/api/content", page_data, **kwargs)
+
+    def add_labels(self, page_id: str, labels: List[Dict[str, str]], **kwargs) -> requests.Response:
+        return self.post(f"/wiki/rest/api/content/{page_id}/label", labels, **kwargs)
+
+    def close(self):
+        self.session.close()
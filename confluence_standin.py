@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Confluence REST API, for benchmarking the fetch and sync paths.
+
+It replays analytics/devops_space_pages_20250711_132312.json and devops_runbooks.json through the
+REST paths the fetchers use:
+    /wiki/rest/api/content/<id>/child/page
+    /wiki/rest/api/content/<id>
+    /wiki/rest/api/content/search   (CQL subset: parent, ancestor, type, space, label,
+                                     lastmodified >=, id in (...), joined with AND)
+    /wiki/rest/api/search
+    /wiki/rest/api/content          (GET by spaceKey, POST to create)
+
+Export runbooks become children of the DevOps RunBooks page; other space pages hang off the
+space home page. --scale adds synthetic runbooks under the RunBooks page in a tree FANOUT wide,
+reusing export bodies, until the store holds that many pages.
+
+Control endpoints:
+    POST /_standin/touch/<id>   bump a page's version and lastmodified (simulates an edit)
+    GET  /_standin/stats        requests, bytes served and injected 429s
+
+Usage:
+    python confluence_standin.py [--port 5005] [--latency-ms 50] [--rate-limit 0.05] [--scale 100000]
+then point config.CONFLUENCE_BASE_URL (or ConfluenceClient(base_url=...)) at http://localhost:5005
+"""
+
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from flask import Flask, Response, jsonify, request
+
+SPACE_PAGES_FILE = "analytics/devops_space_pages_20250711_132312.json"
+RUNBOOKS_FILE = "devops_runbooks.json"
+SPACE_KEY = "DEVOPS"
+SPACE_HOME_ID = "1605769"
+RUNBOOKS_PARENT_ID = "2678227022"
+FANOUT = 20
+MAX_LIMIT = 100
+
+CLAUSE_PATTERN = re.compile(
+    r'^(?P<field>parent|ancestor|type|space|label|lastmodified|id)\s*'
+    r'(?P<op>>=|=|in)\s*(?P<value>.+)$',
+    re.IGNORECASE
+)
+
+
+class PageStore:
+    """In-memory page tree. Bodies are shared strings, so synthetic scale-up costs little memory"""
+
+    def __init__(self):
+        self.pages: Dict[str, Dict[str, Any]] = {}
+        self.children: Dict[str, List[str]] = {}
+        self.lock = threading.Lock()
+        self.next_id = 9_000_000_000
+        # Bumped on every edit so memoised search results are dropped
+        self.generation = 0
+
+    def add(self, page_id: str, title: str, parent_id: Optional[str], body: str, labels: List[str],
+            when: datetime, author: str = "Stand-in", version: int = 1):
+        self.pages[page_id] = {
+            'id': page_id, 'title': title, 'parent_id': parent_id, 'body': body, 'labels': labels,
+            'when': when, 'author': author, 'version': version
+        }
+        if parent_id is not None:
+            self.children.setdefault(parent_id, []).append(page_id)
+
+    def ancestors(self, page_id: str) -> List[str]:
+        chain = []
+        parent = self.pages[page_id]['parent_id']
+        while parent is not None and parent in self.pages:
+            chain.append(parent)
+            parent = self.pages[parent]['parent_id']
+        return list(reversed(chain))
+
+    def create(self, title: str, parent_id: Optional[str], body: str, labels: List[str]) -> str:
+        with self.lock:
+            self.next_id += 1
+            page_id = str(self.next_id)
+            self.add(page_id, title, parent_id, body, labels, _utcnow())
+            self.generation += 1
+        return page_id
+
+    def touch(self, page_id: str):
+        with self.lock:
+            page = self.pages[page_id]
+            page['version'] += 1
+            page['when'] = _utcnow()
+            self.generation += 1
+
+
+def _utcnow() -> datetime:
+    # Page times are naive UTC, the stand-in user's timezone, which CQL dates are read in
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _parse_when(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+    except (AttributeError, ValueError):
+        return datetime(2024, 1, 1)
+
+
+def load_store(scale: int = 0, base_dir: str = ".") -> PageStore:
+    store = PageStore()
+    with open(f"{base_dir}/{SPACE_PAGES_FILE}", 'r', encoding='utf-8') as f:
+        space_pages = json.load(f)['pages']
+    with open(f"{base_dir}/{RUNBOOKS_FILE}", 'r', encoding='utf-8') as f:
+        runbooks = json.load(f)['runbooks']
+
+    store.add(SPACE_HOME_ID, "DevOps", None, "", [], datetime(2018, 10, 29))
+    store.add(RUNBOOKS_PARENT_ID, "DevOps RunBooks", SPACE_HOME_ID, "", [], datetime(2023, 1, 1))
+    for page in space_pages:
+        if page['id'] not in store.pages:
+            store.add(page['id'], page['title'], SPACE_HOME_ID, page.get('content', ''), [],
+                      _parse_when(page.get('created')))
+    for runbook in runbooks:
+        store.add(runbook['id'], runbook['title'], RUNBOOKS_PARENT_ID, runbook.get('content', ''),
+                  runbook.get('labels', []), _parse_when(runbook.get('created')), runbook.get('author', ''))
+
+    # Synthetic pages: node i hangs under node (i - 1) // FANOUT, the first FANOUT under the RunBooks page
+    synthetic = []
+    for i in range(max(0, scale - len(store.pages))):
+        template = runbooks[i % len(runbooks)]
+        parent_id = RUNBOOKS_PARENT_ID if i < FANOUT else synthetic[(i - FANOUT) // FANOUT]
+        page_id = f"8{i:09d}"
+        store.add(page_id, f"{template['title']} #{i}", parent_id, template.get('content', ''),
+                  template.get('labels', []), datetime(2024, 1, 1))
+        synthetic.append(page_id)
+    return store
+
+
+def render(store: PageStore, page_id: str, expand: str) -> Dict[str, Any]:
+    page = store.pages[page_id]
+    fields = set(filter(None, expand.split(',')))
+    data = {
+        'id': page_id,
+        'type': 'page',
+        'status': 'current',
+        'title': page['title'],
+        '_links': {'webui': f"/spaces/{SPACE_KEY}/pages/{page_id}"}
+    }
+    if 'version' in fields:
+        data['version'] = {'number': page['version'], 'when': page['when'].isoformat() + 'Z',
+                           'by': {'displayName': page['author']}}
+    if 'space' in fields:
+        data['space'] = {'key': SPACE_KEY, 'name': 'DevOps'}
+    if 'metadata.labels' in fields:
+        data['metadata'] = {'labels': {'results': [{'name': name} for name in page['labels']]}}
+    if 'body.storage' in fields:
+        data['body'] = {'storage': {'value': page['body'], 'representation': 'storage'}}
+    if 'ancestors' in fields:
+        data['ancestors'] = [{'id': a, 'title': store.pages[a]['title']} for a in store.ancestors(page_id)]
+    return data
+
+
+def _strip(value: str) -> str:
+    return value.strip().strip('"\'')
+
+
+def cql_select(store: PageStore, cql: str) -> List[str]:
+    """Ids matching the CQL subset the fetchers use; raises ValueError on anything else.
+
+    `id in (...)` and `parent =` clauses narrow the candidates before the remaining clauses are
+    checked, so body batches and child searches do not scan every page.
+    """
+    candidates = None
+    checks = []
+    for clause in re.split(r'\s+AND\s+', cql.strip(), flags=re.IGNORECASE):
+        match = CLAUSE_PATTERN.match(clause.strip())
+        if not match:
+            raise ValueError(f"Unsupported CQL clause: {clause}")
+        field, op, value = match.group('field').lower(), match.group('op').lower(), match.group('value')
+        if field == 'id' and op == 'in':
+            candidates = [v for v in (_strip(v) for v in value.strip().strip('()').split(',')) if v in store.pages]
+        elif field == 'parent':
+            candidates = list(store.children.get(_strip(value), []))
+        elif field == 'ancestor':
+            checks.append(lambda p, v=_strip(value): v in store.ancestors(p['id']))
+        elif field == 'type':
+            checks.append(lambda p, v=_strip(value): v == 'page')
+        elif field == 'space':
+            checks.append(lambda p, v=_strip(value): v == SPACE_KEY)
+        elif field == 'label':
+            checks.append(lambda p, v=_strip(value): v in p['labels'])
+        elif field == 'lastmodified' and op == '>=':
+            since = datetime.strptime(_strip(value), "%Y-%m-%d %H:%M")
+            checks.append(lambda p, since=since: p['when'] >= since)
+        else:
+            raise ValueError(f"Unsupported CQL clause: {clause}")
+    ids = store.pages.keys() if candidates is None else candidates
+    return [page_id for page_id in ids if all(check(store.pages[page_id]) for check in checks)]
+
+
+def create_app(store: PageStore, latency_ms: float = 0.0, rate_limit: float = 0.0, retry_after: int = 1) -> Flask:
+    app = Flask(__name__)
+    stats = {'requests': 0, 'bytes': 0, 'throttled': 0, 'by_endpoint': {}}
+    stats_lock = threading.Lock()
+    # cql -> (store generation, matching ids); paging through a large search re-evaluates it once
+    search_memo: Dict[str, Any] = {}
+
+    @app.before_request
+    def simulate_network():
+        if request.path.startswith('/_standin'):
+            return None
+        if latency_ms:
+            # +/-20% jitter around the configured latency
+            time.sleep(latency_ms * random.uniform(0.8, 1.2) / 1000)
+        if rate_limit and random.random() < rate_limit:
+            with stats_lock:
+                stats['throttled'] += 1
+            response = jsonify({'statusCode': 429, 'message': 'Rate limited (stand-in)'})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(retry_after)
+            return response
+        return None
+
+    @app.after_request
+    def count(response: Response):
+        if not request.path.startswith('/_standin'):
+            endpoint = request.url_rule.rule if request.url_rule else request.path
+            with stats_lock:
+                stats['requests'] += 1
+                stats['bytes'] += response.calculate_content_length() or 0
+                stats['by_endpoint'][endpoint] = stats['by_endpoint'].get(endpoint, 0) + 1
+        return response
+
+    def paged(ids: List[str]):
+        start = int(request.args.get('start', 0))
+        limit = min(int(request.args.get('limit', 25)), MAX_LIMIT)
+        expand = request.args.get('expand', '')
+        results = [render(store, page_id, expand) for page_id in ids[start:start + limit]]
+        body = {'results': results, 'start': start, 'limit': limit, 'size': len(results), '_links': {}}
+        if start + limit < len(ids):
+            body['_links']['next'] = f"{request.path}?start={start + limit}&limit={limit}"
+        return jsonify(body)
+
+    @app.route('/wiki/rest/api/content/<page_id>/child/page')
+    def child_pages(page_id):
+        if page_id not in store.pages:
+            return jsonify({'statusCode': 404, 'message': f"No content with id {page_id}"}), 404
+        return paged(store.children.get(page_id, []))
+
+    @app.route('/wiki/rest/api/content/<page_id>')
+    def get_content(page_id):
+        if page_id not in store.pages:
+            return jsonify({'statusCode': 404, 'message': f"No content with id {page_id}"}), 404
+        return jsonify(render(store, page_id, request.args.get('expand', '')))
+
+    @app.route('/wiki/rest/api/content/search')
+    @app.route('/wiki/rest/api/search')
+    def search():
+        cql = request.args.get('cql', '')
+        memo = search_memo.get(cql)
+        if memo is None or memo[0] != store.generation:
+            try:
+                memo = (store.generation, cql_select(store, cql))
+            except ValueError as e:
+                return jsonify({'statusCode': 400, 'message': str(e)}), 400
+            search_memo[cql] = memo
+        return paged(memo[1])
+
+    @app.route('/wiki/rest/api/content', methods=['GET', 'POST'])
+    def content():
+        if request.method == 'GET':
+            return paged(list(store.pages))
+        payload = request.get_json(force=True)
+        parent_id = (payload.get('ancestors') or [{}])[-1].get('id', RUNBOOKS_PARENT_ID)
+        labels = [label['name'] for label in payload.get('metadata', {}).get('labels', [])]
+        page_id = store.create(payload.get('title', 'Untitled'), parent_id,
+                               payload.get('body', {}).get('storage', {}).get('value', ''), labels)
+        return jsonify(render(store, page_id, 'version,space'))
+
+    @app.route('/wiki/rest/api/content/<page_id>/label', methods=['POST'])
+    def add_labels(page_id):
+        if page_id not in store.pages:
+            return jsonify({'statusCode': 404}), 404
+        # Copy first: synthetic pages share their template's label list
+        page = store.pages[page_id]
+        page['labels'] = page['labels'] + [label['name'] for label in request.get_json(force=True)]
+        return jsonify({'results': [{'name': name} for name in page['labels']]})
+
+    @app.route('/wiki/rest/api/user/current')
+    def current_user():
+        return jsonify({'type': 'known', 'displayName': 'Stand-in User', 'timeZone': 'UTC'})
+
+    @app.route('/_standin/touch/<page_id>', methods=['POST'])
+    def touch(page_id):
+        if page_id not in store.pages:
+            return jsonify({'error': 'unknown page'}), 404
+        store.touch(page_id)
+        return jsonify({'id': page_id, 'version': store.pages[page_id]['version']})
+
+    @app.route('/_standin/stats')
+    def get_stats():
+        with stats_lock:
+            return jsonify({**stats, 'pages': len(store.pages)})
+
+    @app.route('/_standin/reset', methods=['POST'])
+    def reset_stats():
+        with stats_lock:
+            stats.update(requests=0, bytes=0, throttled=0, by_endpoint={})
+        return jsonify({'status': 'reset'})
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=5005)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Added per request, +/-20%% jitter")
+    parser.add_argument('--rate-limit', type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After seconds sent with injected 429s")
+    parser.add_argument('--scale', type=int, default=0, help="Pad the store with synthetic pages up to this many")
+    args = parser.parse_args()
+
+    store = load_store(args.scale)
+    print(f"📚 Stand-in Confluence serving {len(store.pages)} pages "
+          f"(latency {args.latency_ms} ms, 429 rate {args.rate_limit:.0%})")
+    print(f"🔗 http://localhost:{args.port}/wiki/rest/api/content/{RUNBOOKS_PARENT_ID}/child/page")
+    app = create_app(store, args.latency_ms, args.rate_limit, args.retry_after)
+    app.run(host='0.0.0.0', port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
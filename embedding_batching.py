@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+from typing import List, Optional
+
+import numpy as np
+
+DEFAULT_TOKEN_BUDGET = 8192
+DEFAULT_MAX_BATCH_SIZE = 128
+
+
+def token_lengths(model, texts: List[str], tokenizer=None) -> List[int]:
+    """Token count per text as the model will see it (special tokens included, truncated to max_seq_length).
+
+    Pass `tokenizer` (a copy of the model's) to count on a thread other than the one encoding:
+    a fast tokenizer raises "Already borrowed" when two threads use it at once.
+    """
+    tokenizer = tokenizer or getattr(model, 'tokenizer', None)
+    max_len = model.get_max_seq_length() or 512
+    if tokenizer is None:
+        # Rough wordpiece estimate when the model exposes no tokenizer
+        return [min(int(len(t.split()) * 1.3) + 2, max_len) for t in texts]
+    encoded = tokenizer(texts, add_special_tokens=True, truncation=True, max_length=max_len)
+    return [len(ids) for ids in encoded['input_ids']]
+
+
+def plan_batches(lengths: List[int], token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE) -> List[List[int]]:
+    """Group text indices into batches whose padded size (rows x longest row) stays under the token budget.
+
+    Indices are sorted longest-first, so each batch pads only to its own first
+    element and short chunks end up batched together in large groups.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches = []
+    current = []
+    padded_len = 0
+    for i in order:
+        if not current:
+            current = [i]
+            padded_len = max(lengths[i], 1)
+            continue
+        if len(current) >= max_batch_size or (len(current) + 1) * padded_len > token_budget:
+            batches.append(current)
+            current = [i]
+            padded_len = max(lengths[i], 1)
+        else:
+            current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def encode_length_bucketed(model, texts: List[str], token_budget: int = DEFAULT_TOKEN_BUDGET,
+                           max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, lengths: Optional[List[int]] = None) -> np.ndarray:
+    """Encode texts in token-budgeted, length-sorted batches and return vectors in the original order.
+
+    Pass `lengths` when the token counts are already known to skip tokenizing twice.
+    """
+    if not texts:
+        return np.empty((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+    batches = plan_batches(lengths if lengths is not None else token_lengths(model, texts), token_budget, max_batch_size)
+    embeddings = np.empty((len(texts), model.get_sentence_embedding_dimension()), dtype=np.float32)
+    for batch in batches:
+        vectors = model.encode([texts[i] for i in batch], batch_size=len(batch), show_progress_bar=False)
+        embeddings[batch] = vectors
+    return embeddings
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import os
+import hashlib
+import sqlite3
+from typing import List, Optional
+
+import numpy as np
+
+from index_registry import VECTORDB_PATH
+
+CACHE_FILE = os.path.join(VECTORDB_PATH, "embedding_cache.sqlite3")
+
+# SQLite caps bound parameters per statement, so lookups are issued in slices
+_LOOKUP_SLICE = 500
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def model_revision(model) -> str:
+    """Fingerprint the loaded model weights so a changed checkpoint never reuses old vectors"""
+    digest = hashlib.sha256()
+    digest.update(str(model.get_max_seq_length()).encode('utf-8'))
+    for name, tensor in sorted(model.state_dict().items()):
+        digest.update(name.encode('utf-8'))
+        digest.update(tensor.detach().cpu().numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+class EmbeddingCache:
+    """Disk-backed embedding cache keyed by sha256(text), model name and model revision"""
+
+    def __init__(self, model_name: str, revision: str, path: str = CACHE_FILE):
+        self.model_name = model_name
+        self.revision = revision
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+
+        # The indexer's embed stage runs on a worker thread; only one thread uses the cache at a time
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                text_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                revision TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (text_hash, model, revision)
+            )
+        """)
+        self.conn.commit()
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Return the cached vector for each text, or None where it has not been embedded yet"""
+        keys = [text_key(t) for t in texts]
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        for start in range(0, len(unique_keys), _LOOKUP_SLICE):
+            key_slice = unique_keys[start:start + _LOOKUP_SLICE]
+            placeholders = ','.join('?' * len(key_slice))
+            rows = self.conn.execute(
+                f"SELECT text_hash, dim, vector FROM embeddings "
+                f"WHERE model = ? AND revision = ? AND text_hash IN ({placeholders})",
+                [self.model_name, self.revision, *key_slice]
+            ).fetchall()
+            for text_hash, dim, blob in rows:
+                found[text_hash] = np.frombuffer(blob, dtype=np.float32, count=dim)
+
+        vectors = [found.get(k) for k in keys]
+        hits = sum(1 for v in vectors if v is not None)
+        self.hits += hits
+        self.misses += len(vectors) - hits
+        return vectors
+
+    def put_many(self, texts: List[str], embeddings: np.ndarray):
+        rows = []
+        for text, vector in zip(texts, embeddings):
+            vector = np.asarray(vector, dtype=np.float32)
+            rows.append((text_key(text), self.model_name, self.revision, int(vector.shape[0]), vector.tobytes()))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (text_hash, model, revision, dim, vector) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+        self.conn.commit()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hit_rate, 4)
+        }
+
+    def close(self):
+        self.conn.close()
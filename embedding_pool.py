@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+# Populated in each worker process by _init_worker
+_worker_model = None
+
+
+def _init_worker(model_name: str, threads_per_worker: int):
+    global _worker_model
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS"):
+        os.environ[var] = str(threads_per_worker)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads_per_worker)
+    _worker_model = SentenceTransformer(model_name, device='cpu')
+
+
+def _encode_shard(texts: List[str], batch_size: int) -> np.ndarray:
+    return _worker_model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+
+
+class EmbeddingPool:
+    """Pool of worker processes, each holding its own copy of the embedding model"""
+
+    def __init__(self, model_name: str, num_workers: int, threads_per_worker: int = 1,
+                 shard_size: int = 64, batch_size: int = 16):
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker
+        self.shard_size = shard_size
+        self.batch_size = batch_size
+
+        print(f"🧵 Starting embedding pool: {num_workers} workers x {threads_per_worker} threads")
+        # spawn keeps torch/Chroma state of the parent out of the workers
+        self.executor = ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, threads_per_worker)
+        )
+
+    def encode(self, texts: List[str], batches: Optional[List[List[int]]] = None) -> np.ndarray:
+        """Encode texts across the workers; results come back in input order.
+
+        `batches` is an optional plan of index groups (see embedding_batching.plan_batches);
+        each group is sent to a worker as one shard and encoded as a single batch.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        if batches is None:
+            shards = [texts[i:i + self.shard_size] for i in range(0, len(texts), self.shard_size)]
+            results = self.executor.map(_encode_shard, shards, [self.batch_size] * len(shards))
+            return np.vstack(list(results))
+
+        shards = [[texts[i] for i in batch] for batch in batches]
+        results = self.executor.map(_encode_shard, shards, [len(shard) for shard in shards])
+        embeddings = None
+        for batch, vectors in zip(batches, results):
+            if embeddings is None:
+                embeddings = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            embeddings[batch] = vectors
+        return embeddings
+
+    def worker_pids(self) -> List[int]:
+        # Workers start on demand, so this only lists the ones that have been spawned so far
+        return list(getattr(self.executor, '_processes', None) or {})
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""Export the active runbook index as a single self-contained bundle, or install one.
+
+A bundle is a .tar.gz holding:
+- a fresh Chroma store with only the active collection
+- that collection's index manifest
+- an active_index.json pointer
+- runbook_data/: the runbook store and its chunk arena, so the pod serves sources without the JSON export
+- bundle.json, with the model id and a sha256 for every file
+
+Importing refuses any archive member bundle.json does not list, before extracting anything.
+
+Usage:
+    python index_bundle.py export runbook_index.tar.gz
+    python index_bundle.py import runbook_index.tar.gz [--target ./runbook_vectordb]
+
+A web pod can install one at boot by setting RUNBOOK_INDEX_BUNDLE to a path or URL;
+RUNBOOK_VECTORDB_PATH moves the store the apps read from.
+"""
+
+import os
+import json
+import time
+import shutil
+import tarfile
+import hashlib
+import argparse
+import sqlite3
+import tempfile
+from contextlib import closing
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import chromadb
+
+import index_manifest
+from index_registry import VECTORDB_PATH, ACTIVE_INDEX_FILE, get_active_collection_name, close_client
+from compact_vectordb import copy_collection
+from runbook_store import STORE_FILE, RunbookStore, store_is_complete
+from chunk_arena import ARENA_FILE, ChunkArena, retarget_arena, store_source
+
+BUNDLE_INFO_FILE = "bundle.json"
+BUNDLE_FORMAT = 1
+BUNDLE_DATA_DIR = "runbook_data"
+BUNDLED_STORE = os.path.join(BUNDLE_DATA_DIR, "runbooks.sqlite3")
+BUNDLED_ARENA = os.path.join(BUNDLE_DATA_DIR, "chunk_arena.bin")
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _checksums(root: str) -> Dict[str, str]:
+    sums = {}
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            full = os.path.join(dirpath, name)
+            rel = os.path.relpath(full, root)
+            if rel != BUNDLE_INFO_FILE:
+                sums[rel] = file_sha256(full)
+    return sums
+
+
+def bundled_data_paths(target: str, info: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """Store and arena paths of an installed bundle; (None, None) if it shipped no runbook store.
+
+    The arena path is returned even when the bundle did not ship one, so it is built next to the store.
+    """
+    if not info.get('runbook_store'):
+        return None, None
+    return os.path.join(target, info['runbook_store']['file']), os.path.join(target, BUNDLED_ARENA)
+
+
+def _stage_runbook_data(staging: str, store_path: str, arena_path: str) -> Dict[str, Any]:
+    """Copy the runbook store and, if it was built from that store, the chunk arena into `staging`"""
+    if not store_is_complete(store_path):
+        print(f"⚠️ {store_path} does not hold every runbook; pods booted from this bundle need the JSON export")
+        return {}
+    os.makedirs(os.path.join(staging, BUNDLE_DATA_DIR), exist_ok=True)
+    staged_store = os.path.join(staging, BUNDLED_STORE)
+    # The backup API gives a consistent copy even while a sync is writing, WAL included
+    with closing(sqlite3.connect(f"file:{store_path}?mode=ro", uri=True)) as src, \
+            closing(sqlite3.connect(staged_store)) as dst:
+        src.backup(dst)
+    store = RunbookStore(staged_store, readonly=True)
+    try:
+        revision = store.revision()
+        staged = {'runbook_store': {'file': BUNDLED_STORE, 'revision': revision, 'runbooks': len(store)}}
+    finally:
+        store.close()
+
+    arena_source = None
+    if os.path.exists(arena_path):
+        try:
+            arena = ChunkArena(arena_path)
+            arena_source = arena.source
+            arena.close()
+        except ValueError:
+            pass
+    if arena_source == store_source(store_path, revision):
+        shutil.copyfile(arena_path, os.path.join(staging, BUNDLED_ARENA))
+        staged['chunk_arena'] = BUNDLED_ARENA
+    else:
+        print(f"⚠️ {arena_path} was not built from revision {revision} of {store_path}; pods will chunk the store at boot")
+    return staged
+
+
+def export_bundle(output_path: str, path: str = VECTORDB_PATH, store_path: str = STORE_FILE,
+                  arena_path: str = ARENA_FILE) -> Dict[str, Any]:
+    start = time.perf_counter()
+    collection_name = get_active_collection_name(path)
+    source = chromadb.PersistentClient(path=path).get_collection(name=collection_name)
+    chunk_count = source.count()
+    manifest = index_manifest.load_manifest(collection_name, path)
+    print(f"📦 Exporting '{collection_name}' ({chunk_count} chunks) to {output_path}")
+
+    with tempfile.TemporaryDirectory() as staging:
+        # A fresh store holds only the live collection: no old versions, tombstones or embedding cache
+        staged_client = chromadb.PersistentClient(path=staging)
+        copy_collection(staged_client, source, collection_name)
+        close_client(staged_client)
+
+        with open(os.path.join(staging, ACTIVE_INDEX_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'active': collection_name, 'previous': None,
+                       'activated_at': datetime.now().isoformat(), 'details': {'bundle': True}}, f, indent=2)
+        if manifest:
+            # Same layout inside the bundle as under any store path
+            os.makedirs(index_manifest.manifest_dir(staging), exist_ok=True)
+            with open(index_manifest.manifest_path(collection_name, staging), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2, ensure_ascii=False)
+        runbook_data = _stage_runbook_data(staging, store_path, arena_path)
+
+        last_run = manifest.get('last_run', {})
+        info = {
+            'format': BUNDLE_FORMAT,
+            'created_at': datetime.now().isoformat(),
+            'collection': collection_name,
+            'chunks': chunk_count,
+            'model_name': last_run.get('model_name'),
+            'model_revision': last_run.get('model_revision'),
+            **runbook_data,
+            'files': _checksums(staging)
+        }
+        with open(os.path.join(staging, BUNDLE_INFO_FILE), 'w', encoding='utf-8') as f:
+            json.dump(info, f, indent=2)
+
+        with tarfile.open(output_path, 'w:gz') as tar:
+            tar.add(staging, arcname='.')
+
+    print(f"✅ Bundle written: {output_path} ({os.path.getsize(output_path) / 1024 / 1024:.1f} MB, "
+          f"{len(info['files'])} files) in {time.perf_counter() - start:.1f}s")
+    return info
+
+
+def fetch_bundle(location: str) -> str:
+    """Local path of a bundle; http(s) locations are downloaded to a temporary file first"""
+    if not location.startswith(('http://', 'https://')):
+        return location
+    import requests
+
+    print(f"⬇️ Downloading index bundle from {location}")
+    fd, local_path = tempfile.mkstemp(suffix='.tar.gz')
+    try:
+        with os.fdopen(fd, 'wb') as f, requests.get(location, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            for block in response.iter_content(chunk_size=1024 * 1024):
+                f.write(block)
+    except Exception:
+        os.remove(local_path)
+        raise
+    return local_path
+
+
+def _read_info(tar: tarfile.TarFile) -> Dict[str, Any]:
+    for member in tar.getmembers():
+        if member.isfile() and os.path.normpath(member.name) == BUNDLE_INFO_FILE:
+            info = json.load(tar.extractfile(member))
+            if info.get('format') != BUNDLE_FORMAT:
+                raise ValueError(f"Unsupported bundle format: {info.get('format')}")
+            return info
+    raise ValueError(f"Bundle has no {BUNDLE_INFO_FILE}")
+
+
+def _safe_members(tar: tarfile.TarFile, info: Dict[str, Any]) -> List[tarfile.TarInfo]:
+    """Every member, checked before anything is extracted: only files bundle.json lists and their directories"""
+    listed = {os.path.normpath(rel) for rel in info['files']} | {BUNDLE_INFO_FILE}
+    directories = {'.'}
+    for rel in listed:
+        while os.path.dirname(rel):
+            rel = os.path.dirname(rel)
+            directories.add(rel)
+    members = []
+    for member in tar.getmembers():
+        name = os.path.normpath(member.name)
+        if name.startswith('..') or os.path.isabs(name):
+            raise ValueError(f"Refusing unsafe path in bundle: {member.name}")
+        # Only regular files and directories: no links, devices or FIFOs
+        if not (member.isfile() or member.isdir()):
+            raise ValueError(f"Refusing unsupported member type in bundle: {member.name}")
+        if name not in (listed if member.isfile() else directories):
+            raise ValueError(f"Refusing member not listed in {BUNDLE_INFO_FILE}: {member.name}")
+        members.append(member)
+    return members
+
+
+def import_bundle(bundle_path: str, target: str = VECTORDB_PATH) -> Dict[str, Any]:
+    """Unpack and verify a bundle next to `target`, then swap it into place with a rename"""
+    start = time.perf_counter()
+    parent = os.path.dirname(os.path.abspath(target))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.bundle-', dir=parent)
+    try:
+        with tarfile.open(bundle_path, 'r:*') as tar:
+            info = _read_info(tar)
+            tar.extractall(staging, members=_safe_members(tar, info))
+
+        for rel, expected in info['files'].items():
+            full = os.path.join(staging, rel)
+            if not os.path.isfile(full) or file_sha256(full) != expected:
+                raise ValueError(f"Checksum mismatch for {rel}")
+        if info.get('chunk_arena'):
+            # The arena names the store it was chunked from; point it at where the store is being installed
+            store, _ = bundled_data_paths(target, info)
+            retarget_arena(os.path.join(staging, info['chunk_arena']),
+                           store_source(store, info['runbook_store']['revision']))
+
+        if os.path.exists(target):
+            retired = f"{target}.replaced-{int(time.time())}"
+            os.rename(target, retired)
+            os.rename(staging, target)
+            shutil.rmtree(retired, ignore_errors=True)
+        else:
+            os.rename(staging, target)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    print(f"✅ Installed bundle '{info['collection']}' ({info['chunks']} chunks, model {info.get('model_name')} "
+          f"@ {info.get('model_revision')}) into {target} in {time.perf_counter() - start:.1f}s")
+    return info
+
+
+def install_bundle(location: str, target: str = VECTORDB_PATH) -> Dict[str, Any]:
+    """Fetch and import a bundle, removing the downloaded copy afterwards"""
+    bundle_path = fetch_bundle(location)
+    try:
+        return import_bundle(bundle_path, target)
+    finally:
+        if bundle_path != location:
+            os.remove(bundle_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+    export_cmd = sub.add_parser('export', help="Write the active index to a bundle")
+    export_cmd.add_argument('output')
+    export_cmd.add_argument('--path', default=VECTORDB_PATH)
+    export_cmd.add_argument('--store', default=STORE_FILE, help="Runbook store to ship with the index")
+    export_cmd.add_argument('--arena', default=ARENA_FILE, help="Chunk arena built from that store")
+    import_cmd = sub.add_parser('import', help="Install a bundle as the vector store")
+    import_cmd.add_argument('bundle', help="Bundle path or http(s) URL")
+    import_cmd.add_argument('--target', default=VECTORDB_PATH)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export_bundle(args.output, args.path, args.store, args.arena)
+    else:
+        install_bundle(args.bundle, args.target)
+
+
+if __name__ == "__main__":
+    main()
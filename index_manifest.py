@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import resource
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from index_registry import VECTORDB_PATH, get_active_collection_name
+from atomic_io import write_json
+
+MANIFEST_SUBDIR = "manifests"
+MANIFEST_DIR = os.path.join(VECTORDB_PATH, MANIFEST_SUBDIR)
+# Legacy summary read by RAGProcessor
+SUMMARY_FILE = "indexing_metadata.json"
+
+
+def manifest_dir(path: str = VECTORDB_PATH) -> str:
+    return os.path.join(path, MANIFEST_SUBDIR)
+
+
+def manifest_path(collection_name: str, path: str = VECTORDB_PATH) -> str:
+    return os.path.join(manifest_dir(path), f"{collection_name}.json")
+
+
+def load_manifest(collection_name: Optional[str] = None, path: str = VECTORDB_PATH) -> Dict[str, Any]:
+    """Manifest of the given collection (the active one by default) in the store at `path`, or {} if it has none"""
+    collection_name = collection_name or get_active_collection_name(path)
+    try:
+        with open(manifest_path(collection_name, path), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if manifest.get('collection') != collection_name:
+        print(f"⚠️ Manifest belongs to collection '{manifest.get('collection')}', ignoring it")
+        return {}
+    return manifest
+
+
+def save_manifest(collection_name: str, entries: Dict[str, Dict[str, Any]], run: Dict[str, Any],
+                  settings: Optional[Dict[str, Any]] = None, path: str = VECTORDB_PATH) -> Dict[str, Any]:
+    """`settings` are the chunking and model settings the entries were indexed with"""
+    manifest = {
+        'collection': collection_name,
+        'updated_at': datetime.now().isoformat(),
+        'settings': settings or {},
+        'totals': {
+            'runbooks': len(entries),
+            'chunks': sum(e.get('chunk_count', len(e.get('chunk_ids', []))) for e in entries.values()),
+            'tokens': sum(e.get('token_count', 0) for e in entries.values())
+        },
+        'last_run': run,
+        'runbooks': entries
+    }
+    os.makedirs(manifest_dir(path), exist_ok=True)
+    target = manifest_path(collection_name, path)
+    write_json(target, manifest, indent=2, ensure_ascii=False)
+    print(f"📋 Index manifest saved to {target} ({len(entries)} runbooks)")
+    if os.path.abspath(path) != os.path.abspath(VECTORDB_PATH):
+        # The summary describes the store the apps serve from, not one being prepared elsewhere
+        return manifest
+
+    summary = {
+        'indexed_at': manifest['updated_at'],
+        'collection': collection_name,
+        'total_runbooks': manifest['totals']['runbooks'],
+        'total_chunks': manifest['totals']['chunks'],
+        'total_tokens': manifest['totals']['tokens'],
+        'model_name': run.get('model_name'),
+        'model_revision': run.get('model_revision'),
+        'manifest': target
+    }
+    write_json(SUMMARY_FILE, summary, indent=2, ensure_ascii=False)
+    return manifest
+
+
+def remove_manifest(collection_name: str, path: str = VECTORDB_PATH):
+    target = manifest_path(collection_name, path)
+    if os.path.exists(target):
+        os.remove(target)
+
+
+def manifest_for_stats(manifest: Dict[str, Any], include_runbooks: bool = False) -> Dict[str, Any]:
+    """Manifest as exposed over HTTP; chunk id lists are dropped since they are only useful to the indexer"""
+    if not manifest:
+        return {}
+    exposed = {k: v for k, v in manifest.items() if k != 'runbooks'}
+    if include_runbooks:
+        exposed['runbooks'] = {
+            rid: {k: v for k, v in entry.items() if k != 'chunk_ids'}
+            for rid, entry in manifest.get('runbooks', {}).items()
+        }
+    return exposed
+
+
+def vm_hwm_mb(pid: int) -> Optional[float]:
+    """Peak RSS of a running process from /proc, or None where that is not available"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def peak_rss_mb(worker_pids: Iterable[int] = ()) -> Dict[str, float]:
+    """Peak RSS of this process and of its workers.
+
+    RUSAGE_CHILDREN only counts children that have exited and been waited for, so live pool
+    workers (`worker_pids`) are read from /proc instead; 'children' is their sum.
+    """
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    workers = [mb for mb in (vm_hwm_mb(pid) for pid in worker_pids) if mb is not None]
+    children = sum(workers) if workers else resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return {
+        'self': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        'children': round(children, 1)
+    }
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import argparse
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from atomic_io import file_lock, write_json
+
+# Overridable so a pod can serve from a bundle unpacked elsewhere (see index_bundle.py)
+VECTORDB_PATH = os.environ.get("RUNBOOK_VECTORDB_PATH", "./runbook_vectordb")
+DEFAULT_COLLECTION = "runbook_chunks"
+ACTIVE_INDEX_FILE = "active_index.json"
+
+
+def _pointer_path(path: str) -> str:
+    return os.path.join(path, ACTIVE_INDEX_FILE)
+
+
+def versioned_collection_name(base: str = DEFAULT_COLLECTION) -> str:
+    return f"{base}_v{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+
+def load_active_index(path: str = VECTORDB_PATH) -> Dict[str, Any]:
+    try:
+        with open(_pointer_path(path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def get_active_collection_name(path: str = VECTORDB_PATH) -> str:
+    """Collection the apps should serve from; the legacy in-place collection until a build is activated"""
+    return load_active_index(path).get('active') or DEFAULT_COLLECTION
+
+
+def index_write_lock(path: str = VECTORDB_PATH):
+    """Held by anything that writes to the active collection or flips the pointer.
+
+    Compaction copies the active collection and then flips to the copy; an indexer writing in
+    between would write to the collection being retired and its chunks would disappear.
+    """
+    os.makedirs(path, exist_ok=True)
+    return file_lock(_pointer_path(path))
+
+
+def _write_pointer(path: str, pointer: Dict[str, Any]):
+    # Write then rename so readers only ever see the old or the new pointer
+    write_json(_pointer_path(path), pointer, indent=2)
+
+
+def activate_collection(name: str, path: str = VECTORDB_PATH, details: Optional[Dict[str, Any]] = None,
+                        keep_previous: bool = False) -> Dict[str, Any]:
+    """Point the apps at `name`; the outgoing version becomes the rollback target unless keep_previous is set"""
+    current = load_active_index(path)
+    previous = current.get('active') or DEFAULT_COLLECTION
+    if keep_previous or previous == name:
+        previous = current.get('previous')
+    pointer = {
+        'active': name,
+        'previous': previous,
+        'activated_at': datetime.now().isoformat(),
+        'details': details or {}
+    }
+    _write_pointer(path, pointer)
+    print(f"🔀 Active index is now '{name}' (previous: '{pointer['previous']}')")
+    return pointer
+
+
+def rollback(path: str = VECTORDB_PATH) -> Dict[str, Any]:
+    # Same lock as flips and prunes, so a concurrent switch neither overwrites this nor drops its target
+    with index_write_lock(path):
+        current = load_active_index(path)
+        if not current.get('previous'):
+            raise RuntimeError("No previous index version to roll back to")
+        pointer = {
+            'active': current['previous'],
+            'previous': current.get('active'),
+            'activated_at': datetime.now().isoformat(),
+            'details': {'rollback': True}
+        }
+        _write_pointer(path, pointer)
+    print(f"⏪ Rolled back to '{pointer['active']}'")
+    return pointer
+
+
+def prune_collections(client, path: str = VECTORDB_PATH, base: str = DEFAULT_COLLECTION) -> List[str]:
+    """Drop versioned builds other than the active one and the rollback target"""
+    pointer = load_active_index(path)
+    keep = {pointer.get('active'), pointer.get('previous')}
+    dropped = []
+    for collection in client.list_collections():
+        name = collection.name
+        if name.startswith(f"{base}_v") and name not in keep:
+            client.delete_collection(name)
+            dropped.append(name)
+            print(f"🗑️ Dropped old index version '{name}'")
+    return dropped
+
+
+def forget_client(client):
+    """Drop Chroma's cached system for `client`'s path, so the next PersistentClient reopens the store.
+
+    Chroma keeps one system per path, and its vector segments only see writes made through that
+    system: vectors another process adds are invisible to queries until the store is reopened.
+    """
+    from chromadb.api.client import SharedSystemClient
+
+    SharedSystemClient._identifer_to_system.pop(client._identifier, None)
+
+
+def close_client(client):
+    """Stop a client's Chroma system so its files are flushed and closed.
+
+    Dropping the client is not enough: Chroma caches one system per persist directory.
+    """
+    client._system.stop()
+    forget_client(client)
+
+
+def _file_stamp(path: str) -> Optional[tuple]:
+    # Pointer and manifests are replaced by rename, so the inode changes on every write
+    try:
+        st = os.stat(path)
+        return st.st_ino, st.st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+class ActiveCollection:
+    """Resolves the active collection, following pointer flips and index updates from other processes.
+
+    Every index update rewrites the collection's manifest, so a changed manifest means another
+    process (a webhook worker, `--changes`, a full index) wrote vectors this one cannot see yet.
+    """
+
+    def __init__(self, client, path: str = VECTORDB_PATH):
+        self.client = client
+        self.path = path
+        self.name = None
+        self.collection = None
+        self._pointer_mtime = None
+        self._manifest_mtime = None
+        self._lock = threading.Lock()
+
+    def _manifest_mtime_now(self) -> Optional[tuple]:
+        from index_manifest import manifest_path
+
+        return _file_stamp(manifest_path(self.name, self.path))
+
+    def get(self):
+        with self._lock:
+            mtime = _file_stamp(_pointer_path(self.path))
+            if self.collection is not None and mtime == self._pointer_mtime \
+                    and self._manifest_mtime_now() == self._manifest_mtime:
+                return self.collection
+            if self.collection is not None:
+                import chromadb
+
+                # Queries already running keep the old system; it goes once they drop it
+                forget_client(self.client)
+                self.client = chromadb.PersistentClient(path=self.path)
+            name = get_active_collection_name(self.path)
+            self.collection = self.client.get_collection(name=name)
+            if self.name is not None:
+                print(f"🔀 Switched to index '{name}'" if name != self.name else f"🔄 Reopened index '{name}' after an update")
+            self.name = name
+            self._pointer_mtime = mtime
+            self._manifest_mtime = self._manifest_mtime_now()
+            return self.collection
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or roll back the active runbook index")
+    parser.add_argument('--rollback', action='store_true', help="Make the previous index version active again")
+    args = parser.parse_args()
+
+    if args.rollback:
+        rollback()
+    print(json.dumps(load_active_index() or {'active': DEFAULT_COLLECTION}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,34 @@
 #!/usr/bin/env python3
 
 import os
-import json
+import sys
+import argparse
 import re
+import copy
+import threading
+from datetime import datetime
 from pathlib import Path
 import gc
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
 import chromadb
+import numpy as np
 from sentence_transformers import SentenceTransformer
 
+from embedding_cache import EmbeddingCache, model_revision
+from embedding_pool import EmbeddingPool
+from embedding_batching import token_lengths, plan_batches, encode_length_bucketed
+from runbook_stream import iter_runbooks, batched
+from runbook_store import STORE_FILE, store_is_complete
+from records import ChunkRecord
+from pipeline_stages import StagedPipeline
+from index_registry import (
+    VECTORDB_PATH, get_active_collection_name, versioned_collection_name,
+    activate_collection, prune_collections, forget_client, index_write_lock
+)
+import index_manifest
+from runbook_changes import content_hash, has_changes, claim_pending_changes, release_claimed_changes
+
 # Set threading/env vars to reduce oversubscription (keep for safety)
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 os.environ["OMP_NUM_THREADS"] = "1"
@@ -18,15 +37,27 @@ os.environ["MKL_NUM_THREADS"] = "1"
 os.environ["VECLIB_MAXIMUM_THREADS"] = "1"
 os.environ["NUMEXPR_NUM_THREADS"] = "1"
 
+SMOKE_QUERIES = [
+    "How to fix Jenkins pipeline failures?",
+    "What to do when nodes are faulty?",
+    "Steps for incident response"
+]
+
 class EfficientRunbookIndexer:
-    def __init__(self, embedding_model_name: str = "all-MiniLM-L6-v2", chunk_size: int = 400, overlap: int = 50):
+    def __init__(self, embedding_model_name: str = "all-MiniLM-L6-v2", chunk_size: int = 400, overlap: int = 50,
+                 use_embedding_cache: bool = True, num_workers: int = 1, threads_per_worker: int = 1,
+                 collection_name: Optional[str] = None, token_budget: Optional[int] = None):
         print("🚀 Initializing Efficient Runbook Indexer...")
+        self.embedding_model_name = embedding_model_name
         self.embedding_model = SentenceTransformer(embedding_model_name, device='cpu')
         self.chunk_size = chunk_size
         self.overlap = overlap
+        # None keeps the old fixed batch_size=16 in arrival order
+        self.token_budget = token_budget
 
-        self.chroma_client = chromadb.PersistentClient(path="./runbook_vectordb")
-        self.collection_name = "runbook_chunks"
+        self.chroma_client = chromadb.PersistentClient(path=VECTORDB_PATH)
+        # Incremental runs update the serving collection in place; blue/green builds pass a fresh name
+        self.collection_name = collection_name or get_active_collection_name()
 
         # Try to get existing collection, or create it if missing
         try:
@@ -39,6 +70,67 @@ class EfficientRunbookIndexer:
             )
             print(f"✅ Created new collection: {self.collection_name}")
 
+        self.model_revision = model_revision(self.embedding_model)
+        self.embedded_count = 0
+        # Token counts measured for manifest entries, reused when the same chunks are batched for encoding
+        self._token_lengths: Dict[str, int] = {}
+        # The chunk stage counts while the embed stage encodes, so counting gets its own tokenizer and lock
+        self._token_lock = threading.Lock()
+        tokenizer = getattr(self.embedding_model, 'tokenizer', None)
+        self._counting_tokenizer = copy.deepcopy(tokenizer) if tokenizer is not None else None
+        self.embedding_cache = None
+        if use_embedding_cache:
+            self.embedding_cache = EmbeddingCache(embedding_model_name, self.model_revision)
+            print(f"🗃️ Embedding cache enabled ({embedding_model_name} @ {self.model_revision})")
+
+        # Parallel mode: shard the chunk stream over worker processes instead of one pinned core
+        self.embedding_pool = None
+        if num_workers > 1:
+            self.embedding_pool = EmbeddingPool(embedding_model_name, num_workers, threads_per_worker)
+
+    def reopen_store(self):
+        """Open a fresh Chroma client on the active collection, so vectors other processes wrote are visible.
+
+        A long-lived indexer (the webhook worker) would otherwise keep Chroma's cached system for the
+        path, whose segments never see those writes and would overwrite them on their next persist.
+        """
+        forget_client(self.chroma_client)
+        self.chroma_client = chromadb.PersistentClient(path=VECTORDB_PATH)
+        self.collection_name = get_active_collection_name()
+        self.collection = self.chroma_client.get_collection(name=self.collection_name)
+
+    def close(self):
+        if self.embedding_pool is not None:
+            self.embedding_pool.close()
+            self.embedding_pool = None
+
+    def load_manifest(self) -> Dict[str, Any]:
+        # Manifest maps page id -> version, content hash, chunk/token counts and the chunk ids we stored for it
+        return index_manifest.load_manifest(self.collection_name)
+
+    def index_settings(self) -> Dict[str, Any]:
+        # Anything that changes the chunks or vectors of a page whose content did not change
+        return {
+            'model_name': self.embedding_model_name,
+            'model_revision': self.model_revision,
+            'chunk_size': self.chunk_size,
+            'overlap': self.overlap
+        }
+
+    def settings_changed(self, manifest: Dict[str, Any]) -> bool:
+        if manifest.get('settings') == self.index_settings():
+            return False
+        print(f"⚠️ Index settings changed ({manifest.get('settings') or 'not recorded'} -> {self.index_settings()})")
+        return True
+
+    @staticmethod
+    def runbook_fingerprint(runbook: Dict[str, Any]) -> Tuple[Optional[int], str]:
+        # Confluence version number when the export has one, plus a hash of everything we index
+        version = runbook.get('version')
+        if isinstance(version, dict):
+            version = version.get('number')
+        return version, content_hash(runbook)
+
     def clean_text(self, text: str) -> str:
         # Clean HTML tags and reduce whitespace once
         text = re.sub(r'<[^>]+>', '', text)
@@ -63,7 +155,7 @@ class EfficientRunbookIndexer:
             start = end - self.overlap
         return chunks
 
-    def process_runbook(self, runbook: Dict[str, Any], idx: int) -> List[Dict[str, Any]]:
+    def process_runbook(self, runbook: Dict[str, Any], idx: int) -> List[ChunkRecord]:
         title = runbook.get('title', f'Runbook {idx}')
         content = runbook.get('content', {})
         text_content = content.get('body', '') if isinstance(content, dict) else str(content)
@@ -78,80 +170,411 @@ class EfficientRunbookIndexer:
         space_key = 'DEVOPS'
         if isinstance(runbook.get('space'), dict):
             space_key = runbook['space'].get('key', 'DEVOPS')
+        # Pages from the descendant crawl carry the titles between the crawl root and themselves
+        ancestors = runbook.get('ancestors') or []
 
+        runbook_id = runbook.get('id', '')
+        url = runbook.get('url', '')
+        ancestor_path = ' / '.join(ancestors)
+        section = ancestors[0] if ancestors else title
         for i, chunk in enumerate(chunks):
-            chunk_datas.append({
-                'id': f"{runbook.get('id', f'unknown_{idx}')}_{i}",
-                'text': chunk,
-                'metadata': {
-                    'runbook_id': runbook.get('id', ''),
-                    'runbook_title': title,
-                    'runbook_url': runbook.get('url', ''),
-                    'chunk_index': i,
-                    'total_chunks': len(chunks),
-                    'word_count': len(chunk.split()),
-                    'space': space_key
-                }
-            })
+            chunk_datas.append(ChunkRecord(
+                id=f"{runbook.get('id', f'unknown_{idx}')}_{i}",
+                text=chunk,
+                runbook_id=runbook_id,
+                runbook_title=title,
+                runbook_url=url,
+                chunk_index=i,
+                total_chunks=len(chunks),
+                word_count=len(chunk.split()),
+                space=space_key,
+                ancestor_path=ancestor_path,
+                section=section
+            ))
         print(f"✅ Processed runbook {idx} '{title[:50]}': {len(chunks)} chunks")
         return chunk_datas
 
-    def embed_and_store(self, chunk_datas: List[Dict[str, Any]]):
-        if not chunk_datas:
-            return
+    def peak_rss_mb(self) -> Dict[str, float]:
+        return index_manifest.peak_rss_mb(self.embedding_pool.worker_pids() if self.embedding_pool is not None else ())
 
-        texts = [c['text'] for c in chunk_datas]
-        ids = [c['id'] for c in chunk_datas]
-        metadatas = [c['metadata'] for c in chunk_datas]
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        with self._token_lock:
+            missing = [t for t in dict.fromkeys(texts) if t not in self._token_lengths]
+            if missing:
+                counts = token_lengths(self.embedding_model, missing, tokenizer=self._counting_tokenizer)
+                self._token_lengths.update(zip(missing, counts))
+            return [self._token_lengths[t] for t in texts]
 
-        print(f"🧮 Embedding {len(texts)} chunks in batch...")
-        embeddings = self.embedding_model.encode(texts, batch_size=16, show_progress_bar=True)
-        
-        print(f"💾 Adding to ChromaDB collection...")
-        self.collection.add(
-            ids=ids,
+    def embed_chunks(self, chunk_datas: List[ChunkRecord]) -> np.ndarray:
+        texts = [c.text for c in chunk_datas]
+        try:
+            return self.encode_with_cache(texts)
+        finally:
+            with self._token_lock:
+                for text in texts:
+                    self._token_lengths.pop(text, None)
+
+    def store_chunks(self, chunk_datas: List[ChunkRecord], embeddings: np.ndarray):
+        print(f"💾 Upserting {len(chunk_datas)} chunks into ChromaDB collection...")
+        self.collection.upsert(
+            ids=[c.id for c in chunk_datas],
             embeddings=embeddings.tolist(),
-            metadatas=metadatas,
-            documents=texts
+            metadatas=[c.metadata() for c in chunk_datas],
+            documents=[c.text for c in chunk_datas]
         )
-        del embeddings, texts, ids, metadatas
+
+    def embed_and_store(self, chunk_datas: List[ChunkRecord]):
+        if not chunk_datas:
+            return
+        embeddings = self.embed_chunks(chunk_datas)
+        self.store_chunks(chunk_datas, embeddings)
+        del embeddings
         gc.collect()
 
-    def index_runbooks(self, json_file: str, batch_size: int = 10):
-        print(f"📂 Loading runbooks from {json_file}...")
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        runbooks = data.get('runbooks', [])
-        print(f"📚 {len(runbooks)} runbooks loaded")
+    def encode(self, texts: List[str]) -> np.ndarray:
+        print(f"🧮 Embedding {len(texts)} chunks in batch...")
+        self.embedded_count += len(texts)
+        if self.token_budget is None:
+            if self.embedding_pool is not None:
+                return self.embedding_pool.encode(texts)
+            return self.embedding_model.encode(texts, batch_size=16, show_progress_bar=True)
+
+        # Length-sorted batches under a token budget, so short chunks are not padded to long neighbours
+        lengths = self.token_lengths(texts)
+        if self.embedding_pool is not None:
+            return self.embedding_pool.encode(texts, batches=plan_batches(lengths, self.token_budget))
+        return encode_length_bucketed(self.embedding_model, texts, self.token_budget, lengths=lengths)
+
+    def encode_with_cache(self, texts: List[str]) -> np.ndarray:
+        if self.embedding_cache is None:
+            return self.encode(texts)
+
+        cached = self.embedding_cache.get_many(texts)
+        miss_idx = [i for i, vec in enumerate(cached) if vec is None]
+        print(f"🗃️ Embedding cache: {len(texts) - len(miss_idx)} hits, {len(miss_idx)} misses")
+
+        if miss_idx:
+            miss_texts = [texts[i] for i in miss_idx]
+            fresh = self.encode(miss_texts)
+            self.embedding_cache.put_many(miss_texts, fresh)
+            for i, vec in zip(miss_idx, fresh):
+                cached[i] = vec
+        return np.vstack(cached)
+
+    def delete_chunks(self, chunk_ids: List[str]):
+        if not chunk_ids:
+            return
+        print(f"🗑️ Deleting {len(chunk_ids)} stale chunks...")
+        self.collection.delete(ids=chunk_ids)
+
+    def iter_changed_runbooks(self, runbooks, previous: Dict[str, Dict[str, Any]], entries: Dict[str, Dict[str, Any]]):
+        # Unchanged pages are carried over into the new manifest and dropped from the stream
+        for i, runbook in enumerate(runbooks, start=1):
+            runbook_id = str(runbook.get('id', f'unknown_{i}'))
+            version, page_hash = self.runbook_fingerprint(runbook)
+            old = previous.get(runbook_id)
+            if old and old.get('content_hash') == page_hash and old.get('version') == version:
+                entries[runbook_id] = old
+                continue
+            yield i, runbook_id, version, page_hash, runbook
 
+    def manifest_entry(self, runbook: Dict[str, Any], version: Optional[int], page_hash: str,
+                       chunks: List[ChunkRecord]) -> Dict[str, Any]:
+        chunk_tokens = self.token_lengths([c.text for c in chunks]) if chunks else []
+        return {
+            'title': runbook.get('title', ''),
+            'version': version,
+            'content_hash': page_hash,
+            'chunk_count': len(chunks),
+            'token_count': sum(chunk_tokens),
+            'word_count': sum(c.word_count for c in chunks),
+            'indexed_at': datetime.now().isoformat(),
+            'chunk_ids': [c.id for c in chunks]
+        }
+
+    @staticmethod
+    def stale_chunk_ids(old_entry: Optional[Dict[str, Any]], new_entry: Dict[str, Any]) -> List[str]:
+        # A page that shrank leaves its trailing chunk ids behind
+        new_ids = set(new_entry['chunk_ids'])
+        return [cid for cid in (old_entry or {}).get('chunk_ids', []) if cid not in new_ids]
+
+    def index_runbooks(self, json_file: str, batch_size: int = 10, force: bool = False, queue_size: int = 4):
+        print(f"📂 Streaming runbooks from {json_file}...")
+        run_started = datetime.now()
+        self.embedded_count = 0
+        cache_before = self.embedding_cache.stats() if self.embedding_cache is not None else None
+        manifest = {} if force else self.load_manifest()
+        if manifest and self.settings_changed(manifest):
+            print("🔁 Re-indexing every runbook with the new settings")
+            manifest = {}
+        previous = manifest.get('runbooks', {})
+        entries = {}
+        # Without a manifest we cannot tell which stored chunks are ours, so sweep the collection at the end
+        orphan_ids = set() if manifest else set(self.collection.get(include=[])['ids'])
+
+        # read -> diff -> clean/chunk | embed | store, each stage on its own thread
+        changed = self.iter_changed_runbooks(iter_runbooks(json_file), previous, entries)
+        totals = {'runbooks': 0, 'chunks': 0}
+
+        def chunk_batches():
+            for batch in batched(changed, batch_size):
+                chunk_datas = []
+                stale_ids = []
+                for i, runbook_id, version, page_hash, runbook in batch:
+                    chunks = self.process_runbook(runbook, i)
+                    chunk_datas.extend(chunks)
+                    entries[runbook_id] = self.manifest_entry(runbook, version, page_hash, chunks)
+                    stale_ids.extend(self.stale_chunk_ids(previous.get(runbook_id), entries[runbook_id]))
+                totals['runbooks'] += len(batch)
+                yield {'chunks': chunk_datas, 'stale_ids': stale_ids}
+
+        def embed_stage(item):
+            item['embeddings'] = self.embed_chunks(item['chunks']) if item['chunks'] else None
+            return item
+
+        def store_stage(item):
+            if item['chunks']:
+                self.store_chunks(item['chunks'], item['embeddings'])
+            self.delete_chunks(item['stale_ids'])
+            totals['chunks'] += len(item['chunks'])
+            print(f"📊 Stored {totals['chunks']} chunks so far")
+
+        pipeline = StagedPipeline(
+            chunk_batches(),
+            [('embed', embed_stage), ('store', store_stage)],
+            source_name='chunk',
+            queue_size=queue_size,
+            size_fn=lambda item: len(item['chunks'])
+        )
+        pipeline.run()
+        pipeline.print_stats(unit="chunks")
+        changed_count = totals['runbooks']
+        total_chunks = totals['chunks']
+
+        removed = [rid for rid in previous if rid not in entries]
+        print(f"🔎 {changed_count} changed, {len(removed)} removed, {len(entries) - changed_count} unchanged runbooks")
+
+        cleanup_started = datetime.now()
+        for runbook_id in removed:
+            self.delete_chunks(previous[runbook_id].get('chunk_ids', []))
+
+        if orphan_ids:
+            live_ids = {cid for entry in entries.values() for cid in entry['chunk_ids']}
+            self.delete_chunks(sorted(orphan_ids - live_ids))
+        cleanup_secs = (datetime.now() - cleanup_started).total_seconds()
+
+        report = pipeline.report()
+        stages = report['stages']
+        embed_busy = stages['embed']['busy_secs']
+        run = {
+            'started_at': run_started.isoformat(),
+            'source': str(json_file),
+            'forced': force,
+            'model_name': self.embedding_model_name,
+            'model_revision': self.model_revision,
+            'runbooks_changed': changed_count,
+            'runbooks_removed': len(removed),
+            'runbooks_unchanged': len(entries) - changed_count,
+            'chunks_upserted': total_chunks,
+            'embeddings_computed': self.embedded_count,
+            'wall_secs': round((datetime.now() - run_started).total_seconds(), 3),
+            'stage_secs': {
+                'pipeline': report['wall_secs'],
+                **{name: stage['busy_secs'] for name, stage in stages.items()},
+                'cleanup': round(cleanup_secs, 3)
+            },
+            'chunks_per_sec': round(total_chunks / report['wall_secs'], 2) if report['wall_secs'] else 0.0,
+            'embeddings_per_sec': round(self.embedded_count / embed_busy, 2) if embed_busy else 0.0,
+            'queues': {name: {'avg_depth': stage['avg_queue_depth'], 'max_depth': stage['max_queue_depth']}
+                       for name, stage in stages.items()},
+            'peak_rss_mb': self.peak_rss_mb()
+        }
+        if self.embedding_cache is not None:
+            cache_stats = self.embedding_cache.stats()
+            hits = cache_stats['hits'] - cache_before['hits']
+            misses = cache_stats['misses'] - cache_before['misses']
+            run['embedding_cache'] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0
+            }
+            print(f"🗃️ Embedding cache hit rate: {run['embedding_cache']['hit_rate']:.1%} ({hits} hits, {misses} misses)")
+
+        index_manifest.save_manifest(self.collection_name, entries, run, self.index_settings())
+        print(f"📈 {run['chunks_per_sec']} chunks/sec, {run['embeddings_per_sec']} embeddings/sec, "
+              f"peak RSS {run['peak_rss_mb']['self']} MB (workers {run['peak_rss_mb']['children']} MB)")
+        print(f"\n🎉 INDEXING COMPLETE: {changed_count} of {len(entries)} runbooks re-indexed, {total_chunks} chunks upserted, {len(removed)} runbooks removed.")
+        return entries
+
+    def apply_changeset(self, changeset: Dict[str, Any]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Index a changeset from specific.save_combined_data without reading the runbooks export.
+
+        Returns the updated manifest entries, or None when there is no manifest to apply it to.
+        """
+        manifest = self.load_manifest()
+        if not manifest:
+            print("❌ No index manifest for this collection; run a full index before applying changesets")
+            return None
+        if self.settings_changed(manifest):
+            # Unchanged pages would keep chunks built with the old settings
+            print("❌ Run a full index before applying changesets")
+            return None
+
+        run_started = datetime.now()
+        self.embedded_count = 0
+        previous = manifest.get('runbooks', {})
+        entries = dict(previous)
+
+        for runbook_id in changeset.get('removed', []):
+            old = entries.pop(str(runbook_id), None)
+            if old:
+                self.delete_chunks(old.get('chunk_ids', []))
+
+        upserts = changeset.get('added', []) + changeset.get('updated', [])
         total_chunks = 0
-        for batch_start in range(0, len(runbooks), batch_size):
-            batch = runbooks[batch_start:batch_start + batch_size]
-            print(f"\n📦 Processing batch {batch_start // batch_size + 1} (runbooks {batch_start+1}-{batch_start+len(batch)})")
-            
-            all_chunk_datas = []
-            for i, runbook in enumerate(batch, start=batch_start + 1):
+        for batch in batched(list(enumerate(upserts, start=1)), 10):
+            chunk_datas, stale_ids = [], []
+            for i, runbook_id in batch:
+                runbook = changeset['pages'][runbook_id]
+                version, page_hash = self.runbook_fingerprint(runbook)
                 chunks = self.process_runbook(runbook, i)
-                all_chunk_datas.extend(chunks)
+                chunk_datas.extend(chunks)
+                entries[str(runbook_id)] = self.manifest_entry(runbook, version, page_hash, chunks)
+                stale_ids.extend(self.stale_chunk_ids(previous.get(str(runbook_id)), entries[str(runbook_id)]))
+            if chunk_datas:
+                self.embed_and_store(chunk_datas)
+            self.delete_chunks(stale_ids)
+            total_chunks += len(chunk_datas)
+
+        run = {
+            'started_at': run_started.isoformat(),
+            'source': 'changeset',
+            'forced': False,
+            'model_name': self.embedding_model_name,
+            'model_revision': self.model_revision,
+            'runbooks_changed': len(upserts),
+            'runbooks_removed': len(changeset.get('removed', [])),
+            'runbooks_unchanged': len(entries) - len(upserts),
+            'chunks_upserted': total_chunks,
+            'embeddings_computed': self.embedded_count,
+            'wall_secs': round((datetime.now() - run_started).total_seconds(), 3),
+            'peak_rss_mb': self.peak_rss_mb()
+        }
+        index_manifest.save_manifest(self.collection_name, entries, run, self.index_settings())
+        print(f"\n🎉 CHANGESET APPLIED: {len(upserts)} runbooks re-indexed, {total_chunks} chunks upserted, "
+              f"{run['runbooks_removed']} runbooks removed.")
+        return entries
+
+    def validate_index(self, entries: Dict[str, Dict[str, Any]]) -> List[str]:
+        expected = sum(len(entry['chunk_ids']) for entry in entries.values())
+        return validate_collection(self.collection, self.embedding_model, expected)
+
+def validate_collection(collection, embedding_model, expected: int) -> List[str]:
+    # Returns a list of problems; an empty list means the build is safe to activate
+    problems = []
+    actual = collection.count()
+    if actual == 0:
+        problems.append("collection is empty")
+    if actual != expected:
+        problems.append(f"collection holds {actual} chunks, expected {expected}")
 
-            self.embed_and_store(all_chunk_datas)
-            total_chunks += len(all_chunk_datas)
+    query_embeddings = embedding_model.encode(SMOKE_QUERIES)
+    results = collection.query(query_embeddings=query_embeddings.tolist(), n_results=3)
+    for query, docs in zip(SMOKE_QUERIES, results['documents']):
+        if not docs:
+            problems.append(f"smoke query returned nothing: '{query}'")
+    return problems
 
-            print(f"📊 Indexed {batch_start + len(batch)} / {len(runbooks)} runbooks, total chunks: {total_chunks}")
-            gc.collect()
+def apply_pending_changes(indexer: EfficientRunbookIndexer) -> bool:
+    """Claim the pending changesets and index them; returns False if they are left for a retry"""
+    changeset = claim_pending_changes()
+    if not has_changes(changeset):
+        print("✅ No pending runbook changes.")
+        release_claimed_changes()
+        return True
+    # The claim is only released once applied, so a failed run retries the same changes
+    if indexer.apply_changeset(changeset) is None:
+        return False
+    release_claimed_changes()
+    return True
 
-        print(f"\n🎉 INDEXING COMPLETE: {len(runbooks)} runbooks, {total_chunks} chunks indexed.")
+def build_blue_green(json_file: str, **indexer_kwargs) -> bool:
+    """Build a fresh versioned collection, validate it, then flip the active index pointer to it"""
+    name = versioned_collection_name()
+    print(f"🟦 Building new index version '{name}' (serving index stays '{get_active_collection_name()}')")
+    indexer = EfficientRunbookIndexer(collection_name=name, **indexer_kwargs)
+    try:
+        entries = indexer.index_runbooks(json_file)
+        problems = indexer.validate_index(entries)
+        if problems:
+            print("❌ Validation failed, keeping current index active:")
+            for problem in problems:
+                print(f"   • {problem}")
+            indexer.chroma_client.delete_collection(name)
+            index_manifest.remove_manifest(name)
+            return False
+
+        with index_write_lock():
+            activate_collection(name, details={'chunks': indexer.collection.count(), 'runbooks': len(entries)})
+            for dropped in prune_collections(indexer.chroma_client):
+                index_manifest.remove_manifest(dropped)
+        return True
+    finally:
+        indexer.close()
 
 def main():
-    json_files = list(Path('.').glob('devops_runbooks.json'))
-    if not json_files:
-        print("❌ No runbooks JSON file found!")
+    parser = argparse.ArgumentParser(description="Index runbooks into ChromaDB")
+    parser.add_argument('json_file', nargs='?',
+                        help="Runbooks export (.json, .jsonl or .sqlite3); defaults to the runbook store, then devops_runbooks.json")
+    parser.add_argument('--force', action='store_true', help="Ignore the index manifest and re-index every runbook")
+    parser.add_argument('--no-embedding-cache', action='store_true', help="Always re-encode chunks instead of reusing cached embeddings")
+    parser.add_argument('--changes', action='store_true', help="Only apply pending changesets recorded by specific.py")
+    parser.add_argument('--blue-green', action='store_true', help="Build a new index version, validate it and atomically switch to it")
+    parser.add_argument('--token-budget', type=int, default=0,
+                        help="Max padded tokens per length-sorted embedding batch (e.g. 8192); 0 keeps fixed batches of 16")
+    parser.add_argument('--workers', type=int, default=1, help="Embedding worker processes (1 = encode in this process)")
+    parser.add_argument('--threads-per-worker', type=int, default=1, help="Torch/BLAS threads per embedding worker")
+    args = parser.parse_args()
+
+    indexer_kwargs = dict(
+        use_embedding_cache=not args.no_embedding_cache,
+        num_workers=args.workers,
+        threads_per_worker=args.threads_per_worker,
+        token_budget=args.token_budget or None
+    )
+    if args.changes:
+        # Opened under the lock, so a compaction cannot retire the collection while changes go in
+        with index_write_lock():
+            indexer = EfficientRunbookIndexer(**indexer_kwargs)
+            try:
+                applied = apply_pending_changes(indexer)
+            finally:
+                indexer.close()
+        if not applied:
+            print("❌ Pending changes were not indexed; they stay claimed for the next run")
+            sys.exit(1)
         return
 
-    latest_file = max(json_files, key=os.path.getctime)
+    if args.json_file:
+        latest_file = args.json_file
+    else:
+        # A partial store would make a full index drop every page it does not hold
+        json_files = [Path(STORE_FILE)] if store_is_complete(STORE_FILE) else list(Path('.').glob('devops_runbooks.json'))
+        if not json_files:
+            print("❌ No runbooks JSON file found!")
+            return
+        latest_file = max(json_files, key=os.path.getctime)
     print(f"📁 Using latest runbooks file: {latest_file}")
-    indexer = EfficientRunbookIndexer()
-    indexer.index_runbooks(str(latest_file))
+    if args.blue_green:
+        build_blue_green(str(latest_file), **indexer_kwargs)
+        return
+
+    with index_write_lock():
+        indexer = EfficientRunbookIndexer(**indexer_kwargs)
+        try:
+            indexer.index_runbooks(str(latest_file), force=args.force)
+        finally:
+            indexer.close()
 
 if __name__ == "__main__":
     main()
@@ -1,21 +1,18 @@
 #!/usr/bin/env python3
 
 import requests
-import json
 import re
 from datetime import datetime
 from typing import Dict, List, Any
-from requests.auth import HTTPBasicAuth
-from config import CONFLUENCE_BASE_URL, EMAIL, API_TOKEN, SPACE_KEY
+from config import CONFLUENCE_BASE_URL, SPACE_KEY
+from confluence_client import ConfluenceClient
 
 class IntelligentRunbookCreator:
     def __init__(self, rag_system=None):
         """Initialize the intelligent runbook creator"""
         self.base_url = CONFLUENCE_BASE_URL
-        self.email = EMAIL
-        self.api_token = API_TOKEN
         self.space_key = SPACE_KEY or "DEVOPS"
-        self.auth = HTTPBasicAuth(self.email, self.api_token)
+        self.client = ConfluenceClient()
         self.rag_system = rag_system  # Reference to RAG system for context
         
         # Common patterns and solutions
@@ -457,20 +454,8 @@ class IntelligentRunbookCreator:
         }
         
         # Create the page
-        create_url = f"{self.base_url}/wiki/rest/api/content"
-        headers = {
-            "Accept": "application/json",
-            "Content-Type": "application/json"
-        }
-        
         try:
-            response = requests.post(
-                create_url,
-                auth=self.auth,
-                headers=headers,
-                data=json.dumps(page_data),
-                timeout=30
-            )
+            response = self.client.create_page(page_data)
             
             if response.status_code == 200:
                 created_page = response.json()
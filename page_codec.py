@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Compression for raw Confluence storage HTML kept in the runbook store.
+
+Bodies are zstd-compressed when `zstandard` is installed, optionally with a dictionary
+trained on stored pages: Confluence macros and table markup repeat across pages, so a
+shared dictionary gives small pages the context a single page cannot. Without zstandard,
+bodies fall back to zlib. Every blob is stored with its codec name ('zlib', 'zstd' or
+'zstd:<dictionary id>'), so rows written either way stay readable.
+"""
+
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 6
+DICT_SIZE = 64 * 1024
+
+
+def train_dictionary(samples: List[str], dict_size: int = DICT_SIZE) -> bytes:
+    if not ZSTD_AVAILABLE:
+        raise RuntimeError("Training a compression dictionary requires the zstandard package")
+    trained = zstandard.train_dictionary(dict_size, [s.encode('utf-8') for s in samples if s], level=ZSTD_LEVEL)
+    return trained.as_bytes()
+
+
+class PageCodec:
+    def __init__(self, dictionaries: Optional[Dict[int, bytes]] = None, dict_id: Optional[int] = None):
+        """`dictionaries` maps id -> trained dictionary; new bodies use `dict_id` when set"""
+        self.dict_id = dict_id if ZSTD_AVAILABLE else None
+        # Compressor and decompressor objects are not thread-safe, so only the prepared dictionaries are kept
+        self.dictionaries = {}
+        if ZSTD_AVAILABLE:
+            for key, data in (dictionaries or {}).items():
+                self.dictionaries[key] = zstandard.ZstdCompressionDict(data)
+                self.dictionaries[key].precompute_compress(level=ZSTD_LEVEL)
+
+    @property
+    def name(self) -> str:
+        if not ZSTD_AVAILABLE:
+            return 'zlib'
+        return f'zstd:{self.dict_id}' if self.dict_id is not None else 'zstd'
+
+    def compress(self, text: str) -> Tuple[str, bytes]:
+        data = text.encode('utf-8')
+        if not ZSTD_AVAILABLE:
+            return 'zlib', zlib.compress(data, ZLIB_LEVEL)
+        if self.dict_id is not None:
+            compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=self.dictionaries[self.dict_id])
+            return f'zstd:{self.dict_id}', compressor.compress(data)
+        return 'zstd', zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+    def decompress(self, codec: str, blob: bytes) -> str:
+        if codec == 'zlib':
+            return zlib.decompress(blob).decode('utf-8')
+        if not codec.startswith('zstd'):
+            raise ValueError(f"Unknown page codec: {codec}")
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("This store holds zstd-compressed pages; install the zstandard package to read them")
+        _, _, dict_id = codec.partition(':')
+        decompressor = zstandard.ZstdDecompressor(dict_data=self.dictionaries[int(dict_id)]) if dict_id \
+            else zstandard.ZstdDecompressor()
+        return decompressor.decompress(blob).decode('utf-8')
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+_DONE = object()
+_POLL_SECS = 0.1
+
+
+class StageStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.units = 0
+        self.busy_secs = 0.0
+        self.wait_secs = 0.0
+        self.queue_samples = 0
+        self.queue_depth_total = 0
+        self.queue_depth_max = 0
+
+    def sample_queue(self, depth: int):
+        self.queue_samples += 1
+        self.queue_depth_total += depth
+        self.queue_depth_max = max(self.queue_depth_max, depth)
+
+    def to_dict(self) -> dict:
+        return {
+            'items': self.items,
+            'units': self.units,
+            'busy_secs': round(self.busy_secs, 3),
+            'wait_secs': round(self.wait_secs, 3),
+            'units_per_sec': round(self.units / self.busy_secs, 2) if self.busy_secs else 0.0,
+            'avg_queue_depth': round(self.queue_depth_total / self.queue_samples, 2) if self.queue_samples else 0.0,
+            'max_queue_depth': self.queue_depth_max
+        }
+
+
+class StagedPipeline:
+    """Run a source generator and a chain of stages on separate threads joined by bounded queues.
+
+    Each stage receives the previous stage's output. `size_fn` maps an item to the
+    number of units it carries (e.g. chunks in a batch) for throughput reporting;
+    the queue depth is sampled on every hand-off into a stage's input queue.
+    """
+
+    def __init__(self, source: Iterable[Any], stages: List[Tuple[str, Callable[[Any], Any]]],
+                 source_name: str = "source", queue_size: int = 4,
+                 size_fn: Optional[Callable[[Any], int]] = None):
+        self.source = source
+        self.stages = stages
+        self.queue_size = queue_size
+        self.size_fn = size_fn or (lambda item: 1)
+        self.stats = [StageStats(source_name)] + [StageStats(name) for name, _ in stages]
+        self.wall_secs = 0.0
+        self._abort = threading.Event()
+        self._errors = []
+
+    def _put(self, q: queue.Queue, item: Any, stats: StageStats) -> bool:
+        start = time.perf_counter()
+        while not self._abort.is_set():
+            try:
+                q.put(item, timeout=_POLL_SECS)
+                stats.wait_secs += time.perf_counter() - start
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue, stats: StageStats) -> Any:
+        start = time.perf_counter()
+        while not self._abort.is_set():
+            try:
+                item = q.get(timeout=_POLL_SECS)
+                stats.wait_secs += time.perf_counter() - start
+                return item
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _run_source(self, out_q: queue.Queue):
+        stats = self.stats[0]
+        try:
+            iterator = iter(self.source)
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    stats.busy_secs += time.perf_counter() - start
+                    break
+                stats.busy_secs += time.perf_counter() - start
+                stats.items += 1
+                stats.units += self.size_fn(item)
+                self.stats[1].sample_queue(out_q.qsize())
+                if not self._put(out_q, item, stats):
+                    return
+        except BaseException as e:
+            self._errors.append(e)
+            self._abort.set()
+        self._put(out_q, _DONE, stats)
+
+    def _run_stage(self, index: int, fn: Callable[[Any], Any], in_q: queue.Queue, out_q: Optional[queue.Queue]):
+        stats = self.stats[index + 1]
+        try:
+            while True:
+                item = self._get(in_q, stats)
+                if item is _DONE:
+                    break
+                start = time.perf_counter()
+                result = fn(item)
+                stats.busy_secs += time.perf_counter() - start
+                stats.items += 1
+                stats.units += self.size_fn(item)
+                if out_q is not None:
+                    self.stats[index + 2].sample_queue(out_q.qsize())
+                    if not self._put(out_q, result, stats):
+                        return
+        except BaseException as e:
+            self._errors.append(e)
+            self._abort.set()
+            return
+        if out_q is not None:
+            self._put(out_q, _DONE, stats)
+
+    def run(self):
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        threads = [threading.Thread(target=self._run_source, args=(queues[0],), name=self.stats[0].name, daemon=True)]
+        for i, (name, fn) in enumerate(self.stages):
+            out_q = queues[i + 1] if i + 1 < len(queues) else None
+            threads.append(threading.Thread(target=self._run_stage, args=(i, fn, queues[i], out_q), name=name, daemon=True))
+
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.wall_secs = time.perf_counter() - start
+
+        if self._errors:
+            raise self._errors[0]
+
+    def report(self) -> dict:
+        return {
+            'wall_secs': round(self.wall_secs, 3),
+            'stages': {s.name: s.to_dict() for s in self.stats}
+        }
+
+    def print_stats(self, unit: str = "units"):
+        print(f"\n⏱️ Pipeline stats (wall {self.wall_secs:.2f}s):")
+        for i, s in enumerate(self.stats):
+            d = s.to_dict()
+            # The source has no input queue, so depth is only meaningful for downstream stages
+            depth = f", input queue avg {d['avg_queue_depth']:.1f} / max {d['max_queue_depth']}" if i else ""
+            print(f"   • {s.name:<8} {d['items']:>5} batches, {d['units']:>6} {unit}, busy {d['busy_secs']:.2f}s, "
+                  f"waiting {d['wait_secs']:.2f}s, {d['units_per_sec']:.1f} {unit}/s{depth}")
@@ -8,6 +8,7 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 import openai
 from dotenv import load_dotenv
+from index_registry import VECTORDB_PATH, ActiveCollection
 
 
 # Load environment variables
@@ -28,11 +29,12 @@ class RAGProcessor:
         
         # Initialize ChromaDB client
         print("💾 Connecting to vector database...")
-        self.chroma_client = chromadb.PersistentClient(path="./runbook_vectordb")
+        self.chroma_client = chromadb.PersistentClient(path=VECTORDB_PATH)
+        self.active_index = ActiveCollection(self.chroma_client)
         
         try:
-            self.collection = self.chroma_client.get_collection(name="runbook_chunks")
-            print("✅ Connected to runbook chunks collection")
+            self.collection = self.active_index.get()
+            print(f"✅ Connected to runbook chunks collection: {self.active_index.name}")
         except Exception as e:
             print(f"❌ Error connecting to vector database: {e}")
             print("💡 Please run indexing_pipeline.py first to create the vector database")
@@ -67,7 +69,8 @@ class RAGProcessor:
         # Generate query embedding
         query_embedding = self.embedding_model.encode([query])
         
-        # Search in vector database
+        # Search in vector database (re-resolved in case the active index was swapped)
+        self.collection = self.active_index.get()
         results = self.collection.query(
             query_embeddings=query_embedding.tolist(),
             n_results=top_k
@@ -250,12 +253,13 @@ ANSWER:"""
         """Get statistics about the indexed runbooks"""
         
         try:
-            collection_count = self.collection.count()
+            collection_count = self.active_index.get().count()
             return {
                 'total_chunks': collection_count,
                 'total_runbooks': self.metadata.get('total_runbooks', 'Unknown'),
                 'indexed_at': self.metadata.get('indexed_at', 'Unknown'),
                 'embedding_model': self.metadata.get('model_name', 'all-MiniLM-L6-v2'),
+                'active_index': self.active_index.name,
                 'openai_enabled': self.use_openai
             }
         except Exception as e:
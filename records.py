@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Slotted record types for chunks, search hits and answer sources.
+
+These are created per chunk while indexing and per hit on every query, so they use
+__slots__ instead of dicts. That means no per-instance __dict__, and no key strings rebuilt
+for every item. Everything stays typed objects until the HTTP boundary, where to_dict()
+produces the JSON shape the web UI expects.
+"""
+
+from typing import Any, Dict, Optional
+
+
+class ChunkRecord:
+    """One chunk of one runbook.
+
+    The indexer fills every field. The web app's chunk arena only sets the runbook fields,
+    chunk_index and text.
+    """
+
+    __slots__ = ('id', 'text', 'runbook_id', 'runbook_title', 'runbook_url', 'chunk_index',
+                 'total_chunks', 'word_count', 'space', 'ancestor_path', 'section')
+
+    def __init__(self, text: str, runbook_id: str, runbook_title: str, runbook_url: str, chunk_index: int,
+                 id: Optional[str] = None, total_chunks: int = 0, word_count: int = 0, space: str = '',
+                 ancestor_path: str = '', section: str = ''):
+        self.id = id
+        self.text = text
+        self.runbook_id = runbook_id
+        self.runbook_title = runbook_title
+        self.runbook_url = runbook_url
+        self.chunk_index = chunk_index
+        self.total_chunks = total_chunks
+        self.word_count = word_count
+        self.space = space
+        self.ancestor_path = ancestor_path
+        self.section = section
+
+    def metadata(self) -> Dict[str, Any]:
+        """Chroma metadata for this chunk"""
+        return {
+            'runbook_id': self.runbook_id,
+            'runbook_title': self.runbook_title,
+            'runbook_url': self.runbook_url,
+            'chunk_index': self.chunk_index,
+            'total_chunks': self.total_chunks,
+            'word_count': self.word_count,
+            'space': self.space,
+            'ancestor_path': self.ancestor_path,
+            'section': self.section
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'runbook_id': self.runbook_id,
+            'runbook_title': self.runbook_title,
+            'runbook_url': self.runbook_url,
+            'chunk_index': self.chunk_index,
+            'text': self.text
+        }
+
+    def __repr__(self) -> str:
+        return f"ChunkRecord({self.runbook_id!r}, chunk {self.chunk_index}, {len(self.text)} chars)"
+
+
+class SearchHit:
+    __slots__ = ('text', 'runbook_id', 'title', 'url', 'chunk_index', 'ancestor_path', 'relevance_score')
+
+    def __init__(self, text: str, runbook_id: Optional[str], title: str, url: str, chunk_index: Optional[int],
+                 relevance_score: float, ancestor_path: str = ''):
+        self.text = text
+        self.runbook_id = runbook_id
+        self.title = title
+        self.url = url
+        self.chunk_index = chunk_index
+        self.ancestor_path = ancestor_path
+        self.relevance_score = relevance_score
+
+    def source(self) -> 'Source':
+        return Source(self.title, self.url, self.relevance_score)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'text': self.text,
+            'runbook_id': self.runbook_id,
+            'title': self.title,
+            'url': self.url,
+            'chunk_index': self.chunk_index,
+            'ancestor_path': self.ancestor_path,
+            'relevance_score': self.relevance_score
+        }
+
+    def __repr__(self) -> str:
+        return f"SearchHit({self.title!r}, {self.relevance_score:.3f})"
+
+
+class Source:
+    __slots__ = ('title', 'url', 'relevance')
+
+    def __init__(self, title: str, url: str, relevance: float):
+        self.title = title
+        self.url = url
+        self.relevance = relevance
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'title': self.title, 'url': self.url, 'relevance': self.relevance}
+
+    def __repr__(self) -> str:
+        return f"Source({self.title!r}, {self.relevance:.3f})"
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Changesets produced by specific.save_combined_data and consumed by the incremental indexer.
+
+A changeset is {'added': [ids], 'updated': [ids], 'removed': [ids], 'pages': {id: page}}, where
+`pages` holds the full page data of every added or updated id. Changesets that have not been
+indexed yet accumulate in PENDING_CHANGES_FILE.
+"""
+
+import os
+import json
+import hashlib
+from typing import Any, Dict
+
+from atomic_io import file_lock, write_json
+
+PENDING_CHANGES_FILE = "pending_changes.json"
+
+
+def content_hash(page: Dict[str, Any]) -> str:
+    """Hash of everything about a page that ends up in the index: title, url and body.
+
+    specific.py compares it to spot edits to pages without a version number, and the indexer
+    stores it in its manifest, so both sides agree on what counts as changed.
+    """
+    content = page.get('content', '')
+    body = content.get('body', '') if isinstance(content, dict) else content
+    digest = hashlib.sha256()
+    for part in (page.get('title', ''), page.get('url', ''), body):
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def empty_changeset() -> Dict[str, Any]:
+    return {'added': [], 'updated': [], 'removed': [], 'pages': {}}
+
+
+def has_changes(changeset: Dict[str, Any]) -> bool:
+    return bool(changeset.get('added') or changeset.get('updated') or changeset.get('removed'))
+
+
+def merge_changesets(base: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold `new` into `base`; later changes to the same id win"""
+    added = list(base.get('added', []))
+    updated = list(base.get('updated', []))
+    removed = list(base.get('removed', []))
+    pages = dict(base.get('pages', {}))
+
+    for page_id in new.get('removed', []):
+        pages.pop(page_id, None)
+        if page_id in added:
+            # Never indexed, so there is nothing to remove
+            added.remove(page_id)
+            continue
+        if page_id in updated:
+            updated.remove(page_id)
+        if page_id not in removed:
+            removed.append(page_id)
+
+    for page_id in new.get('added', []) + new.get('updated', []):
+        pages[page_id] = new['pages'][page_id]
+        if page_id in removed:
+            removed.remove(page_id)
+            updated.append(page_id)
+        elif page_id not in added and page_id not in updated:
+            (added if page_id in new.get('added', []) else updated).append(page_id)
+
+    return {'added': added, 'updated': updated, 'removed': removed, 'pages': pages}
+
+
+def _load(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return empty_changeset()
+
+
+def _write(path: str, changeset: Dict[str, Any]):
+    write_json(path, changeset, ensure_ascii=False)
+
+
+def record_changeset(changeset: Dict[str, Any], path: str = PENDING_CHANGES_FILE) -> Dict[str, Any]:
+    if not has_changes(changeset):
+        return _load(path)
+    # Webhook handlers and the periodic sync may record at the same time; each merge sees the last
+    with file_lock(path):
+        pending = merge_changesets(_load(path), changeset)
+        _write(path, pending)
+    print(f"📝 Pending index changes: {len(pending['added'])} added, {len(pending['updated'])} updated, "
+          f"{len(pending['removed'])} removed")
+    return pending
+
+
+def claim_pending_changes(path: str = PENDING_CHANGES_FILE) -> Dict[str, Any]:
+    """Move pending changes aside for indexing so syncs that run meanwhile start a new file.
+
+    A claim left behind by a crashed indexer is merged with anything recorded since.
+    """
+    claimed_path = f"{path}.processing"
+    with file_lock(path):
+        claimed = _load(claimed_path)
+        if os.path.exists(path):
+            claimed = merge_changesets(claimed, _load(path))
+            _write(claimed_path, claimed)
+            os.remove(path)
+    return claimed
+
+
+def release_claimed_changes(path: str = PENDING_CHANGES_FILE):
+    claimed_path = f"{path}.processing"
+    if os.path.exists(claimed_path):
+        os.remove(claimed_path)
@@ -1,19 +1,16 @@
 #!/usr/bin/env python3
 
 import requests
-import json
 from datetime import datetime
-from requests.auth import HTTPBasicAuth
-from config import CONFLUENCE_BASE_URL, EMAIL, API_TOKEN, SPACE_KEY
+from config import CONFLUENCE_BASE_URL, SPACE_KEY
+from confluence_client import ConfluenceClient
 
 class RunbookCreator:
     def __init__(self):
         """Initialize the runbook creator with Confluence API credentials"""
         self.base_url = CONFLUENCE_BASE_URL
-        self.email = EMAIL
-        self.api_token = API_TOKEN
         self.space_key = SPACE_KEY or "DEVOPS"
-        self.auth = HTTPBasicAuth(self.email, self.api_token)
+        self.client = ConfluenceClient()
         
     def generate_runbook_template(self, query: str, user_context: str = None) -> str:
         """Generate a template for a new runbook based on the user's query"""
@@ -158,20 +155,8 @@ class RunbookCreator:
         }
         
         # Create the page
-        create_url = f"{self.base_url}/wiki/rest/api/content"
-        headers = {
-            "Accept": "application/json",
-            "Content-Type": "application/json"
-        }
-        
         try:
-            response = requests.post(
-                create_url,
-                auth=self.auth,
-                headers=headers,
-                data=json.dumps(page_data),
-                timeout=30
-            )
+            response = self.client.create_page(page_data)
             
             if response.status_code == 200:
                 created_page = response.json()
@@ -211,8 +196,6 @@ class RunbookCreator:
     def add_review_labels(self, page_id: str):
         """Add review-related labels to the page"""
         try:
-            labels_url = f"{self.base_url}/wiki/rest/api/content/{page_id}/label"
-            
             additional_labels = [
                 {"name": "pending-devops-review"},
                 {"name": f"created-{datetime.now().strftime('%Y-%m')}"},
@@ -220,13 +203,7 @@ class RunbookCreator:
             ]
             
             for label in additional_labels:
-                requests.post(
-                    labels_url,
-                    auth=self.auth,
-                    headers={"Content-Type": "application/json"},
-                    data=json.dumps([label]),
-                    timeout=10
-                )
+                self.client.add_labels(page_id, [label], timeout=10)
                 
         except Exception as e:
             print(f"⚠️ Could not add additional labels: {e}")
@@ -234,14 +211,13 @@ class RunbookCreator:
     def get_pending_review_runbooks(self) -> list:
         """Get list of runbooks pending review"""
         try:
-            search_url = f"{self.base_url}/wiki/rest/api/content/search"
             params = {
                 "cql": f"space = {self.space_key} AND label = 'needs-review' AND label = 'draft'",
                 "limit": 50,
                 "expand": "metadata.labels,version"
             }
             
-            response = requests.get(search_url, auth=self.auth, params=params, timeout=15)
+            response = self.client.get("/wiki/rest/api/content/search", params=params, timeout=15)
             
             if response.status_code == 200:
                 data = response.json()
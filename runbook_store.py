@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""SQLite store for fetched runbook pages, with an FTS5 index over their cleaned text.
+
+Each page is one row, so a sync or webhook upserts only the pages that changed instead of
+rewriting the whole export, and readers load just the pages they ask for. `runbooks_fts`
+is an external-content FTS5 table kept in step with `runbooks` by triggers. Its rows
+therefore change in the same transaction as the page they index.
+
+Raw storage HTML is kept compressed in `body` (see page_codec.py) next to the cleaned text.
+Readers choose what goes into a page's `content`: the raw HTML (decompressed on demand), the
+cleaned text, or nothing at all.
+
+Usage:
+    python runbook_store.py import devops_runbooks.json   # seed the store from a JSON export
+    python runbook_store.py export devops_runbooks.json   # write the old {metadata, runbooks} file
+    python runbook_store.py search "redis connection refused"
+    python runbook_store.py train-dict                     # train a zstd dictionary and recompress bodies
+    python runbook_store.py stats
+"""
+
+import os
+import re
+import sys
+import html
+import json
+import sqlite3
+import threading
+from contextlib import closing
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from atomic_io import atomic_write
+from page_codec import PageCodec, ZSTD_AVAILABLE, DICT_SIZE, train_dictionary
+
+STORE_FILE = os.environ.get("RUNBOOK_STORE_PATH", "runbooks.sqlite3")
+
+# SQLite caps bound parameters per statement, so lookups are issued in slices
+_LOOKUP_SLICE = 500
+_ITER_BATCH = 200
+# bm25 column weights: a hit in the title counts for more than one in the body
+_TITLE_WEIGHT = 5.0
+_TEXT_WEIGHT = 1.0
+# Pages sampled when training a compression dictionary
+_DICT_SAMPLES = 2000
+CONTENT_MODES = ('raw', 'text', None)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runbooks (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL DEFAULT '',
+    url TEXT NOT NULL DEFAULT '',
+    version INTEGER,
+    data TEXT NOT NULL,
+    text TEXT NOT NULL DEFAULT '',
+    body BLOB,
+    codec TEXT,
+    raw_size INTEGER NOT NULL DEFAULT 0
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS runbooks_fts USING fts5(
+    title, text, content='runbooks', content_rowid='rowid', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS runbooks_ai AFTER INSERT ON runbooks BEGIN
+    INSERT INTO runbooks_fts(rowid, title, text) VALUES (new.rowid, new.title, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS runbooks_ad AFTER DELETE ON runbooks BEGIN
+    INSERT INTO runbooks_fts(runbooks_fts, rowid, title, text) VALUES ('delete', old.rowid, old.title, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS runbooks_au AFTER UPDATE ON runbooks BEGIN
+    INSERT INTO runbooks_fts(runbooks_fts, rowid, title, text) VALUES ('delete', old.rowid, old.title, old.text);
+    INSERT INTO runbooks_fts(rowid, title, text) VALUES (new.rowid, new.title, new.text);
+END;
+CREATE TABLE IF NOT EXISTS store_metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS compression_dicts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    data BLOB NOT NULL,
+    samples INTEGER NOT NULL,
+    trained_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+# Stores created before bodies were compressed keep the HTML inside `data`; it is moved out on the next write
+BODY_COLUMNS = (('body', 'BLOB'), ('codec', 'TEXT'), ('raw_size', 'INTEGER NOT NULL DEFAULT 0'))
+# store_metadata keys that mark a store as holding every runbook (a full crawl or a JSON import)
+COMPLETE_KEYS = ('complete', 'imported_from')
+
+
+def page_body(page: Dict[str, Any]) -> str:
+    # specific.py stores raw HTML; runbooks_data_* exports nest it under content.body
+    content = page.get('content', '')
+    if isinstance(content, dict):
+        return content.get('body', '')
+    return str(content or '')
+
+
+def clean_text(body: str) -> str:
+    text = re.sub(r'<[^>]+>', ' ', body)
+    return re.sub(r'\s+', ' ', html.unescape(text)).strip()
+
+
+def split_body(page: Dict[str, Any]):
+    """(page without its raw body, raw body)"""
+    record = dict(page)
+    content = record.pop('content', '')
+    if isinstance(content, dict):
+        record['content'] = {key: value for key, value in content.items() if key != 'body'}
+        return record, content.get('body', '')
+    return record, str(content or '')
+
+
+def attach_content(page: Dict[str, Any], value: str) -> Dict[str, Any]:
+    if isinstance(page.get('content'), dict):
+        page['content']['body'] = value
+    else:
+        page['content'] = value
+    return page
+
+
+def _version_number(page: Dict[str, Any]) -> Optional[int]:
+    version = page.get('version')
+    if isinstance(version, dict):
+        version = version.get('number')
+    return version
+
+
+def fts_query(query: str) -> str:
+    """Turn free text into an FTS5 query: every word quoted (so `-`, `:` or `*` are not operators), OR-ed"""
+    words = re.findall(r'\w+', query.lower())
+    return ' OR '.join(f'"{word}"' for word in dict.fromkeys(words))
+
+
+def store_is_complete(path: str = STORE_FILE) -> bool:
+    """True if `path` holds every runbook, so readers can use it instead of the JSON export.
+
+    A store that only webhooks or incremental syncs have written to is a partial copy. The check
+    opens the file read-only, so it never creates a store as a side effect.
+    """
+    if not os.path.exists(path):
+        return False
+    try:
+        with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as conn:
+            placeholders = ','.join('?' * len(COMPLETE_KEYS))
+            return conn.execute(f"SELECT 1 FROM store_metadata WHERE key IN ({placeholders})",
+                                COMPLETE_KEYS).fetchone() is not None
+    except sqlite3.Error:
+        return False
+
+
+class RunbookStore:
+    def __init__(self, path: str = STORE_FILE, readonly: bool = False):
+        """`readonly` opens an existing store as-is: no schema is created or migrated and writes fail"""
+        self.path = path
+        self.readonly = readonly
+        if readonly:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No runbook store at {path}")
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            # Web apps query from request threads; one connection guarded by a lock is enough here
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(runbooks)")}
+            for name, definition in BODY_COLUMNS:
+                if name not in columns:
+                    self.conn.execute(f"ALTER TABLE runbooks ADD COLUMN {name} {definition}")
+            self.conn.commit()
+        self._lock = threading.Lock()
+        self.codec = self._load_codec()
+
+    def _load_codec(self) -> PageCodec:
+        dictionaries = dict(self.conn.execute("SELECT id, data FROM compression_dicts"))
+        return PageCodec(dictionaries, max(dictionaries) if dictionaries else None)
+
+    def _decompress(self, codec: str, body: bytes) -> str:
+        try:
+            return self.codec.decompress(codec, body)
+        except KeyError:
+            # A dictionary trained by another process since this store was opened
+            with self._lock:
+                self.codec = self._load_codec()
+            return self.codec.decompress(codec, body)
+
+    def _columns(self, content: Optional[str]) -> str:
+        if content not in CONTENT_MODES:
+            raise ValueError(f"content must be one of {CONTENT_MODES}, got {content!r}")
+        return {'raw': "data, body, codec", 'text': "data, text", None: "data"}[content]
+
+    def _decode(self, row, content: Optional[str]) -> Dict[str, Any]:
+        page = json.loads(row[0])
+        if content == 'raw':
+            body, codec = row[1], row[2]
+            # Rows from before compression still carry their HTML in `data`
+            return attach_content(page, self._decompress(codec, body)) if body is not None else page
+        page, _ = split_body(page)
+        if content == 'text':
+            attach_content(page, row[1])
+        return page
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM runbooks").fetchone()[0]
+
+    def __contains__(self, page_id: str) -> bool:
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM runbooks WHERE id = ?", (page_id,)).fetchone() is not None
+
+    def get(self, page_id: str, default: Optional[Dict[str, Any]] = None,
+            content: Optional[str] = 'raw') -> Optional[Dict[str, Any]]:
+        """Stored page; `content` is 'raw' (storage HTML), 'text' (cleaned) or None (left out)"""
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT {self._columns(content)} FROM runbooks WHERE id = ?", (page_id,)
+            ).fetchone()
+        return self._decode(row, content) if row else default
+
+    def get_many(self, page_ids: Iterable[str], content: Optional[str] = 'raw') -> Dict[str, Dict[str, Any]]:
+        """Stored pages for the ids that exist, keyed by id"""
+        found = {}
+        unique_ids = list(dict.fromkeys(page_ids))
+        columns = self._columns(content)
+        for start in range(0, len(unique_ids), _LOOKUP_SLICE):
+            id_slice = unique_ids[start:start + _LOOKUP_SLICE]
+            placeholders = ','.join('?' * len(id_slice))
+            with self._lock:
+                rows = self.conn.execute(
+                    f"SELECT id, {columns} FROM runbooks WHERE id IN ({placeholders})", id_slice
+                ).fetchall()
+            found.update((row[0], self._decode(row[1:], content)) for row in rows)
+        return found
+
+    def raw_html(self, page_id: str) -> Optional[str]:
+        page = self.get(page_id)
+        return page_body(page) if page is not None else None
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self.conn.execute("SELECT id FROM runbooks ORDER BY rowid")]
+
+    def iter_runbooks(self, content: Optional[str] = 'raw') -> Iterator[Dict[str, Any]]:
+        """Every stored page in insertion order, decoded a batch at a time"""
+        columns = self._columns(content)
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    f"SELECT rowid, {columns} FROM runbooks WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, _ITER_BATCH)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._decode(row[1:], content)
+            last_rowid = rows[-1][0]
+
+    def revision(self) -> int:
+        return self.metadata().get('revision', 0)
+
+    def is_complete(self) -> bool:
+        metadata = self.metadata()
+        return any(metadata.get(key) for key in COMPLETE_KEYS)
+
+    def metadata(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self.conn.execute("SELECT key, value FROM store_metadata").fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def apply(self, upserts: Iterable[Dict[str, Any]] = (), removed: Iterable[str] = (),
+              metadata: Optional[Dict[str, Any]] = None):
+        """Upsert pages, delete ids and update metadata in one transaction.
+
+        An existing id keeps its rowid, so export order matches the order pages were first stored.
+        """
+        rows = []
+        for page in upserts:
+            record, body = split_body(page)
+            codec, blob = self.codec.compress(body)
+            rows.append((page['id'], page.get('title', ''), page.get('url', ''), _version_number(page),
+                         json.dumps(record, ensure_ascii=False), clean_text(body), blob, codec, len(body)))
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO runbooks (id, title, url, version, data, text, body, codec, raw_size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET title = excluded.title, url = excluded.url, "
+                "version = excluded.version, data = excluded.data, text = excluded.text, "
+                "body = excluded.body, codec = excluded.codec, raw_size = excluded.raw_size",
+                rows
+            )
+            self.conn.executemany("DELETE FROM runbooks WHERE id = ?", [(page_id,) for page_id in removed])
+            # Bumped with every write so derived data (e.g. the chunk arena) can tell it is stale
+            self.conn.execute(
+                "INSERT INTO store_metadata (key, value) VALUES ('revision', '1') "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+            )
+            if metadata:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO store_metadata (key, value) VALUES (?, ?)",
+                    [(key, json.dumps(value)) for key, value in metadata.items()]
+                )
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Pages ranked by FTS5 bm25, best first; `score` is the positive bm25 relevance"""
+        match = fts_query(query)
+        if not match:
+            return []
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT r.id, r.title, r.url, snippet(runbooks_fts, 1, '', '', '…', 64), "
+                "       bm25(runbooks_fts, ?, ?) AS rank "
+                "FROM runbooks_fts JOIN runbooks r ON r.rowid = runbooks_fts.rowid "
+                "WHERE runbooks_fts MATCH ? ORDER BY rank LIMIT ?",
+                (_TITLE_WEIGHT, _TEXT_WEIGHT, match, limit)
+            ).fetchall()
+        return [
+            {'id': page_id, 'title': title, 'url': url, 'snippet': snippet, 'score': -rank}
+            for page_id, title, url, snippet, rank in rows
+        ]
+
+    def train_dictionary(self, max_samples: int = _DICT_SAMPLES, dict_size: int = DICT_SIZE) -> int:
+        """Train a zstd dictionary on stored bodies, then recompress every page with it; returns its id"""
+        samples = [page_body(page) for _, page in zip(range(max_samples), self.iter_runbooks())]
+        data = train_dictionary(samples, dict_size)
+        with self._lock, self.conn:
+            dict_id = self.conn.execute(
+                "INSERT INTO compression_dicts (data, samples) VALUES (?, ?)", (data, len(samples))
+            ).lastrowid
+        self.codec = self._load_codec()
+        self.recompress()
+        return dict_id
+
+    def recompress(self) -> int:
+        """Rewrite bodies not already in the current codec, a batch per transaction"""
+        recompressed = 0
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT rowid, data, body, codec FROM runbooks "
+                    "WHERE rowid > ? AND (codec IS NULL OR codec != ?) ORDER BY rowid LIMIT ?",
+                    (last_rowid, self.codec.name, _ITER_BATCH)
+                ).fetchall()
+            if not rows:
+                return recompressed
+            # apply() re-splits each page, which also moves HTML out of pre-compression rows
+            self.apply(self._decode(row[1:], 'raw') for row in rows)
+            recompressed += len(rows)
+            last_rowid = rows[-1][0]
+
+    def storage_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pages, raw, compressed, text = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(body)), 0), "
+                "COALESCE(SUM(LENGTH(text)), 0) FROM runbooks"
+            ).fetchone()
+            codecs = dict(self.conn.execute("SELECT COALESCE(codec, 'none'), COUNT(*) FROM runbooks GROUP BY codec"))
+        return {
+            'pages': pages,
+            'raw_bytes': raw,
+            'compressed_bytes': compressed,
+            'ratio': round(raw / compressed, 2) if compressed else None,
+            'text_bytes': text,
+            'codecs': codecs
+        }
+
+    def import_json(self, json_file: str, batch_size: int = _ITER_BATCH) -> int:
+        # Imported lazily: runbook_stream reads stores through this module
+        from runbook_stream import iter_runbooks, batched
+
+        imported = 0
+        for batch in batched(iter_runbooks(json_file), batch_size):
+            self.apply(batch)
+            imported += len(batch)
+        self.apply(metadata={'imported_from': json_file, 'total_runbooks': len(self), 'complete': True})
+        return imported
+
+    def export_json(self, json_file: str) -> int:
+        """Write the {metadata, runbooks} export older readers expect, one page at a time"""
+        exported = 0
+        # Readers of the export see the old file or the new one, never a partial write
+        with atomic_write(json_file) as f:
+            f.write('{"metadata": ')
+            json.dump(self.metadata(), f, ensure_ascii=False)
+            f.write(', "runbooks": [')
+            for page in self.iter_runbooks():
+                if exported:
+                    f.write(', ')
+                json.dump(page, f, ensure_ascii=False)
+                exported += 1
+            f.write(']}\n')
+        return exported
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    store = RunbookStore()
+    try:
+        if command == 'import':
+            json_file = sys.argv[2] if len(sys.argv) > 2 else 'devops_runbooks.json'
+            print(f"📥 Imported {store.import_json(json_file)} pages from {json_file} into {store.path}")
+        elif command == 'export':
+            json_file = sys.argv[2] if len(sys.argv) > 2 else 'devops_runbooks.json'
+            print(f"📤 Exported {store.export_json(json_file)} pages from {store.path} to {json_file}")
+        elif command == 'train-dict':
+            if not ZSTD_AVAILABLE:
+                print("❌ zstandard is not installed; bodies are stored with zlib")
+                return
+            dict_id = store.train_dictionary()
+            print(f"📚 Trained dictionary {dict_id}; {store.storage_stats()}")
+        elif command == 'search':
+            for hit in store.search(' '.join(sys.argv[2:]), limit=10):
+                print(f"{hit['score']:6.2f}  {hit['title']}  {hit['url']}")
+        else:
+            stats = store.storage_stats()
+            print(f"🗃️ {stats['pages']} pages in {store.path}, metadata: {store.metadata()}")
+            print(f"🗜️ Raw HTML {stats['raw_bytes'] / 1024:.1f} KB stored as {stats['compressed_bytes'] / 1024:.1f} KB "
+                  f"(x{stats['ratio']}, codecs {stats['codecs']}); cleaned text {stats['text_bytes'] / 1024:.1f} KB")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+import json
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+READ_SIZE = 64 * 1024
+RECORD_KEYS = ("runbooks", "pages")
+
+
+class _StreamReader:
+    """Sliding text buffer over a file that hands out complete JSON values one at a time"""
+
+    def __init__(self, f, read_size: int = READ_SIZE):
+        self.f = f
+        self.read_size = read_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        data = self.f.read(self.read_size)
+        if not data:
+            self.eof = True
+            return False
+        # Drop what has already been consumed so memory stays bounded by one record
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Malformed JSON export: expected '{char}', found '{found or 'EOF'}'")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A scalar ending exactly at the buffer edge may be truncated (e.g. a number)
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            if not self._fill():
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                self.pos = end
+                return obj
+
+    def array_items(self) -> Iterator[Any]:
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect(']')
+            return
+
+
+def iter_json_array(path: str, keys: Sequence[str] = RECORD_KEYS) -> Iterator[Dict[str, Any]]:
+    """Stream records from a JSON export one at a time.
+
+    Handles a top-level array, or a top-level object whose first key in `keys`
+    holds the array (e.g. {"metadata": ..., "runbooks": [...]}).
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = _StreamReader(f)
+        if reader.peek() == '[':
+            yield from reader.array_items()
+            return
+
+        reader.expect('{')
+        if reader.peek() == '}':
+            return
+        while True:
+            key = reader.value()
+            reader.expect(':')
+            if key in keys and reader.peek() == '[':
+                yield from reader.array_items()
+                return
+            reader.value()  # skip metadata and other small siblings
+            if reader.peek() == ',':
+                reader.pos += 1
+                continue
+            reader.expect('}')
+            return
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_store(path: str) -> Iterator[Dict[str, Any]]:
+    from runbook_store import RunbookStore
+
+    # Read-only, and closed even when the caller stops iterating part-way
+    store = RunbookStore(str(path), readonly=True)
+    try:
+        yield from store.iter_runbooks()
+    finally:
+        store.close()
+
+
+def iter_runbooks(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream runbook/page records from a .json export, a .jsonl file or a runbook_store database"""
+    if str(path).endswith('.jsonl'):
+        return iter_jsonl(path)
+    if str(path).endswith(('.sqlite3', '.db')):
+        return iter_store(path)
+    return iter_json_array(path)
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
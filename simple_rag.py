@@ -3,10 +3,17 @@
 import json
 import re
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pathlib import Path
 import os
+import threading
 from intelligent_runbook_creator import IntelligentRunbookCreator
+from runbook_stream import iter_runbooks
+from runbook_store import RunbookStore, STORE_FILE, clean_text, page_body, store_is_complete
+from chunk_arena import ARENA_FILE, ChunkArena, load_arena, store_source
+from records import ChunkRecord, SearchHit
+from index_registry import VECTORDB_PATH, ActiveCollection, get_active_collection_name
+from index_manifest import load_manifest, manifest_for_stats
 import requests
 
 try:
@@ -48,13 +55,13 @@ class AzureOpenAIClient:
         self.deployment_name = AZURE_OPENAI_API_DEPLOYMENT_NAME
         self.api_version = AZURE_OPENAI_API_VERSION
         
-    def analyze_issue(self, query: str, chunked_data: List[Dict], runbook_stats: Dict) -> Dict[str, Any]:
+    def analyze_issue(self, query: str, chunked_data: List[ChunkRecord], runbook_stats: Dict) -> Dict[str, Any]:
         """Analyze the issue using Azure OpenAI"""
         try:
             # Prepare context from chunked data
             context_chunks = []
             for chunk in chunked_data[:10]:  # Limit to top 10 chunks
-                context_chunks.append(f"Runbook: {chunk.get('runbook_title', 'Unknown')}\nContent: {chunk.get('text', '')[:500]}")
+                context_chunks.append(f"Runbook: {chunk.runbook_title or 'Unknown'}\nContent: {chunk.text[:500]}")
             
             context_text = "\n\n".join(context_chunks)
             
@@ -188,13 +195,19 @@ Focus on why this topic is important and what should be documented. Ensure the r
             }
 
 class SimpleRAGSystem:
-    def __init__(self, json_path="devops_runbooks.json"):
+    def __init__(self, json_path="devops_runbooks.json", store_path=STORE_FILE, arena_path=ARENA_FILE):
         print("🚀 Initializing RAG system with ChromaDB backend and Azure OpenAI analysis...")
         self.json_path = json_path
-        self.runbooks_data = {}
+        self.store_path = store_path
+        self.arena_path = arena_path
+        self.store = None
+        self.source = None
         self.chunked_data = []
         self.vector_collection = None
+        self.active_index = None
         self.use_vector_search = False
+        # Flask serves queries on several threads; only one of them reloads
+        self._reload_lock = threading.Lock()
         self.runbook_creator = IntelligentRunbookCreator()
         self.azure_client = AzureOpenAIClient()
 
@@ -203,97 +216,135 @@ class SimpleRAGSystem:
         self.init_chroma()
 
     def load_runbooks(self):
-        if not os.path.exists(self.json_path):
+        """Pick the runbook source; chunk_runbooks streams from it, so no runbook is held in memory"""
+        if self.store is None and store_is_complete(self.store_path):
+            # The store written by specific.py; the JSON export is only read until it holds every runbook.
+            # Opened read-only: schema changes and migrations are left to the writers
+            self.store = RunbookStore(self.store_path, readonly=True)
+        self.source = self.current_source()
+        if self.store is not None:
+            print(f"📚 {len(self.store)} runbooks in {self.store_path}")
+            return
+        if os.path.exists(self.store_path):
+            print(f"⚠️ {self.store_path} does not hold every runbook yet; using {self.json_path}")
+        if self.source is None:
             print(f"❌ Runbooks JSON not found at {self.json_path}")
             return
-        with open(self.json_path, 'r', encoding='utf-8') as f:
-            self.runbooks_data = json.load(f)
-        print(f"📚 Loaded {len(self.runbooks_data.get('runbooks', []))} runbooks")
-
-    def chunk_runbooks(self):
-        self.chunked_data = []
-        for runbook in self.runbooks_data.get("runbooks", []):
-            content = runbook.get("content", "")
-            if isinstance(content, dict):
-                content_text = content.get("body", "")
-            else:
-                content_text = str(content)
+        print(f"📚 Using runbooks from {self.json_path}")
+
+    def current_source(self) -> Optional[str]:
+        """What load_runbooks would pick now; differs from `source` once another process has written"""
+        if self.store is not None:
+            return store_source(self.store_path, self.store.revision())
+        if store_is_complete(self.store_path):
+            return "store"
+        if not os.path.exists(self.json_path):
+            return None
+        st = os.stat(self.json_path)
+        return f"{os.path.abspath(self.json_path)}@{st.st_mtime_ns}:{st.st_size}"
 
+    def reload_if_changed(self):
+        """Re-chunk after syncs or webhook refreshes in other processes; vectors follow via ActiveCollection"""
+        if self.current_source() == self.source:
+            return
+        with self._reload_lock:
+            # Another query may have reloaded while this one waited
+            if self.current_source() == self.source:
+                return
+            print("🔄 Runbooks changed since they were loaded, reloading...")
+            self.load_runbooks()
+            self.chunk_runbooks()
+
+    def iter_runbook_chunks(self):
+        # Only cleaned text is chunked; raw HTML stays compressed in the store (see raw_html)
+        if self.store is not None:
+            runbooks = self.store.iter_runbooks(content='text')
+        else:
+            runbooks = iter_runbooks(self.json_path)
+        for runbook in runbooks:
+            content_text = page_body(runbook) if self.store is not None else clean_text(page_body(runbook))
             # Simple chunking: split content into 500 char chunks
             chunks = [content_text[i:i+500] for i in range(0, len(content_text), 500)]
-            for idx, chunk in enumerate(chunks):
-                self.chunked_data.append({
-                    "runbook_id": runbook.get("id"),
-                    "runbook_title": runbook.get("title", ""),
-                    "runbook_url": runbook.get("url", ""),
-                    "chunk_index": idx,
-                    "text": chunk
-                })
-        print(f"🧩 Created {len(self.chunked_data)} chunks from runbooks.")
+            yield runbook.get("id"), runbook.get("title", ""), runbook.get("url", ""), chunks
+
+    def raw_html(self, runbook_id: str) -> Optional[str]:
+        """Storage-format HTML of one runbook, decompressed on demand; None without a store"""
+        return self.store.raw_html(runbook_id) if self.store is not None else None
+
+    def chunk_runbooks(self):
+        if self.source is None:
+            return
+        # Chunk text lives in a memory-mapped arena shared by every worker serving the same source.
+        # The previous arena is not closed here: queries still running hold it, and it unmaps once they drop it.
+        arena = load_arena(self.source, self.iter_runbook_chunks, self.arena_path)
+        self.chunked_data = arena
+        print(f"🧩 {len(arena)} chunks from {arena.runbook_count} runbooks in {self.arena_path}")
 
     def init_chroma(self):
         if not CHROMA_AVAILABLE:
             print("⚠️ ChromaDB/SentenceTransformer not available")
             return
         try:
-            client = chromadb.PersistentClient(path="./runbook_vectordb")
-            self.vector_collection = client.get_collection("runbook_chunks")
+            client = chromadb.PersistentClient(path=VECTORDB_PATH)
+            # Follows the active-index pointer so blue/green rebuilds are picked up without a restart
+            self.active_index = ActiveCollection(client)
+            self.vector_collection = self.active_index.get()
             self.use_vector_search = True
-            print("✅ Connected to ChromaDB vector store: runbook_chunks")
+            print(f"✅ Connected to ChromaDB vector store: {self.active_index.name}")
         except Exception as e:
             print(f"⚠️ Could not connect to ChromaDB: {e}")
             self.vector_collection = None
             self.use_vector_search = False
 
-    def search_chunks(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    def search_chunks(self, query: str, top_k: int = 5, section: Optional[str] = None) -> List[SearchHit]:
         if self.use_vector_search:
             try:
-                # Using vector search with query_texts parameter
-                result = self.vector_collection.query(query_texts=[query], n_results=top_k)
-                results = []
-                for i in range(len(result['documents'][0])):
-                    results.append({
-                        'text': result['documents'][0][i],
-                        'runbook_id': result['metadatas'][0][i].get('runbook_id'),
-                        'title': result['metadatas'][0][i].get('runbook_title', ''),
-                        'url': result['metadatas'][0][i].get('runbook_url', ''),
-                        'chunk_index': result['metadatas'][0][i].get('chunk_index'),
-                        'relevance_score': 1.0 / (1.0 + result['distances'][0][i])  # invert distance to relevance
-                    })
-                return results
+                self.vector_collection = self.active_index.get()
+                # Using vector search with query_texts parameter; `section` limits hits to one top-level subtree
+                where = {'section': section} if section else None
+                result = self.vector_collection.query(query_texts=[query], n_results=top_k, where=where)
+                # Positional arguments: keyword calls cost more than the dicts these replace
+                return [
+                    SearchHit(document, metadata.get('runbook_id'), metadata.get('runbook_title', ''),
+                              metadata.get('runbook_url', ''), metadata.get('chunk_index'),
+                              1.0 / (1.0 + distance),  # invert distance to relevance
+                              metadata.get('ancestor_path', ''))
+                    for document, metadata, distance in zip(
+                        result['documents'][0], result['metadatas'][0], result['distances'][0]
+                    )
+                ]
             except Exception as e:
                 print(f"❌ Chroma query failed: {e}")
 
         return self._fallback_text_search(query, top_k)
 
-    def _fallback_text_search(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+    def _fallback_text_search(self, query: str, top_k: int) -> List[SearchHit]:
         print("🔍 Using fallback keyword search (no vector index)")
-        runbooks = self.runbooks_data.get('runbooks', [])
-        query_lower = query.lower().strip()
+        if self.store is not None:
+            # FTS5 bm25 ranking; scores are squashed into (0, 1) to compare with the vector relevance
+            return [
+                SearchHit(hit['snippet'], hit['id'], hit['title'], hit['url'], 0, hit['score'] / (1.0 + hit['score']))
+                for hit in self.store.search(query, top_k)
+            ]
+
+        # Without a store, scan the chunk arena; the first matching chunk stands for its runbook.
+        # One reference for the whole scan, so a concurrent reload cannot swap the arena mid-way.
+        arena = self.chunked_data
+        query_lower = re.sub(r'\s+', ' ', query.lower().strip())
         results = []
-
-        for runbook in runbooks:
-            content = runbook.get('content', '')
-            if isinstance(content, dict):
-                text = content.get('body', '')
-            else:
-                text = str(content)
-
-            # Normalize
-            text_clean = re.sub(r'\s+', ' ', text.lower())
-            if query_lower in text_clean:
-                results.append({
-                    'text': text[:500],
-                    'runbook_id': runbook.get('id'),
-                    'title': runbook.get('title', ''),
-                    'url': runbook.get('url', ''),
-                    'chunk_index': 0,
-                    'relevance_score': 1.0
-                })
-
-        return results[:top_k]
-
-    def generate_answer(self, query: str, chunks: List[Dict[str, Any]]) -> str:
+        seen = set()
+        for i in arena.find(query_lower) if isinstance(arena, ChunkArena) else ():
+            runbook_id, title, url = arena.runbook(i)
+            if runbook_id in seen:
+                continue
+            seen.add(runbook_id)
+            results.append(SearchHit(arena.text(i), runbook_id, title, url, 0, 1.0))
+            if len(results) == top_k:
+                break
+
+        return results
+
+    def generate_answer(self, query: str, chunks: List[SearchHit]) -> str:
         if not chunks:
             # When no chunks are found, use Azure OpenAI to generate intelligent context
             if hasattr(self, 'azure_client'):
@@ -346,7 +397,7 @@ Provide a comprehensive, helpful response that gives the user actionable guidanc
 
         # If Azure OpenAI is available, generate better answer
         if hasattr(self, 'azure_client'):
-            context = "\n\n".join([f"From '{c['title']}':\n{c['text']}" for c in chunks[:5]])
+            context = "\n\n".join([f"From '{c.title}':\n{c.text}" for c in chunks[:5]])
             prompt = f"""You are a helpful DevOps assistant answering questions about Meesho internal runbooks.
 
 Context:
@@ -392,27 +443,30 @@ Provide a clear, actionable answer based only on the provided runbook context. I
         # Simple fallback answer
         lines = ["📘 Runbook findings:\n"]
         for i, c in enumerate(chunks[:3], 1):
-            lines.append(f"{i}. From '{c['title']}':")
-            lines.append(f"   {c['text'][:300]}...\n")
+            lines.append(f"{i}. From '{c.title}':")
+            lines.append(f"   {c.text[:300]}...\n")
         return '\n'.join(lines)
 
-    def process_query(self, query: str, create_if_missing: bool = False) -> Dict[str, Any]:
+    def process_query(self, query: str, create_if_missing: bool = False, section: Optional[str] = None) -> Dict[str, Any]:
         start = datetime.now()
         if not query or len(query.strip()) < 3:
             return {"answer": "Please ask a more specific question.", "query": query, "chunks_found": 0}
 
-        results = self.search_chunks(query, top_k=5)
+        self.reload_if_changed()
+        # Held for the whole query; a reload by another request swaps self.chunked_data, not this one
+        chunked_data = self.chunked_data
+        results = self.search_chunks(query, top_k=5, section=section)
         
         # Get system stats for analysis
-        stats = self.get_stats()
+        stats = self.get_stats(chunked_data)
         
         # Perform issue analysis using Azure OpenAI
         analysis_result = None
         if hasattr(self, 'azure_client'):
-            analysis_result = self.azure_client.analyze_issue(query, self.chunked_data, stats)
+            analysis_result = self.azure_client.analyze_issue(query, chunked_data, stats)
 
         # Check if we have meaningful results (high relevance scores)
-        meaningful_results = [r for r in results if r.get('relevance_score', 0) > 0.6]
+        meaningful_results = [r for r in results if r.relevance_score > 0.6]
         
         if not results or len(meaningful_results) == 0:
             # Generate intelligent answer even when no meaningful runbooks are found
@@ -453,10 +507,8 @@ Provide a clear, actionable answer based only on the provided runbook context. I
             "query": query,
             "chunks_found": len(meaningful_results),
             "answer": answer,
-            "sources": [
-                {"title": r["title"], "url": r["url"], "relevance": r["relevance_score"]}
-                for r in meaningful_results
-            ],
+            # Source records; simple_web_app serialises them with to_dict()
+            "sources": [r.source() for r in meaningful_results],
             "processing_time": (datetime.now() - start).total_seconds(),
             "suggest_creation": False,
             "can_create_runbook": False,
@@ -464,10 +516,16 @@ Provide a clear, actionable answer based only on the provided runbook context. I
             "analysis_success": analysis_result.get("success") if analysis_result else False
         }
 
-    def get_stats(self) -> Dict[str, Any]:
+    def get_index_manifest(self, include_runbooks: bool = False) -> Dict[str, Any]:
+        """Manifest written by the last index run for the collection being served"""
+        collection_name = self.active_index.name if self.active_index else get_active_collection_name()
+        return manifest_for_stats(load_manifest(collection_name), include_runbooks=include_runbooks)
+
+    def get_stats(self, chunked_data=None) -> Dict[str, Any]:
+        chunked_data = self.chunked_data if chunked_data is None else chunked_data
         return {
-            "total_runbooks": len(self.runbooks_data.get('runbooks', [])) if self.runbooks_data else 0,
-            "total_chunks": len(self.chunked_data),
+            "total_runbooks": chunked_data.runbook_count if isinstance(chunked_data, ChunkArena) else 0,
+            "total_chunks": len(chunked_data),
             "search_type": "vector (chroma)" if self.use_vector_search else "text fallback"
         }
 
@@ -486,7 +544,7 @@ def main():
         print(f"Answer:\n{result['answer']}")
         print("Sources:")
         for src in result.get("sources", []):
-            print(f" - {src['title']} ({src['relevance']:.2f})")
+            print(f" - {src.title} ({src.relevance:.2f})")
 
 
 if __name__ == "__main__":
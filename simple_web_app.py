@@ -4,6 +4,7 @@ from flask import Flask, render_template, request, jsonify
 import os
 from datetime import datetime
 from simple_rag import SimpleRAGSystem
+from index_registry import VECTORDB_PATH
 
 
 app = Flask(__name__)
@@ -17,7 +18,16 @@ def initialize_rag():
     global rag_processor
     try:
         json_path = "/Users/user/Documents/runbook-bot/devops_runbooks.json"
-        rag_processor = SimpleRAGSystem(json_path)
+        data_paths = {}
+        bundle = os.environ.get('RUNBOOK_INDEX_BUNDLE')
+        if bundle:
+            # Serve a prebuilt index instead of whatever is on local disk
+            from index_bundle import install_bundle, bundled_data_paths
+            store_path, arena_path = bundled_data_paths(VECTORDB_PATH, install_bundle(bundle, VECTORDB_PATH))
+            if store_path:
+                # Runbook sources come from the bundle too, so the JSON export is not needed
+                data_paths = {'store_path': store_path, 'arena_path': arena_path}
+        rag_processor = SimpleRAGSystem(json_path, **data_paths)
         return True
     except Exception as e:
         print(f"❌ Error initializing RAG processor: {e}")
@@ -57,7 +67,7 @@ def query():
         return jsonify({'error': 'Please provide a query'}), 400
     
     # Process the query
-    result = rag_processor.process_query(user_query, create_if_missing=create_runbook)
+    result = rag_processor.process_query(user_query, create_if_missing=create_runbook, section=data.get('section'))
     
     # Ensure all expected fields are present
     response_data = {
@@ -68,7 +78,7 @@ def query():
         "runbook_created": result.get("runbook_created", False),
         "suggest_creation": result.get("suggest_creation", False),
         "can_create_runbook": result.get("can_create_runbook", False),
-        "sources": result.get("sources", []),
+        "sources": [source.to_dict() for source in result.get("sources", [])],
         "processing_time": result.get("processing_time", 0),
         "issue_analysis": result.get("issue_analysis"),
         "analysis_success": result.get("analysis_success", False)
@@ -85,6 +95,10 @@ def stats():
         return jsonify({'error': 'RAG system not initialized'}), 500
     
     stats = rag_processor.get_stats()
+    # ?manifest=full adds per-runbook hashes, versions and chunk/token counts
+    stats['index_manifest'] = rag_processor.get_index_manifest(
+        include_runbooks=request.args.get('manifest') == 'full'
+    )
     return jsonify(stats)
 
 @app.route('/health')
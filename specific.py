@@ -1,114 +1,614 @@
-import requests
+import os
+import time
 import json
-from datetime import datetime
-from requests.auth import HTTPBasicAuth
-from config import CONFLUENCE_BASE_URL, EMAIL, API_TOKEN
+import random
+import threading
+import argparse
+import requests
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+from config import CONFLUENCE_BASE_URL
+from confluence_cache import OfflineCacheMiss
+from confluence_client import ConfluenceClient
+from runbook_store import RunbookStore
+from atomic_io import atomic_write, file_lock, write_json
+from runbook_changes import content_hash, empty_changeset, has_changes, record_changeset
 
 PARENT_PAGE_ID = "2678227022"
-OUTPUT_FILE = "devops_runbooks.json"
+# One JSON record per line: a header naming the crawl, then one record per completed wave
+CHECKPOINT_FILE = "fetch_checkpoint.jsonl"
+CHECKPOINT_MAX_AGE_SECS = 24 * 3600
+LAST_SYNC_FILE = "last_sync.json"
+# CQL lastmodified has minute resolution; the overlap absorbs that and clock skew, not timezones
+SYNC_OVERLAP = timedelta(minutes=10)
+# CQL dates are read in the API user's profile timezone; when it is unknown the search starts at
+# the checkpoint as seen from UTC-12, which is at or before it in every timezone
+FALLBACK_UTC_OFFSET = timedelta(hours=-12)
+
+PAGE_LIMIT = 50
+MAX_WORKERS = 8
+MAX_RETRIES = 5
+# Deepest page level the descendant crawl lists; far below any real tree, it only stops runaway crawls
+MAX_CRAWL_DEPTH = 50
+# Parents listed per checkpointed wave of the descendant crawl
+CRAWL_WAVE_PARENTS = 64
+# Ids per CQL `id in (...)` body request; keeps the query string well under URL limits
+BODY_BATCH_SIZE = 25
+BACKOFF_BASE_SECS = 1.0
+BACKOFF_MAX_SECS = 60.0
+REQUEST_TIMEOUT = 30
+# Syncs and webhooks must see edits made seconds ago, so cached responses are always revalidated
+# (or served as-is in CONFLUENCE_OFFLINE mode) rather than trusted for the endpoint TTL; only
+# responses with an ETag or Last-Modified are cached at all
+CACHE_TTL_SECS = 0
+# Listings skip the body; bodies are fetched per page in parallel
+LIST_EXPAND = "version,metadata.labels,space"
+
+# get_with_retry does its own Retry-After aware retries (with logging and transfer accounting),
+# so the client's adapter-level retries are switched off
+client = ConfluenceClient(pool_size=MAX_WORKERS, max_retries=0, timeout=REQUEST_TIMEOUT)
+
+# Requests and response bytes since the last reset; Content-Length is the on-the-wire (possibly gzipped) size
+transfer_stats = {"requests": 0, "bytes": 0}
+_transfer_lock = threading.Lock()
+
+def reset_transfer_stats():
+    with _transfer_lock:
+        transfer_stats.update(requests=0, bytes=0)
+
+def _count_transfer(response):
+    size = response.headers.get("Content-Length")
+    with _transfer_lock:
+        transfer_stats["requests"] += 1
+        transfer_stats["bytes"] += int(size) if size else len(response.content)
+
+def _retry_delay(response, attempt):
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    # Full backoff with jitter so parallel workers don't retry in lockstep
+    return min(BACKOFF_BASE_SECS * 2 ** attempt, BACKOFF_MAX_SECS) * random.uniform(0.5, 1.0)
+
+def get_with_retry(url, params=None):
+    """GET through the Confluence cache that retries 429/5xx and connection errors, honouring Retry-After"""
+    response, error = None, None
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = client.get(url, params=params, ttl=CACHE_TTL_SECS)
+        except OfflineCacheMiss:
+            raise
+        except requests.RequestException as e:
+            response, error = None, e
+        else:
+            if not response.from_cache:
+                _count_transfer(response)
+            if response.status_code != 429 and response.status_code < 500:
+                return response
+            error = response.status_code
+
+        if attempt == MAX_RETRIES:
+            break
+        delay = _retry_delay(response, attempt)
+        print(f"⏳ {error} from {url}, retrying in {delay:.1f}s ({attempt + 1}/{MAX_RETRIES})")
+        time.sleep(delay)
+
+    if response is None:
+        raise error
+    return response
+
+def build_page_data(page, content, ancestors=None, parent_id=None):
+    """`ancestors` are the {id, title} pages between the crawl root and this page, root excluded"""
+    ancestors = ancestors or []
+    word_count = len(content.split()) if content else 0
+
+    labels = []
+    metadata_labels = page.get("metadata", {}).get("labels", {}).get("results", [])
+    if metadata_labels:
+        labels = [lbl.get("name", "") for lbl in metadata_labels]
+
+    return {
+        "id": page.get("id", ""),
+        "title": page.get("title", ""),
+        "type": page.get("type", ""),
+        "status": page.get("status", ""),
+        "url": f"{CONFLUENCE_BASE_URL}/wiki{page.get('_links', {}).get('webui', '')}",
+        "created": page.get("version", {}).get("when", ""),
+        "author": page.get("version", {}).get("by", {}).get("displayName", ""),
+        "version": page.get("version", {}).get("number"),
+        "labels": labels,
+        "space": page.get("space", {}).get("key", ""),
+        "content": content,
+        "word_count": word_count,
+        "is_runbook": True,
+        "parent_id": parent_id,
+        "ancestor_ids": [a["id"] for a in ancestors],
+        "ancestors": [a["title"] for a in ancestors],
+        "depth": len(ancestors) + 1
+    }
+
+def fetch_listing(parent_id, start):
+    """One page of child listings (no bodies), or None if it could not be fetched"""
+    url = f"/wiki/rest/api/content/{parent_id}/child/page"
+    params = {"limit": PAGE_LIMIT, "start": start, "expand": LIST_EXPAND}
+    try:
+        response = get_with_retry(url, params)
+    except requests.RequestException as e:
+        print(f"❌ Error fetching children at start={start}: {e}")
+        return None
+    if response.status_code != 200:
+        print(f"❌ Error fetching children: {response.status_code} - {response.text}")
+        return None
+    return response.json().get("results", [])
+
+def fetch_page_body(page_id):
+    """Storage-format body of one page, or None if it could not be fetched"""
+    url = f"/wiki/rest/api/content/{page_id}"
+    try:
+        response = get_with_retry(url, {"expand": "body.storage"})
+    except requests.RequestException as e:
+        print(f"❌ Error fetching body of {page_id}: {e}")
+        return None
+    if response.status_code != 200:
+        print(f"❌ Error fetching body of {page_id}: {response.status_code}")
+        return None
+    return response.json().get("body", {}).get("storage", {}).get("value", "")
+
+def fetch_page(page_id, root_id=PARENT_PAGE_ID):
+    """Page data for one page below `root_id`, or None if it was deleted or is not below it.
+
+    Other errors raise, so a webhook refresh is retried instead of silently dropping the edit.
+    """
+    url = f"/wiki/rest/api/content/{page_id}"
+    response = get_with_retry(url, {"expand": f"body.storage,{LIST_EXPAND},ancestors"})
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise RuntimeError(f"Error fetching page {page_id}: {response.status_code}")
+    page = response.json()
+    if page.get("status", "current") != "current" or root_id not in [a.get("id") for a in page.get("ancestors", [])]:
+        return None
+    body = page.get("body", {}).get("storage", {}).get("value", "")
+    return build_page_data(page, body, *ancestry_below(page, root_id))
+
+def fetch_body_batch(page_ids):
+    """Bodies for up to BODY_BATCH_SIZE pages in one CQL search; ids that could not be fetched map to None"""
+    url = "/wiki/rest/api/content/search"
+    params = {"cql": f"id in ({','.join(page_ids)})", "limit": len(page_ids), "expand": "body.storage"}
+    try:
+        response = get_with_retry(url, params)
+    except requests.RequestException as e:
+        print(f"❌ Error fetching {len(page_ids)} bodies: {e}")
+        return {page_id: None for page_id in page_ids}
+    if response.status_code != 200:
+        print(f"❌ Error fetching {len(page_ids)} bodies: {response.status_code}")
+        return {page_id: None for page_id in page_ids}
+    bodies = {page_id: None for page_id in page_ids}
+    for page in response.json().get("results", []):
+        bodies[page.get("id", "")] = page.get("body", {}).get("storage", {}).get("value", "")
+    return bodies
+
+def reuse_known_bodies(pages, known):
+    """(bodies of pages whose version matches `known`, ids of pages whose body must be downloaded)"""
+    if isinstance(known, RunbookStore):
+        # One query for the whole listing instead of one per page
+        known = known.get_many(page.get("id", "") for page in pages)
+    bodies, wanted = {}, []
+    for page in pages:
+        page_id = page.get("id", "")
+        stored = (known or {}).get(page_id)
+        version = page.get("version", {}).get("number")
+        if stored is not None and version is not None and stored.get("version") == version:
+            bodies[page_id] = stored.get("content", "")
+        else:
+            wanted.append(page_id)
+    return bodies, wanted
+
+def download_bodies(page_ids, executor):
+    batches = [page_ids[i:i + BODY_BATCH_SIZE] for i in range(0, len(page_ids), BODY_BATCH_SIZE)]
+    bodies = {}
+    for batch_bodies in executor.map(fetch_body_batch, batches):
+        bodies.update(batch_bodies)
+    return bodies
+
+def fetch_bodies(pages, known, executor):
+    """Bodies of listed pages keyed by id, downloading only pages whose version differs from `known`.
+
+    `known` is a RunbookStore or a dict of id -> stored page data; unchanged pages reuse the stored content.
+    """
+    bodies, wanted = reuse_known_bodies(pages, known)
+    bodies.update(download_bodies(wanted, executor))
+    if pages:
+        print(f"📄 Bodies: {len(wanted)} downloaded, {len(pages) - len(wanted)} unchanged")
+    return bodies
+
+def load_checkpoint(kind, root_id, path=CHECKPOINT_FILE):
+    """Wave records of an interrupted `kind` crawl of `root_id`, oldest first; [] if there is none to resume"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return []
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            # Torn final append from a crash: the waves before it are intact
+            break
+    if not records or records[0].get("kind") != kind or records[0].get("root_id") != root_id:
+        return []
+    if time.time() - records[-1].get("saved_at", 0) > CHECKPOINT_MAX_AGE_SECS:
+        print("⚠️ Fetch checkpoint is stale, starting over")
+        return []
+    if len(records) < len(lines):
+        # Drop the torn line so new waves are not appended after it
+        with atomic_write(path) as f:
+            f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    return records[1:]
+
+def start_checkpoint(kind, root_id, path=CHECKPOINT_FILE):
+    with atomic_write(path) as f:
+        f.write(json.dumps({"kind": kind, "root_id": root_id, "saved_at": time.time()}) + "\n")
+
+def append_checkpoint(record, path=CHECKPOINT_FILE):
+    """Append one wave's results; each wave writes only its own pages, so a crawl's checkpoint IO stays linear"""
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({**record, "saved_at": time.time()}, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
 
-auth = HTTPBasicAuth(EMAIL, API_TOKEN)
-headers = {"Accept": "application/json"}
+def clear_checkpoint(path=CHECKPOINT_FILE):
+    if os.path.exists(path):
+        os.remove(path)
 
-def fetch_child_pages(parent_id):
-    all_pages = []
+def list_all_children(parent_id):
+    """Every child listing of `parent_id`, or None if any listing page failed"""
+    children = []
     start = 0
-    limit = 50
+    while True:
+        results = fetch_listing(parent_id, start)
+        if results is None:
+            return None
+        children.extend(results)
+        if len(results) < PAGE_LIMIT:
+            return children
+        start += PAGE_LIMIT
+
+class CrawlListing(list):
+    """Pages from a descendant crawl; `capped_at` is the depth cap if it cut the tree short, else None"""
+
+    def __init__(self, pages, capped_at=None):
+        super().__init__(pages)
+        self.capped_at = capped_at
+
+def fetch_descendant_pages(root_id, max_depth=MAX_CRAWL_DEPTH, max_workers=MAX_WORKERS, resume=True, known=None,
+                           checkpoint_file=CHECKPOINT_FILE):
+    """All pages below `root_id` down to `max_depth`, crawled level by level with subtrees listed in parallel.
+
+    Each page records its parent and the titles of the pages between it and the root. Pages
+    reachable by more than one path are kept once. The tree is listed without bodies first, and only
+    pages whose version differs from `known` are downloaded. Returns None if any listing or body failed,
+    since a partial tree cannot be told apart from deleted pages. Pages at `max_depth` are not expanded;
+    if any were left, the returned listing's `capped_at` is set and it must not be taken as the whole tree.
+
+    Every wave of listed parents and of downloaded bodies is appended to `checkpoint_file`, so a
+    failed crawl is resumed by the next call instead of listing the whole tree again.
+    """
+    records = load_checkpoint("descendants", root_id, checkpoint_file) if resume else []
+    if not records:
+        start_checkpoint("descendants", root_id, checkpoint_file)
+
+    seen = {root_id}
+    listed = []
+    levels = {0: [(root_id, [])]}
+    listed_parents = set()
+    downloaded = {}
+    for record in records:
+        if "bodies" in record:
+            downloaded.update(record["bodies"])
+            continue
+        listed_parents.update(record["parents"])
+        for page, path, parent_id in record["listed"]:
+            seen.add(page.get("id", ""))
+            listed.append((page, path, parent_id))
+            levels.setdefault(len(path) + 1, []).append((page.get("id", ""), path + [{"id": page.get("id", ""), "title": page.get("title", "")}]))
+    # Resume at the shallowest level that still has parents to list
+    pending = [d for d in sorted(levels) if any(item[0] not in listed_parents for item in levels[d])]
+    depth = pending[0] if pending else max(levels)
+    if records:
+        print(f"↩️ Resuming crawl of {root_id} ({len(listed)} pages listed, {len(downloaded)} bodies downloaded)")
+
+    print(f"🌳 Crawling descendants of {root_id} (max depth {max_depth}, {max_workers} workers)...")
+    capped_at = None
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        level = [item for item in levels[depth] if item[0] not in listed_parents]
+        while True:
+            if depth >= max_depth:
+                if level:
+                    capped_at = max_depth
+                    print(f"⚠️ Depth cap {max_depth} reached; {len(level)} pages at the deepest level were not expanded")
+                break
+            next_level = levels.get(depth + 1, [])
+            for i in range(0, len(level), CRAWL_WAVE_PARENTS):
+                wave = level[i:i + CRAWL_WAVE_PARENTS]
+                done, wave_listed, failed = [], [], False
+                for (parent_id, path), children in zip(wave, executor.map(lambda item: list_all_children(item[0]), wave)):
+                    if children is None:
+                        failed = True
+                        continue
+                    done.append(parent_id)
+                    for page in children:
+                        page_id = page.get("id", "")
+                        if page_id in seen:
+                            continue
+                        seen.add(page_id)
+                        wave_listed.append((page, path, parent_id))
+                        next_level.append((page_id, path + [{"id": page_id, "title": page.get("title", "")}]))
+                listed.extend(wave_listed)
+                append_checkpoint({"parents": done, "listed": wave_listed}, checkpoint_file)
+                if failed:
+                    print(f"⚠️ Listing failed at depth {depth + 1}; rerun to resume from the checkpoint")
+                    return None
+            if not next_level:
+                break
+            print(f"✅ Depth {depth + 1}: {len(next_level)} pages")
+            level = next_level
+            depth += 1
+
+        pages = [page for page, _, _ in listed]
+        bodies, wanted = reuse_known_bodies(pages, known)
+        resumed = [page_id for page_id in wanted if page_id in downloaded]
+        wanted = [page_id for page_id in wanted if page_id not in downloaded]
+        bodies.update((page_id, downloaded[page_id]) for page_id in resumed)
+        wave_size = max_workers * BODY_BATCH_SIZE
+        for i in range(0, len(wanted), wave_size):
+            wave_bodies = download_bodies(wanted[i:i + wave_size], executor)
+            fetched = {page_id: body for page_id, body in wave_bodies.items() if body is not None}
+            bodies.update(fetched)
+            append_checkpoint({"bodies": fetched}, checkpoint_file)
+        print(f"📄 Bodies: {len(wanted)} downloaded, {len(resumed)} from the checkpoint, "
+              f"{len(pages) - len(wanted) - len(resumed)} unchanged")
+    missing = [page.get("id", "") for page in pages if bodies.get(page.get("id", "")) is None]
+    if missing:
+        print(f"⚠️ {len(missing)} bodies could not be fetched; rerun to resume from the checkpoint")
+        return None
 
-    print(f"📂 Fetching child pages of parent ID: {parent_id}...")
+    clear_checkpoint(checkpoint_file)
+    print(f"✅ Fetched {len(listed)} descendant pages")
+    return CrawlListing([build_page_data(page, bodies[page.get("id", "")], path, parent_id)
+                         for page, path, parent_id in listed], capped_at)
 
+def confluence_timezone():
+    """Timezone of the API user's Confluence profile, or None if it cannot be read"""
+    try:
+        response = get_with_retry("/wiki/rest/api/user/current")
+    except requests.RequestException as e:
+        print(f"⚠️ Could not read the Confluence user's timezone: {e}")
+        return None
+    if response.status_code != 200:
+        print(f"⚠️ Could not read the Confluence user's timezone: {response.status_code}")
+        return None
+    name = response.json().get("timeZone")
+    try:
+        return ZoneInfo(name) if name else None
+    except (ZoneInfoNotFoundError, ValueError):
+        print(f"⚠️ Unknown Confluence timezone '{name}'")
+        return None
+
+def cql_datetime(moment, tz):
+    """`moment` as a CQL date literal in `tz`; naive datetimes are taken as local time"""
+    moment = moment.astimezone(timezone.utc)
+    if tz is None:
+        print("⚠️ Confluence user timezone unknown; widening the search window to cover any offset")
+        return (moment + FALLBACK_UTC_OFFSET).strftime("%Y-%m-%d %H:%M")
+    return moment.astimezone(tz).strftime("%Y-%m-%d %H:%M")
+
+def fetch_changed_pages(parent_id, since, max_workers=MAX_WORKERS, known=None):
+    """Descendants of `parent_id` modified at or after `since`, or None if the search did not complete"""
+    tz = confluence_timezone()
+    since_cql = cql_datetime(since, tz)
+    cql = f'ancestor = {parent_id} AND type = page AND lastmodified >= "{since_cql}"'
+    url = "/wiki/rest/api/content/search"
+    print(f"🔎 Searching for pages changed since {since_cql} ({tz.key if tz else 'UTC-12'})...")
+
+    listed = []
+    start = 0
     while True:
-        url = f"{CONFLUENCE_BASE_URL}/wiki/rest/api/content/{parent_id}/child/page"
-        params = {
-            "limit": limit,
-            "start": start,
-            "expand": "body.storage,version,metadata.labels,space"
-        }
-
-        response = requests.get(url, headers=headers, auth=auth, params=params)
+        params = {"cql": cql, "limit": PAGE_LIMIT, "start": start, "expand": f"{LIST_EXPAND},ancestors"}
+        try:
+            response = get_with_retry(url, params)
+        except requests.RequestException as e:
+            print(f"❌ Error searching changed pages: {e}")
+            return None
         if response.status_code != 200:
-            print(f"❌ Error fetching children: {response.status_code} - {response.text}")
+            print(f"❌ Error searching changed pages: {response.status_code} - {response.text}")
+            return None
+        results = response.json().get("results", [])
+        listed.extend(results)
+        if len(results) < PAGE_LIMIT:
             break
+        start += PAGE_LIMIT
 
-        data = response.json()
-        results = data.get("results", [])
-        if not results:
-            break
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # The overlap window re-lists pages already synced; their bodies are not downloaded again
+        bodies = fetch_bodies(listed, known, executor)
+    if any(body is None for body in bodies.values()):
+        return None
 
-        for page in results:
-            content = page.get("body", {}).get("storage", {}).get("value", "")
-            word_count = len(content.split()) if content else 0
-
-            labels = []
-            metadata_labels = page.get("metadata", {}).get("labels", {}).get("results", [])
-            if metadata_labels:
-                labels = [lbl.get("name", "") for lbl in metadata_labels]
-
-            page_data = {
-                "id": page.get("id", ""),
-                "title": page.get("title", ""),
-                "type": page.get("type", ""),
-                "status": page.get("status", ""),
-                "url": f"{CONFLUENCE_BASE_URL}/wiki{page.get('_links', {}).get('webui', '')}",
-                "created": page.get("version", {}).get("when", ""),
-                "author": page.get("version", {}).get("by", {}).get("displayName", ""),
-                "labels": labels,
-                "space": page.get("space", {}).get("key", ""),
-                "content": content,
-                "word_count": word_count,
-                "is_runbook": True
-            }
-
-            all_pages.append(page_data)
-
-        print(f"✅ Fetched {len(results)} child pages (start={start})")
-
-        if len(results) < limit:
-            break
+    print(f"✅ Fetched {len(listed)} changed pages")
+    return [build_page_data(page, bodies[page.get("id", "")], *ancestry_below(page, parent_id)) for page in listed]
 
-        start += limit
+def ancestry_below(page, root_id):
+    """(ancestors between root_id and the page, parent id) from an expand=ancestors result"""
+    chain = [{"id": a.get("id", ""), "title": a.get("title", "")} for a in page.get("ancestors", [])]
+    ids = [a["id"] for a in chain]
+    below = chain[ids.index(root_id) + 1:] if root_id in ids else chain
+    return below, (chain[-1]["id"] if chain else None)
 
-    return all_pages
+def load_last_sync():
+    """Start time of the last committed sync in UTC, or None before the first one"""
+    try:
+        with open(LAST_SYNC_FILE, 'r') as f:
+            last_synced_at = json.load(f).get("last_synced_at")
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if not last_synced_at:
+        return None
+    synced_at = datetime.fromisoformat(last_synced_at.replace("Z", "+00:00"))
+    # Checkpoints written before they carried an offset are local time
+    return synced_at.astimezone(timezone.utc)
+
+def save_last_sync(synced_at, transfer=None):
+    write_json(LAST_SYNC_FILE, {"last_synced_at": synced_at.isoformat(), "transfer": transfer or {}})
 
-def load_existing_data():
+def sync_runbooks(incremental=True, max_depth=MAX_CRAWL_DEPTH):
+    """Fetch new and changed pages into the runbook store; returns False if nothing was committed.
+
+    Incremental syncs only search pages modified since the checkpoint in LAST_SYNC_FILE. The
+    checkpoint is taken before fetching and written only after the store is updated, so a
+    failed or interrupted sync repeats the same window next time.
+    """
+    sync_started = datetime.now(timezone.utc)
+    since = load_last_sync() if incremental else None
+    store = RunbookStore()
+    if since is not None and not store.is_complete():
+        # The checkpoint belongs to another store (or a partial one); changes alone cannot fill it
+        print(f"⚠️ {store.path} does not hold every runbook yet; crawling the whole tree")
+        since = None
+    reset_transfer_stats()
     try:
-        with open(OUTPUT_FILE, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {
-            "metadata": {},
-            "runbooks": []
-        }
+        if since is None:
+            pages = fetch_descendant_pages(PARENT_PAGE_ID, max_depth=max_depth, known=store)
+        else:
+            pages = fetch_changed_pages(PARENT_PAGE_ID, since - SYNC_OVERLAP, known=store)
+        transfer = dict(transfer_stats)
+        print(f"📶 Transferred {transfer['bytes'] / 1024:.1f} KB in {transfer['requests']} requests")
+        if pages is None:
+            print("⚠️ Sync failed; checkpoint not advanced")
+            return False
 
-def save_combined_data(existing_data, new_pages):
-    existing_ids = {rb['id'] for rb in existing_data['runbooks']}
-    new_unique_pages = [p for p in new_pages if p['id'] not in existing_ids]
+        # Only a complete crawl can tell that a stored page was deleted
+        save_combined_data(store, pages, full_listing=since is None, capped_at=pages.capped_at if since is None else None)
+    finally:
+        store.close()
+    save_last_sync(sync_started, transfer)
+    print(f"🕒 Sync checkpoint advanced to {sync_started.isoformat()}")
+    return True
 
-    if not new_unique_pages:
-        print("✅ No new runbooks to add.")
-        return
+def refresh_pages(store, page_ids, max_workers=MAX_WORKERS):
+    """Fetch just `page_ids` and merge them into the store; returns the changeset.
 
-    existing_data['runbooks'].extend(new_unique_pages)
-    existing_data['metadata'] = {
-        "last_fetched": datetime.now().isoformat(),
-        "total_runbooks": len(existing_data['runbooks']),
-        "source": f"{CONFLUENCE_BASE_URL}/wiki/spaces/DEVOPS/pages/{PARENT_PAGE_ID}/DevOps+RunBooks"
-    }
+    Used by the webhook worker instead of a crawl. Pages that are gone, or have moved out of
+    the runbooks tree, are removed from the store.
+    """
+    page_ids = list(dict.fromkeys(str(page_id) for page_id in page_ids))
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(page_ids) or 1)) as executor:
+        fetched = list(executor.map(fetch_page, page_ids))
+    pages = [page for page in fetched if page is not None]
+    gone = [page_id for page_id, page in zip(page_ids, fetched) if page is None]
+    print(f"✅ Fetched {len(pages)} of {len(page_ids)} webhook page(s)")
+    return save_combined_data(store, pages, removed=gone)
+
+def page_changed(old, new):
+    # Confluence bumps version.number on every edit; older exports have no version, so fall back to a hash
+    if old.get("ancestor_ids", []) != new.get("ancestor_ids", []):
+        # Moved within the tree
+        return True
+    old_version, new_version = old.get("version"), new.get("version")
+    if isinstance(old_version, dict):
+        old_version = old_version.get("number")
+    if old_version is not None and new_version is not None:
+        return old_version != new_version
+    return content_hash(old) != content_hash(new)
+
+def save_combined_data(store, new_pages, full_listing=False, removed=(), capped_at=None):
+    """Merge fetched pages into the runbook store and return the changeset.
 
-    with open(OUTPUT_FILE, 'w') as f:
-        json.dump(existing_data, f, indent=2, ensure_ascii=False)
+    Only new and changed pages are written, in one transaction. With `full_listing` (a
+    complete crawl), stored pages missing from `new_pages` are removed; otherwise only the
+    stored pages in `removed` are. A crawl the depth cap cut short passes `capped_at`: only
+    missing pages at or above that depth are removed, and the store is not marked complete. The changeset is
+    also recorded as pending for the incremental indexer. Writers (syncs and webhook handlers)
+    take the store's lock so each one compares against what the previous one saved.
+    """
+    with file_lock(store.path):
+        return _merge_into_store(store, new_pages, full_listing, removed, capped_at)
 
-    print(f"📁 Appended {len(new_unique_pages)} new runbooks to {OUTPUT_FILE}")
+def _merge_into_store(store, new_pages, full_listing, removed=(), capped_at=None):
+    if not full_listing and not store.is_complete():
+        # Readers and full re-indexes would take a store of just these pages for the whole tree
+        raise RuntimeError(f"{store.path} does not hold every runbook yet; run `python specific.py --full` "
+                           f"or `python runbook_store.py import devops_runbooks.json` first")
+    stored = store.get_many(page['id'] for page in new_pages)
+    changeset = empty_changeset()
+
+    for page in new_pages:
+        old = stored.get(page['id'])
+        if old is None:
+            changeset['added'].append(page['id'])
+        elif page_changed(old, page):
+            changeset['updated'].append(page['id'])
+        else:
+            continue
+        changeset['pages'][page['id']] = page
+
+    if full_listing:
+        listed = {p['id'] for p in new_pages}
+        changeset['removed'] = [page_id for page_id in store.ids() if page_id not in listed]
+        if capped_at is not None:
+            # Pages below the cap were never listed, so their absence says nothing; pages without a depth are kept too
+            unlisted = store.get_many(changeset['removed'], content=None)
+            changeset['removed'] = [page_id for page_id in changeset['removed']
+                                    if unlisted[page_id].get('depth', capped_at + 1) <= capped_at]
+    else:
+        changeset['removed'] = [page_id for page_id in removed if page_id in store]
+
+    complete = full_listing and capped_at is None
+    if not has_changes(changeset):
+        if complete and not store.is_complete():
+            store.apply(metadata={"complete": True})
+        print("✅ No runbook changes.")
+        return changeset
+
+    # Recorded before the store is written: a crash in between re-indexes a page, never skips one
+    record_changeset(changeset)
+
+    upserts = [changeset['pages'][page_id] for page_id in changeset['added'] + changeset['updated']]
+    store.apply(upserts, changeset['removed'], metadata={
+        "last_fetched": datetime.now().isoformat(),
+        "total_runbooks": len(store) + len(changeset['added']) - len(changeset['removed']),
+        "source": f"{CONFLUENCE_BASE_URL}/wiki/spaces/DEVOPS/pages/{PARENT_PAGE_ID}/DevOps+RunBooks",
+        **({"complete": True} if complete else {})
+    })
+
+    print(f"📁 Saved {store.path}: {len(changeset['added'])} added, {len(changeset['updated'])} updated, "
+          f"{len(changeset['removed'])} removed")
 
     print("\n📋 Summary:")
-    for rb in new_unique_pages:
-        print(f"  • {rb['title']} ({rb['word_count']} words)")
+    for kind, marker in (('added', '+'), ('updated', '~')):
+        for page_id in changeset[kind]:
+            rb = changeset['pages'][page_id]
+            print(f"  {marker} {rb['title']} ({rb['word_count']} words)")
+    for page_id in changeset['removed']:
+        print(f"  - {page_id}")
+    return changeset
 
 def main():
+    parser = argparse.ArgumentParser(description="Fetch DevOps runbooks from Confluence")
+    parser.add_argument("--full", action="store_true", help="Crawl the whole page tree instead of only changes since the last sync")
+    parser.add_argument("--max-depth", type=int, default=MAX_CRAWL_DEPTH, help="Deepest page level a full crawl lists")
+    args = parser.parse_args()
+
     print("🚀 STARTING RUNBOOK FETCH FROM PARENT PAGE")
-    pages = fetch_child_pages(PARENT_PAGE_ID)
-    existing = load_existing_data()
-    save_combined_data(existing, pages)
+    sync_runbooks(incremental=not args.full, max_depth=args.max_depth)
 
 if __name__ == "__main__":
     main()
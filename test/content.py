@@ -2,8 +2,8 @@ import requests
 import json
 import os
 from datetime import datetime
-from requests.auth import HTTPBasicAuth
-from config import CONFLUENCE_BASE_URL, EMAIL, API_TOKEN, SPACE_KEY
+from config import CONFLUENCE_BASE_URL, SPACE_KEY
+from confluence_client import ConfluenceClient
 
 FILENAME = "runbooks_data.json"
 
@@ -39,12 +39,8 @@ def save_runbooks(runbooks):
         print(f"❌ Error saving runbooks: {e}")
 
 def fetch_all_pages(space_key):
-    base_url = f"{CONFLUENCE_BASE_URL}/wiki/rest/api/search"
-    headers = {"Accept": "application/json"}
-    auth = HTTPBasicAuth(EMAIL, API_TOKEN)
+    client = ConfluenceClient()
 
-    limit = 50
-    start = 0
     all_pages = []
     fetched_ids = set()
 
@@ -52,56 +48,30 @@ def fetch_all_pages(space_key):
 
     print(f"🔍 Fetching pages from space '{space_key}' with CQL: {cql_query}")
 
-    while True:
-        params = {
-            "cql": cql_query,
-            "limit": limit,
-            "start": start,
-            "expand": "body.storage,version,metadata.labels,space,ancestors"
-        }
-
-        print(f"⏳ Fetching pages... start={start}")
-        response = requests.get(base_url, headers=headers, params=params, auth=auth)
-        print(f"📡 Response status: {response.status_code}")
-
-        if response.status_code != 200:
-            print(f"❌ Failed to fetch pages: {response.status_code} {response.text}")
-            break
-
-        try:
-            data = response.json()
-        except Exception as e:
-            print(f"❌ JSON decode error: {e}")
-            print(f"Response text: {response.text}")
-            break
-
-        results = data.get("results", [])
-        if not results:
-            print("✅ No more pages to fetch, stopping.")
-            break
-
-        # Filter out any duplicate IDs in this batch
-        new_results = []
-        for page in results:
-            page_id = page.get("id")
-            if page_id not in fetched_ids:
-                fetched_ids.add(page_id)
-                new_results.append(page)
-            else:
-                print(f"⚠️ Duplicate page id {page_id} ignored in fetch")
-
-        if not new_results:
-            print("✅ No new unique pages found in this batch, stopping.")
-            break
-
-        all_pages.extend(new_results)
-        print(f"✅ Fetched {len(new_results)} new unique pages (total so far: {len(all_pages)})")
-
-        # Stop if fetched less than limit (means last page)
-        if len(results) < limit:
-            break
-
-        start += limit
+    params = {
+        "cql": cql_query,
+        "expand": "body.storage,version,metadata.labels,space,ancestors"
+    }
+    try:
+        for results in client.paginate_batches("/wiki/rest/api/search", params):
+            # Filter out any duplicate IDs in this batch
+            new_results = []
+            for page in results:
+                page_id = page.get("id")
+                if page_id not in fetched_ids:
+                    fetched_ids.add(page_id)
+                    new_results.append(page)
+                else:
+                    print(f"⚠️ Duplicate page id {page_id} ignored in fetch")
+
+            if not new_results:
+                print("✅ No new unique pages found in this batch, stopping.")
+                break
+
+            all_pages.extend(new_results)
+            print(f"✅ Fetched {len(new_results)} new unique pages (total so far: {len(all_pages)})")
+    except (requests.RequestException, ValueError) as e:
+        print(f"❌ Failed to fetch pages: {e}")
 
     print(f"🎯 Total unique pages fetched: {len(all_pages)}")
     return all_pages
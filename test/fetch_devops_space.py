@@ -1,10 +1,9 @@
 #!/usr/bin/env python3
 
-import requests
 import json
 from datetime import datetime
-from requests.auth import HTTPBasicAuth
-from config import CONFLUENCE_BASE_URL, EMAIL, API_TOKEN
+from config import CONFLUENCE_BASE_URL
+from confluence_client import ConfluenceClient
 
 def fetch_devops_space_pages():
     """Directly fetch pages from the DEVOPS space"""
@@ -12,7 +11,7 @@ def fetch_devops_space_pages():
     print("🔍 FETCHING DEVOPS SPACE PAGES DIRECTLY")
     print("=" * 50)
     
-    auth = HTTPBasicAuth(EMAIL, API_TOKEN)
+    client = ConfluenceClient()
     headers = {"Accept": "application/json"}
     
     # Try different approaches to get space content
@@ -24,7 +23,7 @@ def fetch_devops_space_pages():
     space_url = f"{CONFLUENCE_BASE_URL}/wiki/rest/api/space/{space_key}"
     
     try:
-        response = requests.get(space_url, auth=auth, headers=headers)
+        response = client.get(space_url, headers=headers)
         print(f"   Space info: {response.status_code}")
         if response.status_code == 200:
             space_data = response.json()
@@ -56,7 +55,7 @@ def fetch_devops_space_pages():
         }
         
         try:
-            response = requests.get(url, auth=auth, headers=headers, params=params)
+            response = client.get(url, headers=headers, params=params)
             print(f"      Status: {response.status_code}")
             
             if response.status_code == 200:
@@ -126,7 +125,7 @@ def fetch_devops_space_pages():
         }
         
         try:
-            response = requests.get(search_url, auth=auth, headers=headers, params=params)
+            response = client.get(search_url, headers=headers, params=params)
             if response.status_code == 200:
                 data = response.json()
                 results = data.get("results", [])
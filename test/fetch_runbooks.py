@@ -1,57 +1,26 @@
 import requests
 import json
 from datetime import datetime
-from requests.auth import HTTPBasicAuth
-from config import CONFLUENCE_BASE_URL, EMAIL, API_TOKEN, SPACE_KEY
+from config import CONFLUENCE_BASE_URL, SPACE_KEY
+from confluence_client import ConfluenceClient
 
 def fetch_all_pages_in_space(space_key):
-    base_url = f"{CONFLUENCE_BASE_URL}/rest/api/content/search"
-    headers = {"Accept": "application/json"}
-    auth = HTTPBasicAuth(EMAIL, API_TOKEN)
-
-    limit = 50
-    start = 0
+    client = ConfluenceClient()
     all_results = []
 
     cql_query = f"space = {space_key} AND type = page"
 
     print(f"Requesting all pages in space '{space_key}' with CQL: {cql_query}")
 
-    while True:
-        params = {
-            "cql": cql_query,
-            "limit": limit,
-            "start": start,
-            "expand": "body.storage,version,metadata.labels,space,ancestors"
-        }
-
-        print(f"\n🔄 Fetching pages... start={start}")
-        response = requests.get(base_url, headers=headers, params=params, auth=auth)
-
-        print(f"Response Status: {response.status_code}")
-        if response.status_code != 200:
-            print(f"❌ Failed to fetch content: {response.status_code} - {response.text}")
-            break
-
-        try:
-            data = response.json()
-        except requests.exceptions.JSONDecodeError as e:
-            print(f"❌ Failed to parse JSON response: {e}")
-            print(f"Raw response content: {response.text}")
-            break
-
-        results = data.get("results", [])
-        if not results:
-            print("✅ No more results, finished pagination.")
-            break
-
-        all_results.extend(results)
-        print(f"✅ Fetched {len(results)} pages (Total so far: {len(all_results)})")
-
-        if len(results) < 14390:
-            break  # No more pages
-
-        start += limit
+    try:
+        for results in client.paginate_batches(
+            "/wiki/rest/api/content/search",
+            {"cql": cql_query, "expand": "body.storage,version,metadata.labels,space,ancestors"}
+        ):
+            all_results.extend(results)
+            print(f"✅ Fetched {len(results)} pages (Total so far: {len(all_results)})")
+    except (requests.RequestException, ValueError) as e:
+        print(f"❌ Failed to fetch content: {e}")
 
     print(f"\n🎯 Total pages fetched in space '{space_key}': {len(all_results)}")
     return all_results
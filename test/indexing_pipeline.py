@@ -9,6 +9,10 @@ import chromadb
 from sentence_transformers import SentenceTransformer
 import numpy as np
 from pathlib import Path
+import index_manifest
+from embedding_cache import model_revision
+from index_registry import VECTORDB_PATH, versioned_collection_name, activate_collection, prune_collections, index_write_lock
+from indexing_pipeline_efficient import EfficientRunbookIndexer, validate_collection
 
 class RunbookIndexer:
     def __init__(self, embedding_model_name: str = "all-MiniLM-L6-v2"):
@@ -18,24 +22,31 @@ class RunbookIndexer:
         
         # Initialize embedding model
         print(f"📊 Loading embedding model: {embedding_model_name}")
+        self.embedding_model_name = embedding_model_name
         self.embedding_model = SentenceTransformer(embedding_model_name)
         
         # Initialize ChromaDB
         print("💾 Setting up ChromaDB...")
-        self.chroma_client = chromadb.PersistentClient(path="./runbook_vectordb")
-        
-        # Create or get collection
-        self.collection_name = "runbook_chunks"
-        try:
-            self.collection = self.chroma_client.create_collection(
-                name=self.collection_name,
-                metadata={"description": "Meesho runbook chunks for RAG"}
-            )
-            print(f"✅ Created new collection: {self.collection_name}")
-        except:
-            self.collection = self.chroma_client.get_collection(name=self.collection_name)
-            print(f"✅ Using existing collection: {self.collection_name}")
+        self.chroma_client = chromadb.PersistentClient(path=VECTORDB_PATH)
+        
+        # Build into a fresh versioned collection; the serving index is only switched once it is complete
+        self.collection_name = versioned_collection_name()
+        self.collection = self.chroma_client.create_collection(
+            name=self.collection_name,
+            metadata={"description": "Meesho runbook chunks for RAG"}
+        )
+        print(f"✅ Created new collection: {self.collection_name}")
     
+    def index_settings(self) -> Dict[str, Any]:
+        # Word-based chunks, unlike indexing_pipeline_efficient.py, so its --changes asks for a full index first
+        return {
+            'model_name': self.embedding_model_name,
+            'model_revision': model_revision(self.embedding_model),
+            'chunker': 'test/indexing_pipeline.py',
+            'chunk_size': 400,
+            'overlap': 50
+        }
+
     def clean_text(self, text: str) -> str:
         """Clean and normalize text content"""
         if not text:
@@ -135,8 +146,10 @@ class RunbookIndexer:
         print(f"📚 Found {len(runbooks)} runbooks to process")
         
         # Process all runbooks into chunks
+        started = datetime.now()
         all_chunks = []
         runbook_stats = {}
+        entries = {}
         
         for i, runbook in enumerate(runbooks, 1):
             title = runbook.get('title', f'Runbook {i}')
@@ -149,6 +162,17 @@ class RunbookIndexer:
                 'chunks_created': len(chunks),
                 'total_words': sum(chunk['metadata']['word_count'] for chunk in chunks)
             }
+            # Same entry shape as the efficient indexer's manifest, so /stats and pruning treat both builds alike
+            version, content_hash = EfficientRunbookIndexer.runbook_fingerprint(runbook)
+            entries[str(runbook.get('id', f'unknown_{i}'))] = {
+                'title': title,
+                'version': version,
+                'content_hash': content_hash,
+                'chunk_count': len(chunks),
+                'word_count': runbook_stats[title]['total_words'],
+                'indexed_at': datetime.now().isoformat(),
+                'chunk_ids': [chunk['id'] for chunk in chunks]
+            }
         
         print(f"\n📊 Processing Summary:")
         print(f"   Total runbooks: {len(runbooks)}")
@@ -170,13 +194,6 @@ class RunbookIndexer:
         
         print(f"💾 Storing {len(all_chunks)} chunks in vector database...")
         
-        # Clear existing data in collection
-        try:
-            self.collection.delete()
-            print("🗑️  Cleared existing data")
-        except:
-            pass
-        
         # Add new data in batches (ChromaDB has limits)
         batch_size = 1000
         for i in range(0, len(ids), batch_size):
@@ -196,29 +213,42 @@ class RunbookIndexer:
             
             print(f"   📦 Stored batch {i//batch_size + 1}: {len(batch_ids)} chunks")
         
-        # Save indexing metadata
-        index_metadata = {
-            'indexed_at': datetime.now().isoformat(),
-            'total_runbooks': len(runbooks),
-            'total_chunks': len(all_chunks),
-            'embedding_model': self.embedding_model.get_sentence_embedding_dimension(),
-            'model_name': "all-MiniLM-L6-v2",
-            'runbook_stats': runbook_stats
-        }
-        
-        with open('indexing_metadata.json', 'w', encoding='utf-8') as f:
-            json.dump(index_metadata, f, indent=2, ensure_ascii=False)
+        # Same checks as blue/green builds before the apps are pointed at the new collection
+        problems = validate_collection(self.collection, self.embedding_model, len(all_chunks))
+        if problems:
+            print("❌ Validation failed, keeping current index active:")
+            for problem in problems:
+                print(f"   • {problem}")
+            self.chroma_client.delete_collection(self.collection_name)
+            return False
+        
+        # Saved before the flip, so the apps never serve a collection without a manifest
+        index_manifest.save_manifest(self.collection_name, entries, {
+            'started_at': started.isoformat(),
+            'source': str(json_file_path),
+            'model_name': self.embedding_model_name,
+            'model_revision': self.index_settings()['model_revision'],
+            'chunks_upserted': len(all_chunks),
+            'wall_secs': round((datetime.now() - started).total_seconds(), 3)
+        }, self.index_settings())
+        
+        # Atomically point the apps at the new collection; the previous one stays for rollback
+        with index_write_lock():
+            activate_collection(self.collection_name, details={'chunks': len(all_chunks), 'runbooks': len(runbooks)})
+            for dropped in prune_collections(self.chroma_client):
+                index_manifest.remove_manifest(dropped)
         
         print(f"\n✅ INDEXING COMPLETE!")
         print(f"   📊 Indexed {len(runbooks)} runbooks into {len(all_chunks)} chunks")
         print(f"   💾 Vector database ready for queries")
-        print(f"   📋 Metadata saved to indexing_metadata.json")
+        print(f"   📋 Manifest saved under {index_manifest.manifest_dir()}, summary in {index_manifest.SUMMARY_FILE}")
         
         # Show top runbooks by chunk count
         print(f"\n📈 Top runbooks by content (chunks):")
         sorted_stats = sorted(runbook_stats.items(), key=lambda x: x[1]['chunks_created'], reverse=True)
         for title, stats in sorted_stats[:10]:
             print(f"   • {title}: {stats['chunks_created']} chunks ({stats['total_words']} words)")
+        return True
     
     def query_test(self, query: str, top_k: int = 3):
         """Test query to verify the indexing worked"""
@@ -261,7 +291,8 @@ def main():
     
     # Initialize indexer and process runbooks
     indexer = RunbookIndexer()
-    indexer.index_runbooks(str(latest_file))
+    if not indexer.index_runbooks(str(latest_file)):
+        return
     
     # Test with a sample query
     indexer.query_test("How to deploy jenkins pipeline?")
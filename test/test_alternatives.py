@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 
 import requests
-from requests.auth import HTTPBasicAuth
-from config import CONFLUENCE_BASE_URL, EMAIL, API_TOKEN
+from config import CONFLUENCE_BASE_URL
+from confluence_client import ConfluenceClient
 
 def test_alternatives():
     """Test alternative approaches for Confluence authentication"""
@@ -10,7 +10,7 @@ def test_alternatives():
     print("🔄 TESTING ALTERNATIVE APPROACHES")
     print("=" * 50)
     
-    auth = HTTPBasicAuth(EMAIL, API_TOKEN)
+    client = ConfluenceClient()
     
     # Test 1: Different base URL structures
     print("1. Testing different base URL structures...")
@@ -24,7 +24,7 @@ def test_alternatives():
     for base_url in base_urls:
         test_url = f"{base_url}/rest/api/space"
         try:
-            response = requests.get(test_url, auth=auth, timeout=5)
+            response = client.get(test_url, timeout=5)
             status_emoji = "✅" if response.status_code == 200 else "❌"
             print(f"   {base_url}: {response.status_code} {status_emoji}")
             if response.status_code == 200:
@@ -46,7 +46,7 @@ def test_alternatives():
     for api_path in api_paths:
         test_url = f"{CONFLUENCE_BASE_URL}{api_path}"
         try:
-            response = requests.get(test_url, auth=auth, timeout=5)
+            response = client.get(test_url, timeout=5)
             status_emoji = "✅" if response.status_code == 200 else "❌"
             print(f"   {api_path}: {response.status_code} {status_emoji}")
         except requests.exceptions.RequestException as e:
@@ -64,7 +64,7 @@ def test_alternatives():
     test_url = f"{CONFLUENCE_BASE_URL}/wiki/rest/api/space"
     for i, headers in enumerate(headers_variations, 1):
         try:
-            response = requests.get(test_url, auth=auth, headers=headers, timeout=5)
+            response = client.get(test_url, headers=headers, timeout=5)
             status_emoji = "✅" if response.status_code == 200 else "❌"
             print(f"   Headers set {i}: {response.status_code} {status_emoji}")
             if response.status_code == 200:
@@ -82,7 +82,7 @@ def test_alternatives():
     for endpoint in server_endpoints:
         test_url = f"{CONFLUENCE_BASE_URL}{endpoint}"
         try:
-            response = requests.get(test_url, auth=auth, timeout=5)
+            response = client.get(test_url, timeout=5)
             print(f"   Server endpoint {endpoint}: {response.status_code}")
             if response.status_code == 200:
                 print("   💡 This might be Confluence Server, not Cloud!")
@@ -100,7 +100,7 @@ def test_alternatives():
     
     for url in direct_urls:
         try:
-            response = requests.get(url, auth=auth, timeout=5)
+            response = client.get(url, timeout=5)
             print(f"   Direct access {url.split('/')[-1]}: {response.status_code}")
             if response.status_code == 200:
                 print(f"   🎉 Can access space directly!")
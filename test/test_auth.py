@@ -1,8 +1,7 @@
 #!/usr/bin/env python3
 
-import requests
-from requests.auth import HTTPBasicAuth
 from config import CONFLUENCE_BASE_URL, EMAIL, API_TOKEN
+from confluence_client import ConfluenceClient
 
 def test_authentication():
     """Test if authentication credentials work"""
@@ -11,14 +10,15 @@ def test_authentication():
     url = f"{CONFLUENCE_BASE_URL}/wiki/rest/api/user/current"
     headers = {"Accept": "application/json"}
     
-    auth = HTTPBasicAuth(EMAIL, API_TOKEN)
+    # A cached /user/current would keep reporting success for an hour after the token stops working
+    client = ConfluenceClient(use_cache=False)
     
     print(f"Testing authentication with:")
     print(f"URL: {url}")
     print(f"Email: {EMAIL}")
     print(f"Token: {API_TOKEN[:10]}...{API_TOKEN[-10:]}")
     
-    response = requests.get(url, headers=headers, auth=auth)
+    response = client.get(url, headers=headers)
     
     print(f"\nResponse Status: {response.status_code}")
     print(f"Response Headers: {dict(response.headers)}")
@@ -36,12 +36,12 @@ def test_authentication():
         
         # Test 1: Different API version
         alt_url1 = f"{CONFLUENCE_BASE_URL}/wiki/rest/api/user"
-        response1 = requests.get(alt_url1, headers=headers, auth=auth)
+        response1 = client.get(alt_url1, headers=headers)
         print(f"Alt URL 1 ({alt_url1}): {response1.status_code}")
         
         # Test 2: Space endpoint
         alt_url2 = f"{CONFLUENCE_BASE_URL}/wiki/rest/api/space"
-        response2 = requests.get(alt_url2, headers=headers, auth=auth)  
+        response2 = client.get(alt_url2, headers=headers)  
         print(f"Alt URL 2 ({alt_url2}): {response2.status_code}")
 
 if __name__ == "__main__":
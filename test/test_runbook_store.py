@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""RunbookStore behaviour across processes sharing one store file.
+
+Usage (from the repo root):
+    python test/test_runbook_store.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from page_codec import ZSTD_AVAILABLE
+from runbook_store import RunbookStore, page_body
+
+
+def sample_page(i):
+    # Repeated macro and table markup, as in real storage HTML, so a dictionary can be trained
+    rows = ''.join(f"<tr><td>step {j}</td><td>kubectl rollout restart deploy/service-{i}-{j}</td></tr>" for j in range(i % 7 + 3))
+    body = (f'<ac:structured-macro ac:name="info"><ac:rich-text-body><p>Runbook {i} for service-{i}</p>'
+            f'</ac:rich-text-body></ac:structured-macro><table><tbody>{rows}</tbody></table>'
+            f'<p>Escalate to the on-call for team {i % 13} if the alert fires again within {i % 50} minutes.</p>')
+    return {'id': str(i), 'title': f"Runbook {i}", 'url': f"https://wiki.example/{i}", 'version': 1,
+            'content': {'body': body}}
+
+
+@unittest.skipUnless(ZSTD_AVAILABLE, "zstandard is not installed")
+class DictionaryReloadTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix="runbook_store_")
+        self.path = os.path.join(self.workdir, "runbooks.sqlite3")
+        self.pages = [sample_page(i) for i in range(300)]
+        writer = RunbookStore(self.path)
+        writer.apply(self.pages, metadata={'complete': True})
+        writer.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def test_reader_opened_before_training_reads_recompressed_pages(self):
+        # A long-lived reader, like the web app, opened before the dictionary exists
+        reader = RunbookStore(self.path, readonly=True)
+        trainer = RunbookStore(self.path)
+        try:
+            dict_id = trainer.train_dictionary()
+            self.assertEqual(trainer.storage_stats()['codecs'], {f'zstd:{dict_id}': len(self.pages)})
+
+            self.assertEqual(reader.raw_html('42'), page_body(self.pages[42]))
+            bodies = {page['id']: page_body(page) for page in reader.iter_runbooks()}
+            self.assertEqual(bodies, {page['id']: page_body(page) for page in self.pages})
+        finally:
+            trainer.close()
+            reader.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""WebhookQueue behaviour with a stub handler: no Confluence, store or index involved.
+
+Usage (from the repo root):
+    python test/test_webhook_queue.py
+"""
+
+import sys
+import time
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from webhook_queue import MAX_ATTEMPTS, WebhookQueue, normalize_event
+
+
+def page_event(page_id, event_type="page_updated"):
+    return normalize_event({"webhookEvent": event_type, "page": {"id": page_id, "title": f"Page {page_id}"}})
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+class RecordingHandler:
+    """Stands in for refresh_runbooks; records each batch and optionally fails"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+        self.called_at = []
+        self.lock = threading.Lock()
+
+    def __call__(self, batch):
+        with self.lock:
+            self.batches.append(batch)
+            self.called_at.append(time.monotonic())
+        if self.fail:
+            raise RuntimeError("refresh failed")
+
+
+class NormalizeEventTest(unittest.TestCase):
+    def test_page_object(self):
+        event = normalize_event({"webhookEvent": "page_updated", "page": {"id": 42, "title": "Restart Jenkins"}})
+        self.assertEqual((event["event"], event["page_id"], event["title"]), ("page_updated", "42", "Restart Jenkins"))
+
+    def test_scalar_page_is_the_page_id(self):
+        self.assertEqual(normalize_event({"webhookEvent": "page_updated", "page": "42"})["page_id"], "42")
+        self.assertEqual(normalize_event({"webhookEvent": "page_updated", "content": 42})["page_id"], "42")
+
+    def test_missing_or_null_page_falls_back_to_a_crawl(self):
+        self.assertIsNone(normalize_event({"webhookEvent": "page_created", "page": None})["page_id"])
+        self.assertIsNone(normalize_event({"webhookEvent": "page_created"})["page_id"])
+
+    def test_malformed_payloads_are_rejected(self):
+        for payload in ({"webhookEvent": "page_updated", "page": ["42"]},
+                        {"webhookEvent": "page_updated", "page": True},
+                        {"webhookEvent": "page_updated", "page": {"id": {"nested": 1}}},
+                        ["page_updated"], "page_updated"):
+            self.assertIsNone(normalize_event(payload), payload)
+
+
+class WebhookQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.queue = None
+
+    def tearDown(self):
+        if self.queue is not None:
+            self.queue.stop(timeout=5)
+
+    def test_events_for_the_same_page_coalesce_into_one_batch(self):
+        handler = RecordingHandler()
+        self.queue = WebhookQueue(handler, debounce=0.2, max_delay=10)
+        for i in range(30):
+            self.queue.submit(page_event(str(i % 10)))
+        self.assertTrue(wait_for(lambda: self.queue.stats()["batches"] == 1))
+
+        self.assertEqual(len(handler.batches), 1)
+        batch = handler.batches[0]
+        self.assertEqual(sorted(event["page_id"] for event in batch), [str(i) for i in range(10)])
+        self.assertEqual(sum(event["count"] for event in batch), 30)
+        stats = self.queue.stats()
+        self.assertEqual((stats["received"], stats["coalesced"], stats["processed"]), (30, 20, 10))
+        self.assertEqual(stats["depth"], 0)
+
+    def test_latest_event_type_wins(self):
+        handler = RecordingHandler()
+        self.queue = WebhookQueue(handler, debounce=0.1, max_delay=10)
+        self.queue.submit(page_event("1", "page_created"))
+        self.queue.submit(page_event("1", "page_removed"))
+        self.assertTrue(wait_for(lambda: len(handler.batches) == 1))
+        self.assertEqual([(e["event"], e["count"]) for e in handler.batches[0]], [("page_removed", 2)])
+
+    def test_steady_stream_is_flushed_after_max_delay(self):
+        handler = RecordingHandler()
+        self.queue = WebhookQueue(handler, debounce=0.3, max_delay=0.5)
+        started = time.monotonic()
+        # A new event every 0.1s keeps the debounce window from ever closing
+        while time.monotonic() - started < 1.5:
+            self.queue.submit(page_event("1"))
+            time.sleep(0.1)
+        stream_ended = time.monotonic()
+        self.assertTrue(wait_for(lambda: self.queue.depth == 0 and self.queue.stats()["processing"] == 0))
+
+        self.assertGreaterEqual(len(handler.batches), 2)
+        first = handler.called_at[0] - started
+        self.assertGreaterEqual(first, 0.5)
+        self.assertLess(handler.called_at[0], stream_ended)
+        self.assertLess(first, 0.5 + 0.3)
+
+    def test_failing_batch_is_retried_then_dropped(self):
+        handler = RecordingHandler(fail=True)
+        self.queue = WebhookQueue(handler, debounce=0.05, max_delay=10)
+        self.queue.submit(page_event("7"))
+        self.assertTrue(wait_for(lambda: self.queue.stats()["dropped"] == 1))
+
+        self.assertEqual(len(handler.batches), MAX_ATTEMPTS)
+        self.assertEqual([batch[0]["attempts"] for batch in handler.batches], list(range(MAX_ATTEMPTS)))
+        stats = self.queue.stats()
+        self.assertEqual((stats["failed"], stats["processed"], stats["depth"]), (MAX_ATTEMPTS, 0, 0))
+        self.assertEqual(stats["last_error"], "RuntimeError: refresh failed")
+
+    def test_stop_drains_pending_events(self):
+        handler = RecordingHandler()
+        self.queue = WebhookQueue(handler, debounce=60, max_delay=600)
+        for page_id in ("1", "2", "3"):
+            self.queue.submit(page_event(page_id))
+        self.queue.stop(timeout=5)
+
+        self.assertEqual(len(handler.batches), 1)
+        self.assertEqual(sorted(event["page_id"] for event in handler.batches[0]), ["1", "2", "3"])
+        stats = self.queue.stats()
+        self.assertFalse(stats["worker_alive"])
+        self.assertEqual((stats["depth"], stats["processed"]), (0, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
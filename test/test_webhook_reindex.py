@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Webhook reindexing next to a second writer: vectors another process adds between two webhook
+batches must survive the next batch. Uses a real Chroma store in a temporary directory and a
+stub embedding model, so no model download or Confluence access is needed.
+
+Usage (from the repo root):
+    python test/test_webhook_reindex.py
+"""
+
+import os
+import sys
+import shutil
+import hashlib
+import tempfile
+import unittest
+import multiprocessing
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+DIMENSION = 8
+OTHER_WRITER_ID = "other_writer_chunk"
+
+
+def stub_vector(text):
+    digest = hashlib.sha256(text.encode('utf-8')).digest()
+    return [b / 255.0 for b in digest[:DIMENSION]]
+
+
+class StubModel:
+    """Just enough of SentenceTransformer for the indexer: deterministic vectors, no tokenizer"""
+
+    tokenizer = None
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def get_max_seq_length(self):
+        return 256
+
+    def get_sentence_embedding_dimension(self):
+        return DIMENSION
+
+    def state_dict(self):
+        return {}
+
+    def encode(self, texts, **kwargs):
+        return np.array([stub_vector(text) for text in texts], dtype=np.float32)
+
+
+def other_writer(vectordb_path, collection_name):
+    """Runs in its own process, like `indexing_pipeline_efficient.py --changes` or a second webhook pod"""
+    import chromadb
+
+    collection = chromadb.PersistentClient(path=vectordb_path).get_collection(name=collection_name)
+    collection.upsert(ids=[OTHER_WRITER_ID], embeddings=[stub_vector(OTHER_WRITER_ID)],
+                      metadatas=[{'runbook_id': 'other'}], documents=["Written by another process"])
+
+
+def stored_ids(vectordb_path, collection_name):
+    """Reads the store from a fresh process, so nothing cached in the test process can hide a loss"""
+    import chromadb
+
+    collection = chromadb.PersistentClient(path=vectordb_path).get_collection(name=collection_name)
+    return sorted(collection.get()['ids'])
+
+
+def page(page_id, body):
+    return {'id': page_id, 'title': f"Runbook {page_id}", 'url': f"https://wiki.example/{page_id}",
+            'version': 1, 'content': {'body': body}}
+
+
+class WebhookReindexTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.workdir = tempfile.mkdtemp(prefix="webhook_reindex_")
+        cls.vectordb_path = os.path.join(cls.workdir, "vectordb")
+        # Read at import time by index_registry; pending changes and the embedding cache live in the cwd
+        os.environ["RUNBOOK_VECTORDB_PATH"] = cls.vectordb_path
+        cls.previous_cwd = os.getcwd()
+        os.chdir(cls.workdir)
+
+        import indexing_pipeline_efficient
+        import webhook_queue
+
+        indexing_pipeline_efficient.SentenceTransformer = StubModel
+        cls.webhook_queue = webhook_queue
+        cls.pipeline = indexing_pipeline_efficient
+        cls.spawn = multiprocessing.get_context("spawn")
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.webhook_queue._indexer is not None:
+            cls.webhook_queue._indexer.close()
+            cls.webhook_queue._indexer = None
+        os.chdir(cls.previous_cwd)
+        shutil.rmtree(cls.workdir, ignore_errors=True)
+
+    def run_in_process(self, func, *args):
+        with self.spawn.Pool(1) as pool:
+            return pool.apply(func, args)
+
+    def queue_changes(self, *pages):
+        from runbook_changes import record_changeset
+
+        record_changeset({'added': [p['id'] for p in pages], 'updated': [], 'removed': [],
+                          'pages': {p['id']: p for p in pages}})
+
+    def test_second_writer_upserts_survive_webhook_reindex(self):
+        import index_manifest
+        from index_registry import close_client
+
+        # An empty index with a manifest, as a full index run would leave it
+        indexer = self.pipeline.EfficientRunbookIndexer(use_embedding_cache=False)
+        collection_name = indexer.collection_name
+        index_manifest.save_manifest(collection_name, {}, {'source': 'test'}, indexer.index_settings())
+        close_client(indexer.chroma_client)
+        indexer.close()
+
+        self.queue_changes(page("1001", "Restart the Jenkins agent. " * 20))
+        self.webhook_queue.reindex_pending()
+
+        self.run_in_process(other_writer, self.vectordb_path, collection_name)
+
+        self.queue_changes(page("1002", "Drain the faulty node before replacing it. " * 20))
+        self.webhook_queue.reindex_pending()
+
+        ids = self.run_in_process(stored_ids, self.vectordb_path, collection_name)
+        self.assertIn(OTHER_WRITER_ID, ids)
+        manifest = index_manifest.load_manifest(collection_name)
+        for runbook_id in ("1001", "1002"):
+            for chunk_id in manifest['runbooks'][runbook_id]['chunk_ids']:
+                self.assertIn(chunk_id, ids)
+
+
+if __name__ == "__main__":
+    unittest.main()
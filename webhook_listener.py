@@ -3,10 +3,11 @@ PARENT_PAGE_ID = "2678227022"
 # webhook_listener.py
 
 from flask import Flask, request, jsonify
-import specific  # Your specify.py is reused here
-from config import PARENT_PAGE_ID
+from webhook_queue import REMOVAL_EVENTS, WebhookQueue, normalize_event
 
 app = Flask(__name__)
+# One worker per process refreshes the runbook store; requests only enqueue
+queue = WebhookQueue()
 
 @app.route("/")
 def health_check():
@@ -14,18 +15,23 @@ def health_check():
 
 @app.route("/webhook", methods=["POST"])
 def confluence_webhook():
-    data = request.get_json()
-    event_type = data.get("webhookEvent", "")
+    event = normalize_event(request.get_json(silent=True) or {})
+    if event is None:
+        print("⚠️ Rejected malformed webhook payload")
+        return jsonify({"status": "rejected", "error": "malformed payload"}), 400
+    event_type = event["event"]
 
-    if event_type in ["page_created", "page_updated"]:
-        print(f"📥 Webhook received: {event_type} — triggering specify.py run")
-        pages = specific.fetch_child_pages(PARENT_PAGE_ID)
-        existing = specific.load_existing_data()
-        specific.save_combined_data(existing, pages)
-        return jsonify({"status": "runbook file updated", "event": event_type}), 200
+    if event_type in ["page_created", "page_updated", *REMOVAL_EVENTS]:
+        depth = queue.submit(event)
+        print(f"📥 Webhook received: {event_type} — queued ({depth} pending)")
+        return jsonify({"status": "queued", "event": event_type, "queue_depth": depth}), 202
 
     print(f"⚠️ Ignored webhook: {event_type}")
     return jsonify({"status": "ignored", "event": event_type}), 200
 
+@app.route("/webhook/queue", methods=["GET"])
+def queue_status():
+    return jsonify(queue.stats()), 200
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5001)
\ No newline at end of file
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Debounced queue between the Confluence webhook endpoints and the runbook refresh.
+
+The endpoints only enqueue events and return 202. Events for the same page coalesce while
+they wait, and one background worker processes them once no new events have arrived for
+DEBOUNCE_SECS (or MAX_DELAY_SECS after the oldest one, so a steady stream still gets
+processed). A bulk edit of 30 pages therefore becomes one refresh instead of 30 crawls
+inside 30 HTTP requests. A batch that fails is queued again, up to MAX_ATTEMPTS times.
+
+The refresh fetches only the pages named in the payloads, upserts them into the runbook
+store and then re-chunks and re-embeds just those pages into the active vector index. A web
+app in another process sees the new store revision and index manifest on its next query and
+reopens both (see SimpleRAGSystem.reload_if_changed), so no restart is needed. Events without a page id
+fall back to crawling the runbooks parent page. Set RUNBOOK_WEBHOOK_REINDEX=0 to leave the
+changes pending for `indexing_pipeline_efficient.py --changes` instead.
+"""
+
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import specific
+from runbook_store import RunbookStore, store_is_complete
+
+DEBOUNCE_SECS = float(os.environ.get("RUNBOOK_WEBHOOK_DEBOUNCE", "5"))
+MAX_DELAY_SECS = float(os.environ.get("RUNBOOK_WEBHOOK_MAX_DELAY", "60"))
+MAX_ATTEMPTS = 3
+REINDEX = os.environ.get("RUNBOOK_WEBHOOK_REINDEX", "1") != "0"
+REMOVAL_EVENTS = ("page_removed", "page_trashed")
+
+# Loaded on the first refresh and kept for its model; its Chroma client is reopened for every batch.
+# Only the single worker thread uses it.
+_indexer = None
+
+
+def normalize_event(payload: Any, default_type: str = "") -> Optional[Dict[str, Any]]:
+    """The parts of a Confluence webhook payload the refresh needs, or None if the payload is malformed.
+
+    `page` (or `content`) may be the page object or just its id; without one the refresh crawls.
+    """
+    if not isinstance(payload, dict):
+        return None
+    page = payload.get("page")
+    if page is None:
+        page = payload.get("content")
+    if isinstance(page, (str, int)) and not isinstance(page, bool):
+        page = {"id": page}
+    elif page is None:
+        page = {}
+    elif not isinstance(page, dict):
+        return None
+    page_id = page.get("id")
+    if page_id is not None and not (isinstance(page_id, (str, int)) and not isinstance(page_id, bool)):
+        return None
+    return {
+        "event": payload.get("webhookEvent", default_type),
+        "page_id": str(page_id) if page_id not in (None, "") else None,
+        "title": page.get("title", ""),
+        "received_at": datetime.now().isoformat(),
+        "count": 1,
+        "attempts": 0
+    }
+
+
+def crawl_runbooks(events: List[Dict[str, Any]]):
+    """Refresh the store for a batch of events with one crawl of the runbooks parent page"""
+    print(f"🔄 Refreshing runbooks for {len(events)} queued webhook event(s)")
+    store = RunbookStore()
+    try:
+        # Same tree as sync_runbooks; only pages whose version changed have their bodies downloaded
+        pages = specific.fetch_descendant_pages(specific.PARENT_PAGE_ID, known=store)
+        if pages is None:
+            raise RuntimeError("Runbook crawl incomplete; resuming from the checkpoint on retry")
+        # Takes the store's writer lock, so concurrent writers never interleave
+        specific.save_combined_data(store, pages, full_listing=True, capped_at=pages.capped_at)
+    finally:
+        store.close()
+
+
+def reindex_pending():
+    """Index pending changesets into the active collection with a long-lived indexer"""
+    global _indexer
+    try:
+        from index_registry import close_client, index_write_lock
+        from indexing_pipeline_efficient import EfficientRunbookIndexer, apply_pending_changes
+    except ImportError as e:
+        print(f"⚠️ Indexer unavailable ({e}); changes stay pending for indexing_pipeline_efficient.py --changes")
+        return
+    # Held from opening the store to the last write, so a compaction cannot retire the collection meanwhile
+    with index_write_lock():
+        if _indexer is None:
+            _indexer = EfficientRunbookIndexer()
+        else:
+            # Picks up blue/green switches, compactions and vectors other writers added since the last batch
+            _indexer.reopen_store()
+        try:
+            applied = apply_pending_changes(_indexer)
+        finally:
+            # Nothing may persist from this client once other processes write to the store again
+            close_client(_indexer.chroma_client)
+    if not applied:
+        raise RuntimeError("pending changes could not be indexed")
+
+
+def refresh_runbooks(events: List[Dict[str, Any]]):
+    """Refresh only the pages named in `events`, then re-index them"""
+    page_ids = [event["page_id"] for event in events if event["page_id"] is not None]
+    if page_ids and not store_is_complete():
+        # Single pages cannot be merged into a store that does not hold the rest of the tree yet
+        crawl_runbooks(events)
+        page_ids = []
+    elif any(event["page_id"] is None for event in events):
+        crawl_runbooks([event for event in events if event["page_id"] is None])
+    if page_ids:
+        # Removed and trashed pages come back as gone from fetch_page, so they need no special case
+        print(f"🔄 Refreshing {len(page_ids)} page(s) from webhook events: {', '.join(page_ids)}")
+        store = RunbookStore()
+        try:
+            specific.refresh_pages(store, page_ids)
+        finally:
+            store.close()
+    if REINDEX:
+        reindex_pending()
+
+
+class WebhookQueue:
+    def __init__(self, handler: Callable[[List[Dict[str, Any]]], None] = refresh_runbooks,
+                 debounce: float = DEBOUNCE_SECS, max_delay: float = MAX_DELAY_SECS):
+        self.handler = handler
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._first_at = 0.0
+        self._last_at = 0.0
+        self._processing = 0
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"received": 0, "coalesced": 0, "batches": 0, "processed": 0, "failed": 0, "dropped": 0,
+                       "last_batch_at": None, "last_batch_secs": None, "last_error": None}
+
+    def start(self):
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="webhook-queue", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Process whatever is pending right away, then stop the worker"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def submit(self, event: Dict[str, Any]) -> int:
+        """Queue `event` (from normalize_event), coalescing it with a pending one for the same page; returns the depth"""
+        self.start()
+        key = event["page_id"] or event["event"]
+        with self._cond:
+            now = time.monotonic()
+            if not self._pending:
+                self._first_at = now
+            self._last_at = now
+            self._stats["received"] += 1
+            previous = self._pending.get(key)
+            if previous is not None:
+                # The latest event type wins (e.g. created then updated), but the count is kept
+                self._stats["coalesced"] += 1
+                event = {**event, "count": previous["count"] + event["count"]}
+            self._pending[key] = event
+            self._cond.notify_all()
+            return len(self._pending)
+
+    @property
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            oldest = time.monotonic() - self._first_at if self._pending else 0.0
+            return {
+                "depth": len(self._pending),
+                "processing": self._processing,
+                "oldest_pending_secs": round(oldest, 3),
+                "debounce_secs": self.debounce,
+                "worker_alive": self._thread is not None and self._thread.is_alive(),
+                **self._stats
+            }
+
+    def _take_batch(self) -> Optional[List[Dict[str, Any]]]:
+        """Wait for the debounce window to close and take everything pending; None once stopped and drained"""
+        with self._cond:
+            while not self._pending and not self._stopping:
+                self._cond.wait()
+            while self._pending and not self._stopping:
+                due = min(self._last_at + self.debounce, self._first_at + self.max_delay)
+                remaining = due - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if not self._pending:
+                return None
+            batch = list(self._pending.values())
+            self._pending = {}
+            self._processing = len(batch)
+            return batch
+
+    def _requeue(self, batch: List[Dict[str, Any]]):
+        now = time.monotonic()
+        for event in batch:
+            key = event["page_id"] or event["event"]
+            if event["attempts"] + 1 >= MAX_ATTEMPTS:
+                self._stats["dropped"] += 1
+                print(f"❌ Dropping webhook event for {key} after {MAX_ATTEMPTS} failed attempts")
+                continue
+            # A newer event for the same page has arrived meanwhile and will cover this one
+            if key not in self._pending:
+                if not self._pending:
+                    self._first_at = now
+                self._pending[key] = {**event, "attempts": event["attempts"] + 1}
+        if self._pending:
+            self._last_at = now
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            started = time.monotonic()
+            error = None
+            try:
+                self.handler(batch)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                print(f"❌ Webhook batch of {len(batch)} event(s) failed: {error}")
+            with self._cond:
+                self._processing = 0
+                self._stats["batches"] += 1
+                self._stats["last_batch_at"] = datetime.now().isoformat()
+                self._stats["last_batch_secs"] = round(time.monotonic() - started, 3)
+                self._stats["last_error"] = error
+                if error is None:
+                    self._stats["processed"] += len(batch)
+                else:
+                    self._stats["failed"] += len(batch)
+                    self._requeue(batch)
@@ -1,16 +1,22 @@
 from flask import Flask, request
-from specific import fetch_child_pages, load_existing_runbooks, save_runbooks
+from webhook_queue import WebhookQueue, normalize_event
 
 app = Flask(__name__)
 PARENT_PAGE_ID = "2678227022"
+queue = WebhookQueue()
 
 @app.route('/runbook-notify', methods=['POST'])
 def handle_webhook():
     print("📩 Webhook received for page creation.")
-    new_pages = fetch_child_pages(PARENT_PAGE_ID)
-    existing_data = load_existing_runbooks()
-    save_runbooks(existing_data, new_pages)
-    return {"status": "success"}, 200
+    event = normalize_event(request.get_json(silent=True) or {}, default_type="page_created")
+    if event is None:
+        return {"status": "rejected", "error": "malformed payload"}, 400
+    depth = queue.submit(event)
+    return {"status": "queued", "queue_depth": depth}, 202
+
+@app.route('/runbook-notify/queue', methods=['GET'])
+def queue_status():
+    return queue.stats(), 200
 
 if __name__ == '__main__':
     app.run(port=8080)